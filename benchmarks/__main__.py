@@ -0,0 +1,58 @@
+"""Runs the benchmark suite
+
+Usage:
+    python -m benchmarks --output bench_results.json
+    python -m benchmarks --baseline bench_results.json --threshold 0.15
+"""
+import argparse
+import sys
+
+from loguru import logger
+
+from . import (  # noqa: F401 - registers the benchmarks
+    bench_db,
+    bench_hot_paths,
+    bench_models,
+)
+from .runner import (
+    compare_to_baseline,
+    load_results,
+    run_benchmarks,
+    save_results,
+)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Run the slacktools benchmark suite')
+    parser.add_argument('--output', help='Path to save the results (JSON) to')
+    parser.add_argument('--baseline', help='Path to a previous results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='Fractional slowdown in median time flagged as a regression (default: 0.15)')
+    parser.add_argument('--filter', dest='name_filter', help='Only run benchmarks whose name contains this')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--target-time', type=float, default=0.2, help='Seconds per repeat')
+    parser.add_argument('--log-level', default='WARNING', help='Log level while benchmarking (default: WARNING)')
+    args = parser.parse_args(argv)
+
+    # Debug logging in the hot paths would otherwise dominate the timings
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    results = run_benchmarks(name_filter=args.name_filter, repeats=args.repeats, target_time=args.target_time)
+    if args.output:
+        save_results(results, args.output)
+
+    if args.baseline:
+        rows = compare_to_baseline(results, load_results(args.baseline), threshold=args.threshold)
+        print(f'\n{"benchmark":<55} {"baseline":>12} {"current":>12} {"ratio":>7}')
+        for row in rows:
+            flag = '  REGRESSION' if row['is_regression'] else ''
+            print(f'{row["name"]:<55} {row["baseline"] * 1e6:>10.2f}us {row["current"] * 1e6:>10.2f}us '
+                  f'{row["ratio"]:>7.2f}{flag}')
+        if any(row['is_regression'] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""SQLiteClient throughput: default settings vs. SQLITE_PERFORMANCE_PRAGMAS"""
+import os
+import tempfile
+from typing import Callable
+
+from sqlalchemy import (
+    Column,
+    MetaData,
+    String,
+    Table,
+    text,
+)
+
+from slacktools.db_engine import (
+    SQLITE_PERFORMANCE_PRAGMAS,
+    SQLiteClient,
+)
+
+from .fixtures import Fixtures
+from .runner import benchmark
+
+N_ROWS = 10000
+ROWS_PER_COMMIT = 10
+METADATA = MetaData()
+MSG_TABLE = Table(
+    'msg', METADATA,
+    Column('ts', String, primary_key=True),
+    Column('user_id', String),
+    Column('txt', String),
+)
+
+
+def _build_client(pragmas) -> SQLiteClient:
+    tmpdir = tempfile.TemporaryDirectory()
+    client = SQLiteClient(props={'database': os.path.join(tmpdir.name, 'bench.db')}, pragmas=pragmas)
+    # Cleaned up along with the client
+    client._bench_tmpdir = tmpdir
+    METADATA.create_all(client.engine)
+    return client
+
+
+for _profile_name, _pragmas in [
+    ('default', None),
+    ('performance', SQLITE_PERFORMANCE_PRAGMAS),
+]:
+    def _setup_write(pragmas=_pragmas) -> Callable:
+        client = _build_client(pragmas)
+        fixtures = Fixtures()
+        counter = iter(range(10 ** 9))
+
+        def _run():
+            # Small, commit-heavy writes - e.g., keeping bot state in sync
+            rows = [{'ts': f'{next(counter)}', 'user_id': fixtures.slack_id('U'), 'txt': fixtures.sentence()}
+                    for _ in range(ROWS_PER_COMMIT)]
+            with client.engine.begin() as conn:
+                conn.execute(text('INSERT INTO msg VALUES (:ts, :user_id, :txt)'), rows)
+        return _run
+
+    def _setup_read(pragmas=_pragmas) -> Callable:
+        client = _build_client(pragmas)
+        fixtures = Fixtures()
+        client.bulk_insert(MSG_TABLE, ({'ts': f'{i}', 'user_id': fixtures.slack_id('U'), 'txt': fixtures.sentence()}
+                                       for i in range(N_ROWS)))
+        keys = [f'{fixtures.rand.randint(0, N_ROWS - 1)}' for _ in range(1000)]
+        counter = iter(range(10 ** 9))
+
+        def _run():
+            with client.engine.connect() as conn:
+                conn.execute(text('SELECT txt FROM msg WHERE ts = :ts'), {'ts': keys[next(counter) % 1000]}).scalar()
+        return _run
+
+    benchmark(f'SQLiteClient.write[{ROWS_PER_COMMIT} rows/commit, {_profile_name}]')(_setup_write)
+    benchmark(f'SQLiteClient.read[point lookup, {N_ROWS} rows, {_profile_name}]')(_setup_read)
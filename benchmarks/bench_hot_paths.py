@@ -0,0 +1,350 @@
+"""Benchmarks for the code that runs on every event or every send"""
+import copy
+import json
+from typing import (
+    Callable,
+    Dict,
+    List,
+)
+
+from slacktools import codec
+from slacktools.api.base import BaseApiObject
+from slacktools.api.events.message import Message
+from slacktools.api.web.conversations import ConversationHistory
+from slacktools.block_kit.base import (
+    dictify_blocks,
+    encode_blocks,
+)
+from slacktools.block_kit.blocks import (
+    ActionsBlock,
+    DividerBlock,
+    MarkdownContextBlock,
+    MarkdownSectionBlock,
+)
+from slacktools.block_kit.elements.input import ButtonElement
+from slacktools.block_kit.planner import plan_message
+from slacktools.block_kit.template import BlockTemplate
+from slacktools.block_kit.validator import validate_blocks
+from slacktools.event_router import EventRouter
+from slacktools.option_source import OptionIndex
+from slacktools.slack_input_parser import (
+    SlackInputParser,
+    block_text_converter,
+)
+from slacktools.slack_methods import SlackMethods
+from slacktools.tables import TableLayout
+from slacktools.text_effects import (
+    EmojiPhraseBuilder,
+    tiny_text_batch,
+)
+from slacktools.tools import SlackTools
+
+from .fixtures import (
+    Fixtures,
+    build_stub_bot,
+)
+from .runner import benchmark
+
+N_EVENT_POOL = 10_000
+
+
+def _build_event_cycler(fixtures: Fixtures, text: str, channel: str = None) -> Callable[[], Dict]:
+    """Cycles through a pool of pre-built (unique) events so fixture generation isn't timed"""
+    pool = [fixtures.event_envelope(fixtures.message_event(text=text, channel=channel)) for _ in range(N_EVENT_POOL)]
+    state = {'i': 0}
+
+    def _next() -> Dict:
+        state['i'] = (state['i'] + 1) % N_EVENT_POOL
+        return pool[state['i']]
+    return _next
+
+
+@benchmark('parse_message_event[matched, 50 cmds]')
+def bench_parse_message_matched() -> Callable:
+    fixtures = Fixtures()
+    bot = build_stub_bot()
+    bot.update_commands(fixtures.command_items(50, bot))
+    next_event = _build_event_cycler(fixtures, text='bb cmd25 hello')
+
+    def _run():
+        # Events would be deduplicated on their hash, so clear out the store to keep the run representative
+        bot.message_events = []
+        bot.parse_message_event(next_event())
+    return _run
+
+
+@benchmark('parse_message_event[unmatched]')
+def bench_parse_message_unmatched() -> Callable:
+    fixtures = Fixtures()
+    bot = build_stub_bot()
+    bot.update_commands(fixtures.command_items(50, bot))
+    next_event = _build_event_cycler(fixtures, text='just people chatting about things')
+
+    def _run():
+        bot.parse_message_event(next_event())
+    return _run
+
+
+@benchmark('EventRouter.dispatch[reaction, 3 handlers, 1 filtered]')
+def bench_event_router() -> Callable:
+    router = EventRouter()
+    for i in range(2):
+        router.add_handler('reaction_added', lambda event, **kwargs: event.reaction, priority=i)
+    router.add_handler('reaction_added', lambda event, **kwargs: event.reaction,
+                       predicate=lambda x: x.get('reaction') == 'nope')
+    event = {'event': {'type': 'reaction_added', 'user': 'U1', 'reaction': 'wave', 'item_user': 'U2',
+                       'item': {'type': 'message', 'channel': 'C1', 'ts': '1700000000.000100'},
+                       'event_ts': '1700000000.000200'}}
+
+    def _run():
+        router.dispatch(event)
+    return _run
+
+
+@benchmark('EventRouter.dispatch[raw bytes, message event]')
+def bench_event_router_bytes() -> Callable:
+    router = EventRouter()
+    router.add_handler('message', lambda event, **kwargs: event.text)
+    raw = codec.dumpb(Fixtures().event_envelope(Fixtures().message_event()))
+
+    def _run():
+        router.dispatch(raw)
+    return _run
+
+
+def _build_dispatch_bench(n_cmds: int) -> Callable:
+    fixtures = Fixtures()
+    bot = build_stub_bot()
+    bot.update_commands(fixtures.command_items(n_cmds, bot))
+    # Worst case: the matching command is the last one registered
+    msg = Message(fixtures.message_event(text=f'cmd{n_cmds - 1} hello'))
+    msg.take_processed_message(clean_msg=msg.text, raw_message=msg.text)
+
+    def _run():
+        bot.handle_command(msg)
+    return _run
+
+
+for _n in [10, 100, 500]:
+    benchmark(f'handle_command[dispatch, {_n} cmds, last matches]')(lambda n=_n: _build_dispatch_bench(n))
+
+
+@benchmark('BaseApiObject[message event]')
+def bench_api_object_event() -> Callable:
+    event = Fixtures().message_event()
+
+    def _run():
+        Message(event)
+    return _run
+
+
+@benchmark('BaseApiObject[conversation history, 1000 msgs]')
+def bench_api_object_history() -> Callable:
+    history = Fixtures().conversation_history(n_messages=1000)
+
+    def _run():
+        ConversationHistory(history)
+    return _run
+
+
+@benchmark('BaseApiObject.asdict[conversation history, 1000 msgs]')
+def bench_api_object_history_asdict() -> Callable:
+    history = ConversationHistory(Fixtures().conversation_history(n_messages=1000))
+
+    def _run():
+        history.asdict()
+    return _run
+
+
+@benchmark('BaseApiObject[lazy, history 1000 msgs, read 3 fields]')
+def bench_api_object_history_lazy() -> Callable:
+    history = Fixtures().conversation_history(n_messages=1000)
+
+    def _run():
+        BaseApiObject.set_lazy_mode(True)
+        try:
+            resp = ConversationHistory(history)
+            for msg in resp.messages:
+                _ = msg.user, msg.text, msg.ts
+            resp.asdict()
+        finally:
+            BaseApiObject.set_lazy_mode(False)
+    return _run
+
+
+@benchmark('BaseElement.asdict[50 blocks, 100 options]')
+def bench_element_asdict() -> Callable:
+    blocks = Fixtures().block_elements(n_blocks=50, n_options=100)
+
+    def _run():
+        for block in blocks:
+            block.asdict()
+    return _run
+
+
+@benchmark('_dictify_blocks[50 blocks, 100 options]')
+def bench_dictify_blocks() -> Callable:
+    blocks = Fixtures().block_elements(n_blocks=50, n_options=100)
+
+    def _run():
+        SlackMethods._dictify_blocks(blocks)
+    return _run
+
+
+@benchmark('json.dumps(_dictify_blocks)[50 blocks, 100 options]')
+def bench_stdlib_encode_blocks() -> Callable:
+    blocks = Fixtures().block_elements(n_blocks=50, n_options=100)
+
+    def _run():
+        json.dumps(SlackMethods._dictify_blocks(blocks))
+    return _run
+
+
+@benchmark('encode_blocks[50 blocks, 100 options]')
+def bench_encode_blocks() -> Callable:
+    blocks = Fixtures().block_elements(n_blocks=50, n_options=100)
+
+    def _run():
+        encode_blocks(blocks)
+    return _run
+
+
+@benchmark('encode_blocks[50 blocks, 100 options, frozen]')
+def bench_encode_frozen_blocks() -> Callable:
+    blocks = [x.freeze() for x in Fixtures().block_elements(n_blocks=50, n_options=100)]
+
+    def _run():
+        encode_blocks(blocks)
+    return _run
+
+
+def _status_card(title: str, desc: str, item_id: str) -> List:
+    return [
+        MarkdownSectionBlock([f'*{title}*', f'_{desc}_']),
+        MarkdownContextBlock([f'Item: *`{item_id}`*']),
+        ActionsBlock([ButtonElement('Details', value=item_id)]),
+        DividerBlock(),
+    ]
+
+
+@benchmark('encode_blocks[status card, built per send]')
+def bench_status_card_objects() -> Callable:
+    def _run():
+        encode_blocks(_status_card(title='Deploy', desc='Rolled out <v2> & friends', item_id='123'))
+    return _run
+
+
+@benchmark('BlockTemplate.render[status card]')
+def bench_status_card_template() -> Callable:
+    slot = BlockTemplate.slot
+    tmpl = BlockTemplate(_status_card(title=slot('title'), desc=slot('desc'), item_id=slot('item_id')))
+
+    def _run():
+        tmpl.render(title='Deploy', desc='Rolled out <v2> & friends', item_id='123')
+    return _run
+
+
+@benchmark('plan_message[help block, 100 cmds]')
+def bench_plan_help_block() -> Callable:
+    fixtures = Fixtures()
+    bot = build_stub_bot()
+    bot.update_commands(fixtures.command_items(100, bot))
+    blocks = bot.search_help_block('shelp -g support')
+
+    def _run():
+        plan_message(blocks)
+    return _run
+
+
+@benchmark('validate_blocks[50 blocks, 100 options]')
+def bench_validate_blocks() -> Callable:
+    blocks = [x.asdict() for x in Fixtures().block_elements(n_blocks=50, n_options=100)]
+
+    def _run():
+        validate_blocks(blocks)
+    return _run
+
+
+@benchmark('dictify_blocks[help block, 100 cmds]')
+def bench_help_block() -> Callable:
+    fixtures = Fixtures()
+    bot = build_stub_bot()
+    bot.update_commands(fixtures.command_items(100, bot))
+    build = dictify_blocks(lambda: bot.search_help_block('shelp -g support'))
+
+    def _run():
+        build()
+    return _run
+
+
+@benchmark('block_text_converter[50 blocks]')
+def bench_block_text_converter() -> Callable:
+    blocks = Fixtures().dict_blocks(n_blocks=50)
+
+    def _run():
+        block_text_converter(blocks=copy.deepcopy(blocks), callable_list=[str.upper, 'text'])
+    return _run
+
+
+@benchmark('OptionIndex.search[10k options, rotating queries]')
+def bench_option_index_search() -> Callable:
+    fixtures = Fixtures()
+    index = OptionIndex([(fixtures.sentence(3), f'val-{i}') for i in range(10_000)])
+    # More queries than the index's query cache holds, so most lookups do the full search
+    queries = [fixtures.word()[:fixtures.rand.randint(2, 5)] for _ in range(1000)]
+    state = {'i': 0}
+
+    def _run():
+        state['i'] = (state['i'] + 1) % len(queries)
+        index.build_options(queries[state['i']])
+    return _run
+
+
+@benchmark('parse_flags_from_command[5 flags]')
+def bench_parse_flags() -> Callable:
+    fixtures = Fixtures()
+    commands = [fixtures.flag_command(5) for _ in range(100)]
+    state = {'i': 0}
+
+    def _run():
+        state['i'] = (state['i'] + 1) % 100
+        SlackInputParser.parse_flags_from_command(commands[state['i']])
+    return _run
+
+
+@benchmark('EmojiPhraseBuilder.build[40 chars]')
+def bench_build_phrase() -> Callable:
+    builder = EmojiPhraseBuilder()
+    phrase = Fixtures().sentence(8)[:40]
+
+    def _run():
+        builder.build(phrase)
+    return _run
+
+
+@benchmark('tiny_text_batch[100 strings]')
+def bench_tiny_text() -> Callable:
+    fixtures = Fixtures()
+    msgs = [fixtures.sentence(3) for _ in range(100)]
+
+    def _run():
+        tiny_text_batch(msgs)
+    return _run
+
+
+@benchmark('df_to_slack_table[1000 rows]')
+def bench_df_to_slack_table() -> Callable:
+    df = Fixtures().dataframe(n_rows=1000)
+
+    def _run():
+        SlackTools.df_to_slack_table(df)
+    return _run
+
+
+@benchmark('TableLayout.render_chunks[1000 rows]')
+def bench_table_chunks() -> Callable:
+    df = Fixtures().dataframe(n_rows=1000)
+
+    def _run():
+        TableLayout(df).render_chunks()
+    return _run
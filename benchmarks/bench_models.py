@@ -0,0 +1,42 @@
+"""Regular vs. compact API models: construction time and memory held"""
+from typing import Callable
+
+from slacktools.api.compact import (
+    CompactMessage,
+    CompactUserInfo,
+)
+from slacktools.api.web.conversations import Message
+from slacktools.api.web.users import UserInfo
+
+from .fixtures import Fixtures
+from .runner import (
+    benchmark,
+    memory_benchmark,
+)
+
+N_USERS = 1000
+N_MESSAGES = 1000
+
+
+def _user_dicts():
+    fixtures = Fixtures()
+    return [fixtures.user_info() for _ in range(N_USERS)]
+
+
+def _message_dicts():
+    return Fixtures().conversation_history(n_messages=N_MESSAGES)['messages']
+
+
+for _model_name, _model_cls, _build_dicts in [
+    ('UserInfo', UserInfo, _user_dicts),
+    ('CompactUserInfo', CompactUserInfo, _user_dicts),
+    ('Message', Message, _message_dicts),
+    ('CompactMessage', CompactMessage, _message_dicts),
+]:
+    def _setup(model_cls=_model_cls, build_dicts=_build_dicts) -> Callable:
+        # The source dicts are built up front, so only the model objects are timed/measured
+        dicts = build_dicts()
+        return lambda: [model_cls(x) for x in dicts]
+
+    benchmark(f'{_model_name}[construct x1000]')(_setup)
+    memory_benchmark(f'{_model_name}[x1000]')(_setup)
@@ -0,0 +1,253 @@
+"""Reproducible synthetic payloads for the benchmarks. Everything here is driven off a seeded Random,
+so the same seed always produces the same data."""
+import random
+import string
+from typing import (
+    Dict,
+    List,
+)
+from unittest.mock import patch
+
+from slacktools.block_kit.base import BaseElement
+from slacktools.block_kit.blocks import (
+    ActionsBlock,
+    DividerBlock,
+    MarkdownContextBlock,
+    MarkdownSectionBlock,
+    MultiStaticSelectSectionBlock,
+    StaticSelectSectionBlock,
+)
+from slacktools.block_kit.elements.input import ButtonElement
+from slacktools.command_processing import CommandItem
+
+DEFAULT_SEED = 42
+
+
+class Fixtures:
+    """Builds synthetic Slack payloads"""
+
+    def __init__(self, seed: int = DEFAULT_SEED):
+        self.rand = random.Random(seed)
+        self._ts = 1700000000.000100
+
+    def word(self, n_min: int = 3, n_max: int = 10) -> str:
+        return ''.join(self.rand.choices(string.ascii_lowercase, k=self.rand.randint(n_min, n_max)))
+
+    def sentence(self, n_words: int = 12) -> str:
+        return ' '.join(self.word() for _ in range(n_words))
+
+    def slack_id(self, prefix: str = 'U') -> str:
+        return prefix + ''.join(self.rand.choices(string.ascii_uppercase + string.digits, k=10))
+
+    def next_ts(self) -> str:
+        self._ts += 1.000001
+        return f'{self._ts:.6f}'
+
+    def rich_text_block(self, text: str) -> Dict:
+        return {
+            'type': 'rich_text',
+            'block_id': self.word(5, 5),
+            'elements': [{
+                'type': 'rich_text_section',
+                'elements': [{'type': 'text', 'text': text}]
+            }]
+        }
+
+    def message_event(self, text: str = None, user: str = None, channel: str = None) -> Dict:
+        ts = self.next_ts()
+        text = self.sentence() if text is None else text
+        return {
+            'type': 'message',
+            'text': text,
+            'user': self.slack_id('U') if user is None else user,
+            'ts': ts,
+            'team': 'T0000000001',
+            'blocks': [self.rich_text_block(text)],
+            'channel': self.slack_id('C') if channel is None else channel,
+            'event_ts': ts,
+            'channel_type': 'channel',
+        }
+
+    def event_envelope(self, event: Dict) -> Dict:
+        return {
+            'token': 'faketoken',
+            'team_id': 'T0000000001',
+            'api_app_id': 'A0000000001',
+            'event': event,
+            'type': 'event_callback',
+            'event_id': self.slack_id('Ev'),
+            'event_time': int(float(event['ts'])),
+        }
+
+    def history_message(self, user_ids: List[str]) -> Dict:
+        text = self.sentence()
+        msg = {
+            'type': 'message',
+            'user': self.rand.choice(user_ids),
+            'text': text,
+            'ts': self.next_ts(),
+            'team': 'T0000000001',
+            'blocks': [self.rich_text_block(text)],
+        }
+        if self.rand.random() < 0.5:
+            msg['reactions'] = [
+                {'name': self.word(), 'users': self.rand.sample(user_ids, 3), 'count': 3}
+                for _ in range(self.rand.randint(1, 4))
+            ]
+        if self.rand.random() < 0.1:
+            msg['attachments'] = [{
+                'service_name': 'site',
+                'text': self.sentence(),
+                'fallback': 'fallback',
+                'thumb_url': 'https://example.com/thumb.png',
+                'thumb_width': 100,
+                'thumb_height': 100,
+                'id': 1,
+            }]
+        return msg
+
+    def conversation_history(self, n_messages: int = 1000, n_users: int = 50) -> Dict:
+        user_ids = [self.slack_id('U') for _ in range(n_users)]
+        return {
+            'ok': True,
+            'messages': [self.history_message(user_ids) for _ in range(n_messages)],
+            'has_more': True,
+            'pin_count': 0,
+            'response_metadata': {'next_cursor': 'bmV4dF90czoxNTEyMDg1ODYxMDAwNTQz'},
+        }
+
+    def user_info(self) -> Dict:
+        name = self.word()
+        user_id = self.slack_id('U')
+        team_id = 'T0000000001'
+        return {
+            'id': user_id,
+            'team_id': team_id,
+            'name': name,
+            'deleted': False,
+            'color': '9f69e7',
+            'real_name': name.title(),
+            'tz': 'America/Chicago',
+            'tz_label': 'Central Standard Time',
+            'tz_offset': -21600,
+            'profile': {
+                'avatar_hash': self.word(12, 12),
+                'status_text': self.sentence(3),
+                'status_emoji': f':{self.word()}:',
+                'real_name': name.title(),
+                'display_name': name,
+                'real_name_normalized': name.title(),
+                'display_name_normalized': name,
+                'email': f'{name}@example.com',
+                'image_32': 'https://example.com/32.png',
+                'image_512': 'https://example.com/512.png',
+                'team': team_id,
+            },
+            'is_admin': False,
+            'is_owner': False,
+            'is_primary_owner': False,
+            'is_restricted': False,
+            'is_ultra_restricted': False,
+            'is_bot': False,
+            'updated': 1700000000,
+            'is_app_user': False,
+            'has_2fa': False,
+        }
+
+    def command_items(self, n: int, bot_obj) -> List[CommandItem]:
+        cmds = []
+        for i in range(n):
+            cmds.append(CommandItem(
+                group=self.rand.choice(['support', 'random', 'admin', 'games']),
+                pattern=rf'^cmd{i}\s?{self.word()}',
+                cmd_details={
+                    'title': f'Command {i}',
+                    'tags': [self.word() for _ in range(2)] + (['main'] if i < 3 else []),
+                    'desc': self.sentence(8),
+                    'flags': [f'-{self.word(1, 1)} <{self.word()}>'],
+                    'examples': [f'cmd{i} {self.word()}'],
+                    'response_txt': f'response {i}',
+                },
+                obj=bot_obj
+            ))
+        return cmds
+
+    def block_elements(self, n_blocks: int = 50, n_options: int = 100) -> List[BaseElement]:
+        """A mix of sections, contexts, selects and action rows, as is typical for our bots"""
+        blocks = []
+        while len(blocks) < n_blocks:
+            kind = len(blocks) % 5
+            if kind == 0:
+                blocks.append(MarkdownSectionBlock([f'*{self.sentence(3)}*', self.sentence()]))
+            elif kind == 1:
+                blocks.append(MarkdownContextBlock([self.sentence(4), self.sentence(4)]))
+            elif kind == 2:
+                pairs = [(self.word(), f'val-{i}') for i in range(n_options)]
+                blocks.append(StaticSelectSectionBlock(self.sentence(3), option_pairs=pairs,
+                                                       placeholder='Pick one'))
+            elif kind == 3:
+                pairs = [(self.word(), f'val-{i}') for i in range(n_options)]
+                blocks.append(MultiStaticSelectSectionBlock(self.sentence(3), option_pairs=pairs,
+                                                            placeholder='Pick some'))
+            else:
+                blocks.append(ActionsBlock([ButtonElement(self.word(), action_id=f'btn-{i}') for i in range(5)]))
+        blocks[-1:] = [DividerBlock()]
+        return blocks[:n_blocks]
+
+    def dict_blocks(self, n_blocks: int = 50) -> List[Dict]:
+        return [x.asdict() for x in self.block_elements(n_blocks=n_blocks, n_options=10)]
+
+    def flag_command(self, n_flags: int = 5) -> str:
+        parts = [self.sentence(3)]
+        for i in range(n_flags):
+            parts.append(f'-{self.word(1, 3)} {self.sentence(self.rand.randint(0, 4))}')
+        return ' '.join(parts)
+
+    def dataframe(self, n_rows: int = 1000):
+        import pandas as pd
+        return pd.DataFrame({
+            'user': [self.word() for _ in range(n_rows)],
+            'channel': [self.slack_id('C') for _ in range(n_rows)],
+            'count': [self.rand.randint(0, 10000) for _ in range(n_rows)],
+            'score': [self.rand.random() * 100 for _ in range(n_rows)],
+            'note': [self.sentence(4) for _ in range(n_rows)],
+            'is_active': [self.rand.random() < 0.5 for _ in range(n_rows)],
+        })
+
+
+class _StubResponse(dict):
+    """Enough of a SlackResponse for the send paths"""
+
+    @property
+    def data(self) -> Dict:
+        return self
+
+
+class StubWebClient:
+    """A no-network WebClient stand-in whose every method returns an `ok` response"""
+
+    def __init__(self, token: str = None, **kwargs):
+        self.token = token
+
+    def auth_test(self, **kwargs) -> _StubResponse:
+        return _StubResponse(ok=True, bot_id='B0000000001', user_id='U0000000001')
+
+    def api_call(self, api_method: str, **kwargs) -> _StubResponse:
+        return _StubResponse(ok=True)
+
+    def __getattr__(self, item):
+        def _method(**kwargs) -> _StubResponse:
+            return _StubResponse(ok=True, ts='1700000000.000100', message_ts='1700000000.000100',
+                                 channel={'id': 'D0000000001'})
+        return _method
+
+
+def build_stub_bot(triggers: List[str] = None):
+    """Builds a SlackBotBase that doesn't touch the network"""
+    from slacktools.slackbot import SlackBotBase
+
+    props = {'team': 'bench', 'xoxp-token': 'xoxp-bench', 'xoxb-token': 'xoxb-bench'}
+    with patch('slacktools.slack_methods.WebClient', StubWebClient):
+        bot = SlackBotBase(props=props, triggers=['bb'] if triggers is None else triggers, main_channel='C0',
+                           admins=[])
+    return bot
@@ -0,0 +1,149 @@
+"""Minimal benchmark registry & runner.
+
+Each benchmark is a setup function that builds its fixtures and returns a zero-arg callable to time.
+    Results are saved as JSON and can be compared against a saved baseline with a regression threshold.
+"""
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Optional,
+)
+
+BENCHMARKS = {}  # type: Dict[str, Callable[[], Callable[[], object]]]
+MEMORY_BENCHMARKS = {}  # type: Dict[str, Callable[[], Callable[[], object]]]
+
+
+def benchmark(name: str) -> Callable:
+    """Registers a benchmark setup function under the given name"""
+    def wrapper(setup: Callable[[], Callable[[], object]]):
+        if name in BENCHMARKS.keys():
+            raise ValueError(f'Benchmark "{name}" is already registered.')
+        BENCHMARKS[name] = setup
+        return setup
+    return wrapper
+
+
+def memory_benchmark(name: str) -> Callable:
+    """Registers a memory benchmark. The setup returns a callable that builds and returns the objects to measure"""
+    def wrapper(setup: Callable[[], Callable[[], object]]):
+        if name in MEMORY_BENCHMARKS.keys():
+            raise ValueError(f'Memory benchmark "{name}" is already registered.')
+        MEMORY_BENCHMARKS[name] = setup
+        return setup
+    return wrapper
+
+
+def measure_memory(func: Callable[[], object]) -> Dict[str, int]:
+    """Measures the memory retained by whatever `func` returns (and the peak while building it)"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = func()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return {
+        'retained_bytes': current - before,
+        'peak_bytes': peak - before,
+    }
+
+
+def _calibrate(func: Callable[[], object], target_time: float) -> int:
+    """Finds the number of loops that take roughly `target_time` seconds"""
+    # Warm up first so one-off costs (regex compilation, imports, caches) don't skew calibration
+    func()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= target_time / 10 or loops >= 1_000_000:
+            return max(1, int(loops * target_time / max(elapsed, 1e-9)))
+        loops *= 10
+
+
+def time_benchmark(func: Callable[[], object], repeats: int = 5, target_time: float = 0.2) -> Dict[str, float]:
+    loops = _calibrate(func, target_time)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((time.perf_counter() - start) / loops)
+    median = statistics.median(timings)
+    return {
+        'loops': loops,
+        'repeats': repeats,
+        'min': min(timings),
+        'median': median,
+        'mean': statistics.fmean(timings),
+        'stdev': statistics.stdev(timings) if repeats > 1 else 0.0,
+        'ops_per_sec': 1 / median if median > 0 else None,
+    }
+
+
+def run_benchmarks(name_filter: str = None, repeats: int = 5, target_time: float = 0.2,
+                   log: Callable[[str], None] = print) -> Dict:
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if name_filter is not None and name_filter not in name:
+            continue
+        func = setup()
+        results[name] = time_benchmark(func, repeats=repeats, target_time=target_time)
+        log(f'{name:<55} {results[name]["median"] * 1e6:>12.2f} us/op  ({results[name]["loops"]} loops)')
+    memory = {}
+    for name, setup in MEMORY_BENCHMARKS.items():
+        if name_filter is not None and name_filter not in name:
+            continue
+        memory[name] = measure_memory(setup())
+        log(f'{name:<55} {memory[name]["retained_bytes"] / 1024:>12.1f} KiB retained')
+    return {
+        'meta': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+        'memory': memory,
+    }
+
+
+def compare_to_baseline(results: Dict, baseline: Dict, threshold: float = 0.15) -> List[Dict]:
+    """Compares median timings against a baseline run.
+
+    Returns a row per benchmark present in both runs; rows whose median grew by more than `threshold`
+        (e.g., 0.15 = 15% slower) are flagged as regressions
+    """
+    rows = []
+    for name, result in results['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        ratio = result['median'] / base['median'] if base['median'] > 0 else float('inf')
+        rows.append({
+            'name': name,
+            'baseline': base['median'],
+            'current': result['median'],
+            'ratio': ratio,
+            'is_regression': ratio > 1 + threshold,
+        })
+    return rows
+
+
+def load_results(path: str) -> Optional[Dict]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_results(results: Dict, path: str):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
@@ -2,13 +2,56 @@
 # -*- coding: utf-8 -*-
 """
 Slack Tools: A common library for working with Slack
+
+The public classes are imported from their modules on first access (PEP 562), so, e.g.,
+    `from slacktools import SlackMethods` doesn't load the db, Google Sheets or KeePass dependencies
 """
-from .db_engine import PSQLClient
-from .gsheet import GSheetAgent
-from .secretstore import SecretStore
-from .slack_methods import SlackMethods
-from .slackbot import SlackBotBase
-from .tools import SlackTools
+from importlib import import_module
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    List,
+)
+
+from .startup_profiler import startup_phase
+
+if TYPE_CHECKING:
+    from .db_engine import PSQLClient
+    from .gsheet import GSheetAgent
+    from .secretstore import SecretStore
+    from .slack_methods import SlackMethods
+    from .slackbot import SlackBotBase
+    from .tools import SlackTools
 
 __version__ = '2.0.11'
 __update_date__ = '2024-01-15_11:31:52'
+
+# Public name -> the module it's defined in
+_LAZY_ATTRS = {
+    'PSQLClient': 'db_engine',
+    'GSheetAgent': 'gsheet',
+    'SecretStore': 'secretstore',
+    'SlackMethods': 'slack_methods',
+    'SlackBotBase': 'slackbot',
+    'SlackTools': 'tools',
+}
+__all__ = list(_LAZY_ATTRS.keys())
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_ATTRS:
+        with startup_phase(f'import {__name__}.{_LAZY_ATTRS[name]}'):
+            value = getattr(import_module(f'.{_LAZY_ATTRS[name]}', __name__), name)
+    elif name in _LAZY_ATTRS.values():
+        # These modules used to be imported along with the package - keep them reachable as attributes
+        with startup_phase(f'import {__name__}.{name}'):
+            value = import_module(f'.{name}', __name__)
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    # Later lookups skip this function
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals().keys()) | set(__all__))
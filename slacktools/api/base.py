@@ -1,14 +1,77 @@
-from typing import Dict
+from typing import (
+    Any,
+    Dict,
+    Set,
+)
+
+from slacktools import codec
+
+# Per-class cache of attribute names defined on the class (defaults, methods, properties).
+#   These would shadow __getattr__, so in lazy mode matching payload keys have to be set on the instance.
+_CLASS_ATTR_NAMES = {}  # type: Dict[type, Set[str]]
+
+
+def _get_class_attr_names(cls: type) -> Set[str]:
+    names = _CLASS_ATTR_NAMES.get(cls)
+    if names is None:
+        names = _CLASS_ATTR_NAMES[cls] = {x for x in dir(cls) if not x.startswith('__')}
+    return names
 
 
 class BaseApiObject:
-    """The base of the event classes"""
+    """The base of the event classes
+
+    By default, the payload is converted to attributes up front, wrapping every nested dict in a new object.
+        In lazy mode (see `set_lazy_mode`) the original dict is kept as-is and nested values are only wrapped
+        when they're accessed (and then cached). `asdict` in lazy mode hands back the original payload,
+        merged with any attributes that were set on the object afterwards. Changes made to nested objects
+        in lazy mode are not reflected in `asdict`.
+    """
+    _is_lazy = False
 
     def __init__(self, resp_dict: Dict = None, **kwargs):
-        if resp_dict is not None:
+        if self._is_lazy:
+            self._init_lazy(resp_dict if resp_dict is not None else {})
+        elif resp_dict is not None:
             self._dict_to_props(resp_dict)
         self._dict_to_props(kwargs)
 
+    @classmethod
+    def from_json(cls, data: codec.JsonInputType, **kwargs) -> 'BaseApiObject':
+        """Builds the object straight from the raw (bytes or str) JSON payload"""
+        return cls(codec.loads(data), **kwargs)
+
+    @classmethod
+    def set_lazy_mode(cls, is_lazy: bool = True):
+        """Toggles lazy mode for this class and any subclasses that haven't set their own mode.
+        Calling this on BaseApiObject switches all the models."""
+        cls._is_lazy = is_lazy
+
+    def _init_lazy(self, resp_dict: Dict):
+        self._data = resp_dict
+        # key -> wrapped value for payload items that have been materialized as attributes
+        self._wrapped = {}  # type: Dict[str, Any]
+        # Keys that would otherwise be masked by a class attribute or a value set before init
+        #   (e.g., Message's defaults) get materialized right away
+        for k in resp_dict.keys() & (_get_class_attr_names(self.__class__) | self.__dict__.keys()):
+            self._materialize(k)
+
+    @classmethod
+    def _lazy(cls, resp_dict: Dict) -> 'BaseApiObject':
+        """Builds a lazy object regardless of the class's mode"""
+        obj = cls.__new__(cls)
+        obj._init_lazy(resp_dict)
+        return obj
+
+    def _materialize(self, key: str) -> Any:
+        v = self._data[key]
+        if isinstance(v, dict):
+            v = BaseApiObject._lazy(v)
+        elif isinstance(v, list):
+            v = [BaseApiObject._lazy(x) if isinstance(x, dict) else x for x in v]
+        self.__dict__[key] = self._wrapped[key] = v
+        return v
+
     def _dict_to_props(self, resp_dict: Dict):
         for k, v in resp_dict.items():
             if isinstance(v, dict):
@@ -18,26 +81,38 @@ class BaseApiObject:
             else:
                 self.__setattr__(k, v)
 
+    @staticmethod
+    def _to_plain(v: Any) -> Any:
+        if isinstance(v, BaseApiObject):
+            return v.asdict()
+        elif isinstance(v, list):
+            return [x.asdict() if isinstance(x, BaseApiObject) else x for x in v]
+        return v
+
     def asdict(self) -> Dict:
+        if '_data' in self.__dict__:
+            return self._lazy_asdict()
         resp_dict = {}
         for k, v in vars(self).items():
             if k.startswith('_'):
                 continue
-            if isinstance(v, BaseApiObject):
-                resp_dict[k] = v.asdict()
-            elif isinstance(v, list):
-                items = []
-                for item in v:
-                    if isinstance(item, BaseApiObject):
-                        items.append(item.asdict())
-                    else:
-                        items.append(item)
-                resp_dict[k] = items
-            else:
-                resp_dict[k] = v
+            resp_dict[k] = self._to_plain(v)
         return resp_dict
 
+    def _lazy_asdict(self) -> Dict:
+        wrapped = self._wrapped
+        extras = {
+            k: self._to_plain(v) for k, v in self.__dict__.items()
+            if not k.startswith('_') and (k not in wrapped or wrapped[k] is not v)
+        }
+        if not extras:
+            return self._data
+        return {**self._data, **extras}
+
     def __getattr__(self, item):
+        data = self.__dict__.get('_data')
+        if data is not None and item in data:
+            return self._materialize(item)
         # This helps to avoid getting AttributeError on values.
         #   Instead they'll just return None, which is the pattern
         #   we want to work with.
@@ -0,0 +1,218 @@
+"""Compact, slotted counterparts of the annotated API models.
+
+`compact_model` reads a model's annotations and builds a class that stores the annotated fields in
+    `__slots__` (no per-instance `__dict__`), converts known fields to their annotated types,
+    interns repeated strings (ids, types, timezones) and puts anything it doesn't know about
+    in a single overflow dict. Like the regular models, missing attributes come back as None.
+"""
+import sys
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Optional,
+    Tuple,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+
+from slacktools.api.base import BaseApiObject
+from slacktools.api.web.conversations import (
+    Message,
+    Reaction,
+)
+from slacktools.api.web.pins import Pin
+from slacktools.api.web.users import (
+    UserInfo,
+    UserProfile,
+)
+
+# Fields whose values repeat heavily across objects in a workspace and are worth interning
+INTERNED_FIELDS = frozenset({
+    'id', 'user', 'user_id', 'users', 'team', 'team_id', 'channel', 'channel_id', 'channel_type',
+    'created_by', 'creator', 'inviter', 'bot_id', 'parent_user_id', 'pinned_to', 'members',
+    'type', 'subtype', 'tz', 'tz_label',
+})
+
+_COMPACT_CLASSES = {}  # type: Dict[type, type]
+
+
+def _intern(v: Any) -> Any:
+    return sys.intern(v) if type(v) is str else v
+
+
+def _to_bool(v: Any) -> bool:
+    if isinstance(v, str):
+        return v.lower() in ['true', '1']
+    return bool(v)
+
+
+def _unwrap_optional(hint: Any) -> Any:
+    if get_origin(hint) is Union:
+        args = [x for x in get_args(hint) if x is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return hint
+
+
+def _build_converter(name: str, hint: Any) -> Optional[Callable[[Any], Any]]:
+    """Builds the function that converts a raw payload value to its annotated type.
+    Returns None when the value should be stored as-is"""
+    hint = _unwrap_optional(hint)
+    if get_origin(hint) is list:
+        item_hint = (get_args(hint) or (Any,))[0]
+        item_converter = _build_converter(name, item_hint)
+        if item_converter is None:
+            return None
+
+        def _convert_list(v: Any) -> Any:
+            if not isinstance(v, list):
+                return v
+            return [item_converter(x) if x is not None else x for x in v]
+        return _convert_list
+    if isinstance(hint, type) and issubclass(hint, BaseApiObject):
+        nested_cls = compact_model(hint)
+        return lambda v: nested_cls(v) if isinstance(v, dict) else v
+    if hint is str:
+        return _intern if name in INTERNED_FIELDS else None
+    if hint is bool:
+        return _to_bool
+    if hint in [int, float]:
+        return hint
+    return None
+
+
+def _get_primitive_type(hint: Any) -> Optional[type]:
+    """For scalar fields, the type a raw value already needs to be to skip conversion"""
+    hint = _unwrap_optional(hint)
+    return hint if hint in [bool, int, float] else None
+
+
+class CompactApiObject:
+    """Base of the generated compact models"""
+    __slots__ = ('_extra', )
+    _source_cls = None  # type: type
+    _fields = ()  # type: Tuple[str, ...]
+    _converters = {}  # type: Dict[str, Optional[Callable[[Any], Any]]]
+    _primitive_types = {}  # type: Dict[str, type]
+    _defaults = {}  # type: Dict[str, Any]
+
+    def __init__(self, resp_dict: Dict = None, **kwargs):
+        self._extra = None  # type: Optional[Dict[str, Any]]
+        if resp_dict is not None:
+            self._load(resp_dict)
+        if len(kwargs) > 0:
+            self._load(kwargs)
+
+    def _load(self, resp_dict: Dict):
+        converters = self._converters
+        primitive_types = self._primitive_types
+        for k, v in resp_dict.items():
+            if k in converters:
+                converter = converters[k]
+                # Most scalars already come through with the right type, so skip the call for those
+                if converter is not None and v is not None and type(v) is not primitive_types.get(k):
+                    try:
+                        v = converter(v)
+                    except (TypeError, ValueError):
+                        # Keep the raw value rather than failing on an unexpected payload
+                        pass
+                object.__setattr__(self, k, v)
+            else:
+                if self._extra is None:
+                    self._extra = {}
+                self._extra[k] = v
+
+    def __setattr__(self, key: str, value: Any):
+        if key == '_extra' or key in self._converters:
+            object.__setattr__(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __getattr__(self, item):
+        # Only reached when a slot hasn't been set or the name isn't a field
+        if item.startswith('__') or item == '_extra':
+            raise AttributeError(item)
+        if self._extra is not None and item in self._extra:
+            return self._extra[item]
+        return self._defaults.get(item)
+
+    def _iter_set_fields(self):
+        for k in self._fields:
+            try:
+                yield k, object.__getattribute__(self, k)
+            except AttributeError:
+                continue
+
+    def __getstate__(self) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        # The default slot pickling would go through __getattr__ and fill unset fields with None
+        return dict(self._iter_set_fields()), self._extra
+
+    def __setstate__(self, state: Tuple[Dict[str, Any], Optional[Dict[str, Any]]]):
+        values, extra = state
+        for k, v in values.items():
+            object.__setattr__(self, k, v)
+        object.__setattr__(self, '_extra', extra)
+
+    def asdict(self) -> Dict:
+        resp_dict = {}
+        for k, v in self._iter_set_fields():
+            if isinstance(v, CompactApiObject):
+                v = v.asdict()
+            elif isinstance(v, list):
+                v = [x.asdict() if isinstance(x, CompactApiObject) else x for x in v]
+            resp_dict[k] = v
+        if self._extra is not None:
+            resp_dict.update(self._extra)
+        return resp_dict
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}()>'
+
+
+def compact_model(cls: type) -> type:
+    """Builds (or retrieves the already-built) compact counterpart of an annotated BaseApiObject class.
+    Nested annotated models are converted to their compact counterparts as well.
+
+    Args:
+        cls: type, the BaseApiObject subclass to build from
+    """
+    compact_cls = _COMPACT_CLASSES.get(cls)
+    if compact_cls is not None:
+        return compact_cls
+
+    hints = get_type_hints(cls)
+    fields = tuple(k for k in hints.keys() if not k.startswith('_'))
+    namespace = {
+        '__slots__': fields,
+        '__module__': __name__,
+        '__qualname__': f'Compact{cls.__name__}',
+        '__doc__': f'Compact counterpart of {cls.__module__}.{cls.__name__}',
+        '_source_cls': cls,
+        '_fields': fields,
+        # Class-level defaults (e.g., Message.type) can't live alongside the slots, so serve them on lookup
+        '_defaults': {k: getattr(cls, k) for k in fields if hasattr(cls, k)},
+    }
+    for klass in cls.__mro__:
+        if klass is BaseApiObject:
+            break
+        if '__repr__' in vars(klass):
+            namespace['__repr__'] = vars(klass)['__repr__']
+            break
+    compact_cls = type(f'Compact{cls.__name__}', (CompactApiObject, ), namespace)
+    # Register before building converters so self-referencing models resolve
+    _COMPACT_CLASSES[cls] = compact_cls
+    compact_cls._converters = {k: _build_converter(k, hints[k]) for k in fields}
+    compact_cls._primitive_types = {k: t for k in fields if (t := _get_primitive_type(hints[k])) is not None}
+    return compact_cls
+
+
+CompactUserProfile = compact_model(UserProfile)
+CompactUserInfo = compact_model(UserInfo)
+CompactReaction = compact_model(Reaction)
+CompactMessage = compact_model(Message)
+CompactPin = compact_model(Pin)
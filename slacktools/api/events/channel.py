@@ -66,3 +66,43 @@ class ChannelRename(BaseApiObject):
 
     def __repr__(self) -> str:
         return f'<{self.__class__.__name__}()>'
+
+
+class ChannelDeleted(BaseApiObject):
+    type: str = 'channel_deleted'
+    channel: str
+
+    def __init__(self, event_dict: Dict, **kwargs):
+        super().__init__(event_dict, **kwargs)
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}()>'
+
+
+class MemberJoinedChannel(BaseApiObject):
+    type: str = 'member_joined_channel'
+    user: str
+    channel: str
+    channel_type: str  # C = public, G = private
+    team: str
+    inviter: Optional[str]
+
+    def __init__(self, event_dict: Dict, **kwargs):
+        super().__init__(event_dict, **kwargs)
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}(channel={self.channel}, user={self.user})>'
+
+
+class MemberLeftChannel(BaseApiObject):
+    type: str = 'member_left_channel'
+    user: str
+    channel: str
+    channel_type: str  # C = public, G = private
+    team: str
+
+    def __init__(self, event_dict: Dict, **kwargs):
+        super().__init__(event_dict, **kwargs)
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}(channel={self.channel}, user={self.user})>'
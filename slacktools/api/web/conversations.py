@@ -21,6 +21,46 @@ class ConversationMembers(BaseApiObject):
         return f'<{self.__class__.__name__}(members={self.members})>'
 
 
+class ChannelTopic(BaseApiObject):
+    value: str
+    creator: str
+    last_set: int
+
+
+class ChannelInfo(BaseApiObject):
+    id: str
+    name: str
+    created: int
+    creator: str
+    is_channel: bool
+    is_group: bool
+    is_im: bool
+    is_private: bool
+    is_archived: bool
+    is_general: bool
+    is_member: bool
+    num_members: int
+    topic: ChannelTopic
+    purpose: ChannelTopic
+
+    def __init__(self, resp_dict: Dict = None, **kwargs):
+        super().__init__(resp_dict, **kwargs)
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}(id={self.id}, name={self.name})>'
+
+
+class ConversationsList(BaseApiObject):
+    channels: List[ChannelInfo]
+    response_metadata: ResponseMetadata
+
+    def __init__(self, resp_dict: Dict = None, **kwargs):
+        super().__init__(resp_dict, **kwargs)
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}(channels={len(self.channels or [])})>'
+
+
 class MessageAttachment(BaseApiObject):
     service_name: str
     text: str
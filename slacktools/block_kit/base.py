@@ -1,12 +1,16 @@
 import random
 import string
 from typing import (
+    Any,
     Callable,
     Dict,
     List,
     Union,
 )
 
+from slacktools import codec
+from slacktools.api.base import BaseApiObject
+
 
 class BlockKitBuilder:
     pass
@@ -16,39 +20,82 @@ class ExceededMaxLengthException(Exception):
     pass
 
 
+# When Slack's limits get checked
+VALIDATE_EAGER = 'eager'  # as elements are constructed (length_assertion)
+VALIDATE_DEFERRED = 'deferred'  # once over the whole message, before it's sent (see validator.validate_blocks)
+VALIDATE_DEBUG = 'debug'  # like deferred, but only when Python's running without -O (i.e., __debug__ is True)
+VALIDATE_OFF = 'off'  # not at all; leaves it to Slack to reject what's invalid
+VALIDATION_MODES = (VALIDATE_EAGER, VALIDATE_DEFERRED, VALIDATE_DEBUG, VALIDATE_OFF)
+
+
 class BaseElement:
+    """Base of the Block Kit elements & blocks.
+
+    Elements that won't change anymore can be `freeze`-d to cache their rendered dict.
+    """
+    # Shared by all elements - see set_validation_mode
+    _validation_mode = VALIDATE_EAGER
 
     def __init__(self, **kwargs):
         for name, val in kwargs.items():
             self.__setattr__(name, val)
 
     def asdict(self) -> Dict:
+        attrs = self.__dict__
+        frozen_dict = attrs.get('_frozen_dict')
+        if frozen_dict is not None:
+            return frozen_dict
         resp_dict = {}
-        for k, v in vars(self).items():
-            if k.startswith('_'):
+        for k, v in attrs.items():
+            if k[0] == '_':
                 continue
-            if isinstance(v, BaseElement):
+            # Strings are by far the most common value, so they're checked for first
+            if v.__class__ is str:
+                resp_dict[k] = v
+            elif isinstance(v, BaseElement):
                 resp_dict[k] = v.asdict()
             elif isinstance(v, list):
-                items = []
-                for item in v:
-                    if isinstance(item, BaseElement):
-                        items.append(item.asdict())
-                    else:
-                        items.append(item)
-                resp_dict[k] = items
+                resp_dict[k] = [x.asdict() if isinstance(x, BaseElement) else x for x in v]
             else:
                 resp_dict[k] = v
         return resp_dict
 
+    def freeze(self) -> 'BaseElement':
+        """Renders the element once and hands back that same dict on every `asdict` from here on.
+
+        Only freeze elements that won't be changed anymore (e.g., blocks reused across messages).
+            The cached dict is shared, so it shouldn't be mutated either.
+        """
+        self.__dict__.pop('_frozen_dict', None)
+        self._frozen_dict = self.asdict()
+        return self
+
+    @property
+    def is_frozen(self) -> bool:
+        return '_frozen_dict' in self.__dict__
+
     def __getattr__(self, item):
         # This helps to avoid getting AttributeError on values.
         #   Instead they'll just return None, which is the pattern
         #   we want to work with.
         return None
 
+    @staticmethod
+    def set_validation_mode(mode: str = VALIDATE_EAGER):
+        """Sets when Slack's limits get checked, for all elements. One of VALIDATION_MODES.
+        Outside the eager mode, the checks in the constructors are skipped"""
+        if mode not in VALIDATION_MODES:
+            raise ValueError(f'Unknown validation mode: {mode}. Options: {", ".join(VALIDATION_MODES)}')
+        BaseElement._validation_mode = mode
+
+    @staticmethod
+    def get_validation_mode() -> str:
+        return BaseElement._validation_mode
+
     @staticmethod
     def length_assertion(value: Union[str, List], key: str, max_len: int):
+        if BaseElement._validation_mode != VALIDATE_EAGER:
+            return
         value_len = len(value)
         if value_len > max_len:
             raise ExceededMaxLengthException(f'Key "{key}" exceeded the max length allowed: {value_len} / {max_len}')
@@ -79,6 +126,24 @@ def dictify_blocks(f) -> Callable:
 BlocksType = List[Union[Dict, BaseElement]]
 
 
+def _encode_default(obj: Any) -> Any:
+    """Hands the encoder one level of an element at a time, so no full dict tree gets built"""
+    if isinstance(obj, BaseElement):
+        attrs = obj.__dict__
+        frozen_dict = attrs.get('_frozen_dict')
+        if frozen_dict is not None:
+            return frozen_dict
+        return {k: v for k, v in attrs.items() if k[0] != '_'}
+    if isinstance(obj, BaseApiObject):
+        return obj.asdict()
+    raise TypeError(f'Object of type {obj.__class__.__name__} is not JSON serializable')
+
+
+def encode_blocks(blocks: Union[BlocksType, Dict, BaseElement]) -> bytes:
+    """Encodes blocks (or any structure containing BaseElements) straight to JSON bytes"""
+    return codec.dumpb(blocks, default=_encode_default)
+
+
 def random_string(n_chars: int = 10, addl_chars: str = None) -> str:
     """Generates a random string of n characters in length"""
     chars = string.ascii_letters
@@ -20,7 +20,9 @@ from .input import (
 from .section import (
     AccessoryElementType,
     ButtonSectionBlock,
+    ExternalSelectSectionBlock,
     MarkdownSectionBlock,
+    MultiExternalSelectSectionBlock,
     MultiStaticSelectSectionBlock,
     MultiUserSelectSectionBlock,
     PlainTextSectionBlock,
@@ -13,6 +13,8 @@ from slacktools.block_kit.elements.display.text import (
 )
 from slacktools.block_kit.elements.input.button import ButtonElement
 from slacktools.block_kit.elements.input.select import (
+    ExternalSelectElement,
+    MultiExternalSelectElement,
     MultiStaticSelectElement,
     MultiUserSelectElement,
     OptionObject,
@@ -22,7 +24,7 @@ from slacktools.block_kit.elements.input.select import (
 
 AccessoryElementType = Union[
     ImageElement, ButtonElement, StaticSelectElement, MultiStaticSelectElement, MultiUserSelectElement,
-    UserSelectElement
+    UserSelectElement, ExternalSelectElement, MultiExternalSelectElement
 ]
 
 
@@ -144,3 +146,46 @@ class MultiUserSelectSectionBlock(SectionBlock):
             text_elem=text_elem,
             accessory=select_elem
         )
+
+
+class ExternalSelectSectionBlock(SectionBlock):
+    """A section with a select whose options come from a registered option source
+    (see `SlackBotBase.register_option_source`)"""
+
+    def __init__(self, text: str, action_id: str = 'external-select', placeholder: str = None,
+                 initial_option_pair: Tuple[str, str] = None, min_query_length: int = None):
+        text_elem = PlainTextElement(text=text)
+        placeholder_elem = None
+        if placeholder is not None:
+            placeholder_elem = PlainTextElement(text=placeholder)
+        initial_option = None
+        if initial_option_pair is not None:
+            txt, val = initial_option_pair
+            initial_option = OptionObject(text=PlainTextElement(txt), value=val)
+        select_elem = ExternalSelectElement(action_id=action_id, initial_option=initial_option,
+                                            min_query_length=min_query_length, placeholder=placeholder_elem)
+        super().__init__(
+            text_elem=text_elem,
+            accessory=select_elem
+        )
+
+
+class MultiExternalSelectSectionBlock(SectionBlock):
+
+    def __init__(self, text: str, action_id: str = 'multi-external-select', placeholder: str = None,
+                 initial_option_pairs: List[Tuple[str, str]] = None, min_query_length: int = None,
+                 max_selected: int = None):
+        text_elem = PlainTextElement(text=text)
+        placeholder_elem = None
+        if placeholder is not None:
+            placeholder_elem = PlainTextElement(text=placeholder)
+        initial_options = None
+        if initial_option_pairs is not None:
+            initial_options = [OptionObject(text=PlainTextElement(txt), value=val) for txt, val in initial_option_pairs]
+        select_elem = MultiExternalSelectElement(action_id=action_id, initial_options=initial_options,
+                                                 min_query_length=min_query_length, max_selected_items=max_selected,
+                                                 placeholder=placeholder_elem)
+        super().__init__(
+            text_elem=text_elem,
+            accessory=select_elem
+        )
@@ -3,6 +3,8 @@ from .button import (
     ConfirmElement,
 )
 from .select import (
+    ExternalSelectElement,
+    MultiExternalSelectElement,
     MultiStaticSelectElement,
     MultiUserSelectElement,
     OptionGroupObject,
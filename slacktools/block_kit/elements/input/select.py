@@ -172,3 +172,68 @@ class MultiUserSelectElement(BaseElement):
         self.length_assertion(self.action_id, 'action_id', 255)
         self.focus_on_load = focus_on_load
         super().__init__(type=self.type)
+
+
+class ExternalSelectElement(BaseElement):
+    """
+    https://api.slack.com/reference/block-kit/block-elements#external_select
+
+    Options are loaded from the app as the user types - see `SlackBotBase.register_option_source`
+    """
+    type: str = 'external_select'
+    action_id: str
+    initial_option: OptionObject
+    min_query_length: int
+    confirm: ConfirmElement
+    focus_on_load: bool = False
+    placeholder: PlainTextElement
+
+    def __init__(self, action_id: str = 'external-select', initial_option: OptionObject = None,
+                 min_query_length: int = None, confirm: ConfirmElement = None, focus_on_load: bool = False,
+                 placeholder: PlainTextElement = None):
+        if initial_option is not None:
+            self.initial_option = initial_option
+        if min_query_length is not None:
+            self.min_query_length = min_query_length
+        if confirm is not None:
+            self.confirm = confirm
+        if placeholder is not None:
+            self.placeholder = placeholder
+            self.length_assertion(self.placeholder.text, 'placeholder.text', 150)
+        self.action_id = action_id
+        self.length_assertion(self.action_id, 'action_id', 255)
+        self.focus_on_load = focus_on_load
+        super().__init__(type=self.type)
+
+
+class MultiExternalSelectElement(BaseElement):
+    """
+    https://api.slack.com/reference/block-kit/block-elements#external_multi_select
+    """
+    type: str = 'multi_external_select'
+    action_id: str
+    initial_options: List[OptionObject]
+    min_query_length: int
+    confirm: ConfirmElement
+    max_selected_items: int
+    focus_on_load: bool = False
+    placeholder: PlainTextElement
+
+    def __init__(self, action_id: str = 'multi-external-select', initial_options: List[OptionObject] = None,
+                 min_query_length: int = None, confirm: ConfirmElement = None, max_selected_items: int = None,
+                 focus_on_load: bool = False, placeholder: PlainTextElement = None):
+        if initial_options is not None:
+            self.initial_options = initial_options
+        if min_query_length is not None:
+            self.min_query_length = min_query_length
+        if confirm is not None:
+            self.confirm = confirm
+        if max_selected_items is not None:
+            self.max_selected_items = max_selected_items
+        if placeholder is not None:
+            self.placeholder = placeholder
+            self.length_assertion(self.placeholder.text, 'placeholder.text', 150)
+        self.action_id = action_id
+        self.length_assertion(self.action_id, 'action_id', 255)
+        self.focus_on_load = focus_on_load
+        super().__init__(type=self.type)
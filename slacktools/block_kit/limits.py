@@ -0,0 +1,97 @@
+"""Slack's length limits for Block Kit fields
+
+References:
+    https://api.slack.com/reference/block-kit/blocks
+    https://api.slack.com/reference/block-kit/block-elements
+    https://api.slack.com/reference/block-kit/composition-objects
+"""
+from typing import (
+    Dict,
+    Optional,
+    Tuple,
+)
+
+MAX_BLOCKS_MESSAGE = 50
+MAX_BLOCKS_VIEW = 100
+
+DEFAULT_TEXT_LIMIT = 3000
+
+# (type of the element holding the text object, key it's held under) -> max length of the text.
+#   A type of None applies to any holder
+TEXT_OBJECT_LIMITS = {
+    ('header', 'text'): 150,
+    ('button', 'text'): 75,
+    ('option', 'text'): 75,
+    ('option', 'description'): 75,
+    ('option_group', 'label'): 75,
+    ('confirm', 'title'): 100,
+    ('confirm', 'text'): 300,
+    ('confirm', 'confirm'): 30,
+    ('confirm', 'deny'): 30,
+    ('input', 'label'): 2000,
+    ('input', 'hint'): 2000,
+    ('section', 'fields'): 2000,
+    (None, 'placeholder'): 150,
+}  # type: Dict[Tuple[Optional[str], str], int]
+
+# (element type, key) -> max length for plain string fields
+FIELD_LIMITS = {
+    ('button', 'value'): 2000,
+    ('option', 'value'): 75,
+    (None, 'action_id'): 255,
+    (None, 'block_id'): 255,
+    (None, 'url'): 3000,
+    (None, 'image_url'): 3000,
+    (None, 'alt_text'): 2000,
+}  # type: Dict[Tuple[Optional[str], str], int]
+
+# (element type, key) -> max number of items in a list field
+LIST_LIMITS = {
+    ('section', 'fields'): 10,
+    ('context', 'elements'): 10,
+    ('actions', 'elements'): 25,
+    (None, 'options'): 100,
+    (None, 'option_groups'): 100,
+    (None, 'initial_options'): 100,
+}  # type: Dict[Tuple[Optional[str], str], int]
+
+# Composition objects don't carry a `type`, so they're identified by the key they're held under
+_UNTYPED_BY_KEY = {
+    'options': 'option',
+    'initial_options': 'option',
+    'initial_option': 'option',
+    'option_groups': 'option_group',
+    'confirm': 'confirm',
+}
+
+
+def get_element_type(element: Dict, held_under: Optional[str] = None) -> Optional[str]:
+    """Determines the type of a rendered element, inferring it for composition objects without a `type`"""
+    element_type = element.get('type')
+    if isinstance(element_type, str) and element_type not in ['plain_text', 'mrkdwn']:
+        return element_type
+    return _UNTYPED_BY_KEY.get(held_under)
+
+
+def get_text_limit(holder_type: Optional[str], key: str) -> int:
+    """Max length of a text object's text, given the element it's in & the key it's under"""
+    limit = TEXT_OBJECT_LIMITS.get((holder_type, key))
+    if limit is None:
+        limit = TEXT_OBJECT_LIMITS.get((None, key), DEFAULT_TEXT_LIMIT)
+    return limit
+
+
+def get_list_limit(element_type: Optional[str], key: str) -> Optional[int]:
+    """Max number of items in a list field, if Slack sets one"""
+    limit = LIST_LIMITS.get((element_type, key))
+    if limit is None:
+        limit = LIST_LIMITS.get((None, key))
+    return limit
+
+
+def get_field_limit(element_type: Optional[str], key: str) -> Optional[int]:
+    """Max length of a plain string field, if Slack sets one"""
+    limit = FIELD_LIMITS.get((element_type, key))
+    if limit is None:
+        limit = FIELD_LIMITS.get((None, key))
+    return limit
@@ -0,0 +1,154 @@
+"""Plans how a list of blocks gets posted, given Slack's per-message limits.
+
+Blocks are rendered & checked once, then cut into as many messages as needed at block boundaries:
+    - a cut lands right after a divider when there's one in the message being filled
+    - an ActionsBlock (or run of them) stays in the same message as the block above it, as do headers
+        with the block below them, so controls don't end up separated from what they act on
+    - section text that's over the limit is broken into consecutive sections at line breaks
+"""
+from typing import (
+    Dict,
+    List,
+    Union,
+)
+
+from slacktools.block_kit.base import (
+    BaseElement,
+    BlocksType,
+    ExceededMaxLengthException,
+)
+from slacktools.block_kit.limits import (
+    DEFAULT_TEXT_LIMIT,
+    MAX_BLOCKS_MESSAGE,
+    get_text_limit,
+)
+
+# How the parts after the first one get posted
+SPLIT_SEQUENTIAL = 'sequential'  # as separate messages in the channel
+SPLIT_THREAD = 'thread'  # as replies in the first part's thread
+SPLIT_MODES = (SPLIT_SEQUENTIAL, SPLIT_THREAD)
+
+
+class MessagePlan:
+    """The blocks of one logical message, split into the parts to post"""
+
+    def __init__(self, parts: List[List[Dict]]):
+        self.parts = parts
+
+    @property
+    def n_parts(self) -> int:
+        return len(self.parts)
+
+    @property
+    def n_blocks(self) -> int:
+        return sum(len(x) for x in self.parts)
+
+    @property
+    def is_split(self) -> bool:
+        return len(self.parts) > 1
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}(parts={self.n_parts}, blocks={self.n_blocks})>'
+
+
+def split_text(text: str, max_len: int) -> List[str]:
+    """Splits text into chunks of at most max_len, preferring to cut at line breaks"""
+    chunks = []
+    while len(text) > max_len:
+        cut = text.rfind('\n', 0, max_len + 1)
+        if cut <= 0:
+            # No line break to cut at - hard cut
+            chunks.append(text[:max_len])
+            text = text[max_len:]
+        else:
+            chunks.append(text[:cut])
+            text = text[cut + 1:]
+    chunks.append(text)
+    return chunks
+
+
+def _check_text(text_obj: Dict, path: str, max_len: int):
+    if isinstance(text_obj, dict):
+        BaseElement.length_assertion(text_obj.get('text', ''), path, max_len)
+
+
+def _fit_block(block: Dict, i: int, max_text_len: int) -> List[Dict]:
+    """Checks a rendered block's text against the limits, breaking up section text that runs over"""
+    block_type = block.get('type')
+    if block_type == 'section':
+        for j, field in enumerate(block.get('fields') or []):
+            _check_text(field, f'blocks[{i}].fields[{j}]', get_text_limit('section', 'fields'))
+        text_obj = block.get('text')
+        if isinstance(text_obj, dict) and len(text_obj.get('text', '')) > max_text_len:
+            split_blocks = []
+            for k, chunk in enumerate(split_text(text_obj['text'], max_text_len)):
+                # Everything but the text stays with the first section (e.g., accessory, fields, block_id)
+                new_block = dict(block) if k == 0 else {'type': 'section'}
+                new_block['text'] = {**text_obj, 'text': chunk}
+                split_blocks.append(new_block)
+            return split_blocks
+    elif block_type == 'context':
+        for j, elem in enumerate(block.get('elements') or []):
+            if elem.get('type') in ['plain_text', 'mrkdwn']:
+                _check_text(elem, f'blocks[{i}].elements[{j}]', max_text_len)
+    return [block]
+
+
+def _group_blocks(blocks: List[Dict]) -> List[List[Dict]]:
+    """Groups blocks into runs that shouldn't be split across messages"""
+    groups = []  # type: List[List[Dict]]
+    is_attach_next = False
+    for block in blocks:
+        block_type = block.get('type')
+        is_actions_row = block_type == 'actions' and len(groups) > 0 and groups[-1][-1].get('type') != 'divider'
+        if is_attach_next or is_actions_row:
+            groups[-1].append(block)
+        else:
+            groups.append([block])
+        is_attach_next = block_type == 'header'
+    return groups
+
+
+def plan_message(blocks: Union[BlocksType, BaseElement], max_blocks: int = MAX_BLOCKS_MESSAGE,
+                 max_text_len: int = DEFAULT_TEXT_LIMIT) -> MessagePlan:
+    """Renders, checks and splits blocks into as few messages as the limits allow
+
+    Args:
+        blocks: the blocks to post
+        max_blocks: int, max number of blocks per message
+        max_text_len: int, max length of a section or context text element
+    """
+    if isinstance(blocks, BaseElement):
+        blocks = [blocks]
+    fitted = []
+    for i, block in enumerate(blocks):
+        if isinstance(block, BaseElement):
+            block = block.asdict()
+        fitted += _fit_block(block, i, max_text_len)
+
+    if len(fitted) <= max_blocks:
+        return MessagePlan([fitted] if len(fitted) > 0 else [])
+
+    parts = []  # type: List[List[Dict]]
+    current = []  # type: List[Dict]
+    divider_cut = 0  # Position in current right after its last divider
+    for group in _group_blocks(fitted):
+        if len(group) > max_blocks:
+            raise ExceededMaxLengthException(f'A run of {len(group)} blocks that can\'t be split exceeds '
+                                             f'the max blocks per message: {max_blocks}')
+        if len(current) + len(group) > max_blocks:
+            # Cut after the last divider, unless what follows it still wouldn't fit with the new group
+            is_divider_cut = 0 < divider_cut and len(current) - divider_cut + len(group) <= max_blocks
+            cut = divider_cut if is_divider_cut else len(current)
+            parts.append(current[:cut])
+            current = current[cut:]
+            divider_cut = 0
+        current += group
+        if group[-1].get('type') == 'divider':
+            divider_cut = len(current)
+    parts.append(current)
+    # A divider opening a follow-up message doesn't separate anything anymore
+    for part in parts[1:]:
+        if len(part) > 1 and part[0].get('type') == 'divider':
+            part.pop(0)
+    return MessagePlan(parts)
@@ -0,0 +1,162 @@
+"""Pre-rendered block layouts with named slots.
+
+A template is built once from regular blocks that have slot tokens (`BlockTemplate.slot(name)`) in their text.
+    The blocks are serialized to JSON a single time and split around the slots, so rendering only escapes,
+    length-checks and splices in the values - no element objects are built and nothing gets re-serialized.
+    Only slots in the `text` of text objects are escaped - values elsewhere (e.g., a button's value) go in as given.
+
+Example:
+    >>> tmpl = BlockTemplate([
+    ...     MarkdownSectionBlock([f'*{BlockTemplate.slot("title")}*', BlockTemplate.slot('desc')]),
+    ...     ActionsBlock([ButtonElement('Details', value=BlockTemplate.slot('item_id'))]),
+    ... ])
+    >>> st.send_message(channel, message='', blocks=tmpl.render(title='Hi', desc='<3', item_id='123'))
+"""
+from json.encoder import encode_basestring
+import re
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from slacktools import codec
+from slacktools.block_kit.base import (
+    BaseElement,
+    BlocksType,
+    ExceededMaxLengthException,
+    encode_blocks,
+)
+from slacktools.block_kit.limits import (
+    get_element_type,
+    get_field_limit,
+    get_text_limit,
+)
+
+# Private-use code points, so they won't collide with real text and pass through JSON encoding untouched
+SLOT_START = '\ue000'
+SLOT_END = '\ue001'
+SLOT_RAW = '\ue002'
+SLOT_PATTERN = re.compile(f'{SLOT_START}([^{SLOT_END}]+){SLOT_END}')
+
+SlotKeyType = Tuple[str, bool]  # (name, is_escape)
+
+
+def escape_text(text: str) -> str:
+    """Escapes the control characters Slack's text formatting reserves"""
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _parse_slot(token_body: str) -> SlotKeyType:
+    if token_body.endswith(SLOT_RAW):
+        return token_body[:-1], False
+    return token_body, True
+
+
+class _SlottedField:
+    """A string field in the template that holds one or more slots"""
+
+    def __init__(self, path: str, text: str, max_len: Optional[int]):
+        self.path = path
+        self.max_len = max_len
+        self.slots = [_parse_slot(x) for x in SLOT_PATTERN.findall(text)]
+        self.static_len = len(SLOT_PATTERN.sub('', text))
+
+
+class BlockTemplate:
+    """A block layout rendered once into a JSON skeleton with named slots"""
+
+    def __init__(self, blocks: Union[BlocksType, Dict, BaseElement]):
+        """
+        Args:
+            blocks: the blocks (or a view/single element) to build the template from, with slot tokens
+                from `BlockTemplate.slot` in any string fields that should be substituted
+        """
+        tree = codec.loads(encode_blocks(blocks))
+        self._fields = []  # type: List[_SlottedField]
+        self._walk(tree, path='blocks', holder_type=None, held_under=None)
+
+        # The skeleton alternates static JSON and slots: static, slot, static, ..., static
+        pieces = SLOT_PATTERN.split(codec.dumps(tree))
+        self._static_parts = pieces[0::2]  # type: List[str]
+        self._slot_order = [_parse_slot(x) for x in pieces[1::2]]  # type: List[SlotKeyType]
+        self._slot_keys = tuple(dict.fromkeys(self._slot_order))  # type: Tuple[SlotKeyType, ...]
+        self.slots = frozenset(name for name, _ in self._slot_order)
+
+    @staticmethod
+    def slot(name: str, is_escape: bool = True) -> str:
+        """Builds the token that marks a slot in a block's text
+
+        Args:
+            name: str, the name the value will be passed in under when rendering
+            is_escape: bool, if True, &, < and > in the value are escaped when the slot is in a text object's text.
+                Set to False for values that carry Slack formatting on purpose (e.g., user mentions or links).
+                Slots in any other field (ids, values, urls) are never escaped
+        """
+        if SLOT_START in name or SLOT_END in name or name.endswith(SLOT_RAW):
+            raise ValueError(f'Invalid slot name: {name!r}')
+        return f'{SLOT_START}{name}{"" if is_escape else SLOT_RAW}{SLOT_END}'
+
+    def _walk(self, node: Any, path: str, holder_type: Optional[str], held_under: Optional[str]):
+        if isinstance(node, list):
+            for i, item in enumerate(node):
+                self._walk(item, f'{path}[{i}]', holder_type=holder_type, held_under=held_under)
+        elif isinstance(node, dict):
+            element_type = get_element_type(node, held_under)
+            is_text_obj = node.get('type') in ['plain_text', 'mrkdwn']
+            for k, v in node.items():
+                if isinstance(v, str):
+                    if SLOT_START not in v:
+                        continue
+                    if is_text_obj and k == 'text':
+                        max_len = get_text_limit(holder_type, held_under)
+                    else:
+                        max_len = get_field_limit(element_type, k)
+                        # Not formatted text, so escaping would change the value that comes back (e.g., in actions)
+                        v = node[k] = SLOT_PATTERN.sub(lambda m: self.slot(_parse_slot(m.group(1))[0],
+                                                                           is_escape=False), v)
+                    self._fields.append(_SlottedField(f'{path}.{k}', v, max_len))
+                elif isinstance(v, (dict, list)):
+                    self._walk(v, f'{path}.{k}', holder_type=element_type, held_under=k)
+
+    def _prepare_values(self, values: Dict[str, Any]) -> Dict[SlotKeyType, str]:
+        if not self.slots <= values.keys():
+            missing = self.slots - values.keys()
+            raise ValueError(f'Missing values for slots: {", ".join(sorted(missing))}')
+        prepared = {}
+        for name, is_escape in self._slot_keys:
+            value = values[name]
+            value = value if isinstance(value, str) else str(value)
+            prepared[(name, is_escape)] = escape_text(value) if is_escape else value
+        for field in self._fields:
+            if field.max_len is None:
+                continue
+            field_len = field.static_len + sum(len(prepared[x]) for x in field.slots)
+            if field_len > field.max_len:
+                raise ExceededMaxLengthException(f'Key "{field.path}" exceeded the max length allowed: '
+                                                 f'{field_len} / {field.max_len}')
+        return prepared
+
+    def render(self, **values) -> str:
+        """Renders the template to a JSON string of blocks, ready to pass to the send methods"""
+        prepared = self._prepare_values(values)
+        # JSON-escape each value once, no matter how many times it appears
+        encoded = {k: encode_basestring(v)[1:-1] for k, v in prepared.items()}
+        parts = [self._static_parts[0]]
+        for slot_key, static_part in zip(self._slot_order, self._static_parts[1:]):
+            parts.append(encoded[slot_key])
+            parts.append(static_part)
+        return ''.join(parts)
+
+    def render_bytes(self, **values) -> bytes:
+        return self.render(**values).encode('utf-8')
+
+    def render_blocks(self, **values) -> Union[List[Dict], Dict]:
+        """Renders to dicts, for when the blocks need to be combined with others"""
+        return codec.loads(self.render(**values))
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}(slots={sorted(self.slots)})>'
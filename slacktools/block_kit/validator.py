@@ -0,0 +1,171 @@
+"""Checks a finished list of blocks against Slack's limits in a single pass, collecting every violation
+
+Example:
+    >>> BaseElement.set_validation_mode(VALIDATE_DEFERRED)
+    >>> blocks = [MarkdownSectionBlock(x) for x in texts]  # no checks while building
+    >>> validate_blocks(blocks)
+    [<BlockViolation(path='blocks[3].text.text', 'exceeded the max length allowed: 3012 / 3000')>]
+"""
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from slacktools.block_kit.base import (
+    VALIDATE_DEBUG,
+    VALIDATE_DEFERRED,
+    BaseElement,
+    BlocksType,
+    ExceededMaxLengthException,
+)
+from slacktools.block_kit.limits import (
+    MAX_BLOCKS_MESSAGE,
+    get_element_type,
+    get_field_limit,
+    get_list_limit,
+    get_text_limit,
+)
+
+TEXT_OBJECT_TYPES = ['plain_text', 'mrkdwn']
+
+
+class BlockViolation:
+    """A single way a message breaks Slack's rules"""
+
+    def __init__(self, path: str, message: str):
+        self.path = path
+        self.message = message
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, BlockViolation) and (self.path, self.message) == (other.path, other.message)
+
+    def __str__(self) -> str:
+        return f'{self.path}: {self.message}'
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}(path={self.path!r}, {self.message!r})>'
+
+
+class BlockValidationError(ExceededMaxLengthException):
+    """Raised with all the violations found in a message"""
+
+    def __init__(self, violations: List[BlockViolation]):
+        self.violations = violations
+        details = '\n'.join(f'  {x}' for x in violations)
+        super().__init__(f'Blocks have {len(violations)} violation(s) of Slack\'s limits:\n{details}')
+
+
+def _format_path(path: Tuple) -> str:
+    """Formats the path of a node, which is built as nested (parent, key) pairs to save formatting strings
+    for every node visited"""
+    keys = []
+    while path is not None:
+        path, key = path
+        keys.append(f'[{key}]' if isinstance(key, int) else f'.{key}')
+    return 'blocks' + ''.join(reversed(keys))
+
+
+class _BlockWalker:
+    """Walks rendered blocks once, recording violations"""
+
+    def __init__(self):
+        self.violations = []  # type: List[BlockViolation]
+        self.block_ids = set()  # type: Set[str]
+        self.action_ids = None  # type: Optional[Set[str]]
+
+    def add(self, path: Optional[Tuple], message: str):
+        self.violations.append(BlockViolation(_format_path(path), message))
+
+    def check_len(self, path: Tuple, value: Any, max_len: Optional[int]):
+        if max_len is not None and isinstance(value, (str, list)) and len(value) > max_len:
+            self.add(path, f'exceeded the max length allowed: {len(value)} / {max_len}')
+
+    def walk_block(self, block: Dict, path: Tuple):
+        block_id = block.get('block_id')
+        if block_id is not None:
+            if block_id in self.block_ids:
+                self.add((path, 'block_id'), f'duplicate block_id: {block_id}')
+            self.block_ids.add(block_id)
+        # action_ids only have to be unique within their block
+        self.action_ids = set()
+        self.walk(block, path, holder_type=None, held_under=None)
+
+    def walk(self, node: Dict, path: Tuple, holder_type: Optional[str], held_under: Optional[str]):
+        if node.get('type') in TEXT_OBJECT_TYPES:
+            text = node.get('text')
+            max_len = get_text_limit(holder_type, held_under)
+            if isinstance(text, str) and len(text) > max_len:
+                self.check_len((path, 'text'), text, max_len)
+            return
+        element_type = get_element_type(node, held_under)
+        action_id = node.get('action_id')
+        if action_id is not None and self.action_ids is not None:
+            if action_id in self.action_ids:
+                self.add((path, 'action_id'), f'duplicate action_id in block: {action_id}')
+            self.action_ids.add(action_id)
+        for k, v in node.items():
+            if isinstance(v, dict):
+                self.walk(v, (path, k), holder_type=element_type, held_under=k)
+            elif isinstance(v, list):
+                list_path = (path, k)
+                self.check_len(list_path, v, get_list_limit(element_type, k))
+                for i, item in enumerate(v):
+                    if isinstance(item, dict):
+                        self.walk(item, (list_path, i), holder_type=element_type, held_under=k)
+            elif isinstance(v, str):
+                max_len = get_field_limit(element_type, k)
+                if max_len is not None and len(v) > max_len:
+                    self.check_len((path, k), v, max_len)
+
+
+def validate_blocks(blocks: Union[BlocksType, BaseElement],
+                    max_blocks: Optional[int] = MAX_BLOCKS_MESSAGE) -> List[BlockViolation]:
+    """Checks the blocks of a message against Slack's limits
+
+    Args:
+        blocks: the blocks (elements or dicts) of one message
+        max_blocks: int, max number of blocks allowed. None skips the check (e.g., when the blocks
+            will be split over multiple messages)
+
+    Returns:
+        every violation found, in the order of the blocks. Empty when the blocks are valid
+    """
+    if isinstance(blocks, BaseElement):
+        blocks = [blocks]
+    walker = _BlockWalker()
+    if max_blocks is not None and len(blocks) > max_blocks:
+        walker.add(None, f'exceeded the max blocks allowed: {len(blocks)} / {max_blocks}')
+    for i, block in enumerate(blocks):
+        if isinstance(block, BaseElement):
+            block = block.asdict()
+        if not isinstance(block, dict):
+            walker.add((None, i), f'not a block: {block.__class__.__name__}')
+            continue
+        walker.walk_block(block, (None, i))
+    return walker.violations
+
+
+def assert_valid_blocks(blocks: Union[BlocksType, BaseElement], max_blocks: Optional[int] = MAX_BLOCKS_MESSAGE):
+    """Raises BlockValidationError with every violation found, if any"""
+    violations = validate_blocks(blocks, max_blocks=max_blocks)
+    if len(violations) > 0:
+        raise BlockValidationError(violations)
+
+
+def is_validated_before_send() -> bool:
+    """Whether the current validation mode calls for checking blocks before they're sent"""
+    mode = BaseElement.get_validation_mode()
+    return mode == VALIDATE_DEFERRED or (mode == VALIDATE_DEBUG and __debug__)
+
+
+def validate_before_send(blocks: Union[BlocksType, BaseElement, str],
+                         max_blocks: Optional[int] = MAX_BLOCKS_MESSAGE):
+    """Validates blocks about to be sent, if the validation mode calls for it.
+    Pre-encoded blocks (e.g., from a BlockTemplate, which checks its own slots) are passed over"""
+    if not isinstance(blocks, str) and is_validated_before_send():
+        assert_valid_blocks(blocks, max_blocks=max_blocks)
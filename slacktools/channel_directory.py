@@ -0,0 +1,296 @@
+"""In-memory channel directory, kept current by channel & member events"""
+import threading
+import time
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from loguru import logger
+from slack_sdk.web import WebClient
+
+from slacktools.api.events.channel import (
+    ChannelArchive,
+    ChannelCreated,
+    ChannelDeleted,
+    ChannelRename,
+    ChannelUnarchive,
+    MemberJoinedChannel,
+    MemberLeftChannel,
+)
+from slacktools.api.web.conversations import (
+    ChannelInfo,
+    ConversationMembers,
+)
+from slacktools.event_router import EventRouter
+
+_MISSING = object()
+
+
+class ChannelDirectory:
+    """Indexes the workspace's channels by id and name.
+
+    The channel list is bulk-loaded (paginated) on first use, while channel memberships are loaded lazily,
+        one channel at a time. Loaded data is reloaded once it's older than max_age. Channel & member events
+        fed to the directory (e.g., through an event router) keep it current in between.
+
+    The API is called without holding the directory's lock - lookups & events carry on against the data
+        already loaded, which is swapped for the fresh data once it's in.
+    """
+    DEFAULT_TYPES = 'public_channel,private_channel'
+    DEFAULT_MAX_AGE = 5 * 60
+    # Times a channel's members are fetched in a row when events keep changing them mid-fetch
+    MAX_MEMBER_FETCHES = 3
+
+    def __init__(self, bot: WebClient, types: str = DEFAULT_TYPES, page_limit: int = 1000,
+                 max_age: Optional[float] = DEFAULT_MAX_AGE):
+        """
+        Args:
+            bot: WebClient, the bot client to use for loading channels & memberships
+            types: str, comma-separated conversation types to include in the bulk load
+            page_limit: int, the number of items to request per page
+            max_age: float, seconds loaded channels & memberships are used for before being reloaded.
+                None to keep them until invalidated (only safe when all channel & member events reach the directory)
+        """
+        self.bot = bot
+        self.types = types
+        self.page_limit = page_limit
+        self.max_age = max_age
+        self.is_loaded = False
+        self._lock = threading.RLock()
+        # Held while the channel list is fetched, so only one thread fetches it at a time
+        self._load_lock = threading.Lock()
+        self._loaded_at = None  # type: Optional[float]
+        self._channels = {}  # type: Dict[str, ChannelInfo]
+        self._name_to_id = {}  # type: Dict[str, str]
+        self._members = {}  # type: Dict[str, Set[str]]
+        self._members_loaded_at = {}  # type: Dict[str, float]
+        # Bumped whenever a channel's (or every channel's) members change, so a fetch can tell if it missed
+        #   a change made meanwhile
+        self._member_generations = {}  # type: Dict[str, int]
+        self._all_members_generation = 0
+        self._event_handlers = {
+            ChannelCreated.type: self.on_channel_created,
+            ChannelRename.type: self.on_channel_rename,
+            ChannelArchive.type: self.on_channel_archive,
+            ChannelUnarchive.type: self.on_channel_unarchive,
+            ChannelDeleted.type: self.on_channel_deleted,
+            MemberJoinedChannel.type: self.on_member_joined,
+            MemberLeftChannel.type: self.on_member_left,
+        }
+        self._event_models = {
+            x.type: x for x in [ChannelCreated, ChannelRename, ChannelArchive, ChannelUnarchive, ChannelDeleted,
+                                MemberJoinedChannel, MemberLeftChannel]
+        }
+
+    @staticmethod
+    def _clean_name(name: str) -> str:
+        return name.lstrip('#').lower()
+
+    def _add_channel(self, channel: ChannelInfo):
+        old_channel = self._channels.get(channel.id)
+        if old_channel is not None and old_channel.name is not None:
+            self._name_to_id.pop(self._clean_name(old_channel.name), None)
+        self._channels[channel.id] = channel
+        if channel.name is not None:
+            self._name_to_id[self._clean_name(channel.name)] = channel.id
+
+    @staticmethod
+    def _get_next_cursor(resp_data: Dict) -> Optional[str]:
+        return (resp_data.get('response_metadata') or {}).get('next_cursor')
+
+    def _is_expired(self, loaded_at: Optional[float]) -> bool:
+        return self.max_age is not None and loaded_at is not None and time.monotonic() - loaded_at > self.max_age
+
+    def _fetch_channels(self) -> Dict[str, ChannelInfo]:
+        channels = {}
+        cursor = None
+        while True:
+            resp = self.bot.conversations_list(types=self.types, limit=self.page_limit, cursor=cursor,
+                                               exclude_archived=False)
+            for channel_dict in resp.data.get('channels', []):
+                channels[channel_dict['id']] = ChannelInfo(channel_dict)
+            cursor = self._get_next_cursor(resp.data)
+            if not cursor:
+                return channels
+
+    def load(self, is_force: bool = False):
+        """Bulk-loads all channels through conversations.list, following pagination cursors.
+        Only when they haven't been loaded yet, have expired or is_force is set"""
+        if self.is_loaded and not is_force and not self._is_expired(self._loaded_at):
+            return
+        # Once loaded, lookups keep using the current channels while another thread reloads them
+        if not self._load_lock.acquire(blocking=not self.is_loaded or is_force):
+            return
+        try:
+            if self.is_loaded and not is_force and not self._is_expired(self._loaded_at):
+                # Loaded by another thread while this one waited
+                return
+            logger.debug('Loading channel directory...')
+            channels = self._fetch_channels()
+            with self._lock:
+                self._channels = {}
+                self._name_to_id = {}
+                for channel in channels.values():
+                    self._add_channel(channel)
+                self._loaded_at = time.monotonic()
+                self.is_loaded = True
+            logger.debug(f'Loaded {len(channels)} channels into directory.')
+        finally:
+            self._load_lock.release()
+
+    def get_channel(self, channel_id: str) -> Optional[ChannelInfo]:
+        """Retrieves a channel's info by its id"""
+        self.load()
+        return self._channels.get(channel_id)
+
+    def get_channel_id(self, name: str) -> Optional[str]:
+        """Resolves a channel name (with or without the leading '#') to its id"""
+        self.load()
+        return self._name_to_id.get(self._clean_name(name))
+
+    def get_channels(self, is_include_archived: bool = False) -> List[ChannelInfo]:
+        self.load()
+        return [x for x in self._channels.values() if is_include_archived or not x.is_archived]
+
+    def _fetch_members(self, channel_id: str) -> Set[str]:
+        members = set()
+        cursor = None
+        while True:
+            resp = self.bot.conversations_members(channel=channel_id, limit=self.page_limit, cursor=cursor)
+            channel_members = ConversationMembers(resp.data)
+            members.update(channel_members.members or [])
+            cursor = self._get_next_cursor(resp.data)
+            if not cursor:
+                return members
+
+    def _get_generation(self, channel_id: str) -> Tuple[int, int]:
+        return self._all_members_generation, self._member_generations.get(channel_id, 0)
+
+    def _bump_generation(self, channel_id: str):
+        self._member_generations[channel_id] = self._member_generations.get(channel_id, 0) + 1
+
+    def get_members(self, channel_id: str) -> Set[str]:
+        """Retrieves the user ids of a channel's members, loading them from the API on first request
+        (and again once they've expired)"""
+        with self._lock:
+            members = self._members.get(channel_id)
+            if members is not None and not self._is_expired(self._members_loaded_at.get(channel_id)):
+                return set(members)
+        for _ in range(self.MAX_MEMBER_FETCHES):
+            logger.debug(f'Loading members for channel {channel_id}...')
+            with self._lock:
+                generation = self._get_generation(channel_id)
+            members = self._fetch_members(channel_id)
+            with self._lock:
+                if self._get_generation(channel_id) == generation:
+                    self._members[channel_id] = members
+                    self._members_loaded_at[channel_id] = time.monotonic()
+                    return set(members)
+            # A member event came in during the fetch, which may or may not have seen it
+            logger.debug(f'Members of channel {channel_id} changed while loading them.')
+        # Still changing - answer with the latest fetch, but leave it to the next request to load them again
+        return members
+
+    def is_member(self, channel_id: str, user_id: str) -> bool:
+        return user_id in self.get_members(channel_id)
+
+    def invalidate_members(self, channel_id: str = None):
+        """Drops cached memberships for a channel (or all channels) so they're reloaded on next request"""
+        with self._lock:
+            if channel_id is None:
+                self._members = {}
+                self._members_loaded_at = {}
+                self._all_members_generation += 1
+            else:
+                self._members.pop(channel_id, None)
+                self._members_loaded_at.pop(channel_id, None)
+                self._bump_generation(channel_id)
+
+    def handle_event(self, event_dict: Dict) -> bool:
+        """Applies a channel or member event to the directory.
+
+        Returns True if the event type was one the directory consumes
+        """
+        event_dict = EventRouter.unwrap(event_dict)
+        model_cls = self._event_models.get(event_dict.get('type'))
+        if model_cls is None:
+            return False
+        self._event_handlers[model_cls.type](model_cls(event_dict))
+        return True
+
+    def register_handlers(self, router: EventRouter, priority: int = 100, max_age: Optional[float] = _MISSING):
+        """Registers the directory's event handlers with an EventRouter.
+        The default priority puts these ahead of the bot's own handlers, so those see an updated directory
+
+        Args:
+            router: EventRouter, the router the channel & member events come through
+            priority: int, the handlers' priority
+            max_age: float, replaces the directory's max_age when given. Pass None to trust the events to keep
+                the directory current, so nothing's reloaded unless invalidated - only do so when the app is
+                subscribed to all the channel & member events and they're all handled through this router
+        """
+        for event_type, handler in self._event_handlers.items():
+            router.add_handler(event_type, handler, priority=priority)
+        if max_age is not _MISSING:
+            self.max_age = max_age
+
+    def on_channel_created(self, event: ChannelCreated, **kwargs):
+        with self._lock:
+            self._add_channel(ChannelInfo(event.channel.asdict(), is_archived=False))
+            # A fresh channel only has its creator in it
+            if event.channel.creator is not None:
+                self._members[event.channel.id] = {event.channel.creator}
+                self._members_loaded_at[event.channel.id] = time.monotonic()
+                self._bump_generation(event.channel.id)
+
+    def on_channel_rename(self, event: ChannelRename, **kwargs):
+        with self._lock:
+            channel = self._channels.get(event.channel.id)
+            if channel is None:
+                self._add_channel(ChannelInfo(event.channel.asdict()))
+                return
+            if channel.name is not None:
+                self._name_to_id.pop(self._clean_name(channel.name), None)
+            channel.name = event.channel.name
+            self._add_channel(channel)
+
+    def _set_archived(self, channel_id: str, is_archived: bool):
+        with self._lock:
+            channel = self._channels.get(channel_id)
+            if channel is not None:
+                channel.is_archived = is_archived
+
+    def on_channel_archive(self, event: ChannelArchive, **kwargs):
+        self._set_archived(event.channel, is_archived=True)
+
+    def on_channel_unarchive(self, event: ChannelUnarchive, **kwargs):
+        self._set_archived(event.channel, is_archived=False)
+
+    def on_channel_deleted(self, event: ChannelDeleted, **kwargs):
+        with self._lock:
+            channel = self._channels.pop(event.channel, None)
+            if channel is not None and channel.name is not None:
+                self._name_to_id.pop(self._clean_name(channel.name), None)
+            self._members.pop(event.channel, None)
+            self._members_loaded_at.pop(event.channel, None)
+            self._bump_generation(event.channel)
+
+    def on_member_joined(self, event: MemberJoinedChannel, **kwargs):
+        with self._lock:
+            self._bump_generation(event.channel)
+            # Only keep sets current that were already loaded; others will load in full on first request
+            if event.channel in self._members.keys():
+                self._members[event.channel].add(event.user)
+
+    def on_member_left(self, event: MemberLeftChannel, **kwargs):
+        with self._lock:
+            self._bump_generation(event.channel)
+            if event.channel in self._members.keys():
+                self._members[event.channel].discard(event.user)
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}(channels={len(self._channels)}, is_loaded={self.is_loaded})>'
@@ -0,0 +1,96 @@
+"""JSON encoding & decoding for payloads going to and coming from Slack.
+
+orjson is used when it's installed, otherwise this falls back to the standard library.
+    Both codecs produce compact output, so the encoded payloads are interchangeable.
+"""
+import json
+from typing import (
+    Any,
+    Callable,
+    Union,
+)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JsonInputType = Union[bytes, bytearray, memoryview, str]
+JSON_INPUT_TYPES = (bytes, bytearray, memoryview, str)
+
+
+class StdlibCodec:
+    """Codec built on the standard library's json module"""
+    name = 'json'
+
+    @staticmethod
+    def loads(data: JsonInputType) -> Any:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+    @staticmethod
+    def dumps(obj: Any, default: Callable[[Any], Any] = None) -> str:
+        return json.dumps(obj, default=default, separators=(',', ':'), ensure_ascii=False)
+
+    @classmethod
+    def dumpb(cls, obj: Any, default: Callable[[Any], Any] = None) -> bytes:
+        return cls.dumps(obj, default=default).encode('utf-8')
+
+
+class OrjsonCodec:
+    """Codec built on orjson"""
+    name = 'orjson'
+
+    @staticmethod
+    def loads(data: JsonInputType) -> Any:
+        return orjson.loads(data)
+
+    @staticmethod
+    def dumpb(obj: Any, default: Callable[[Any], Any] = None) -> bytes:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+
+    @classmethod
+    def dumps(cls, obj: Any, default: Callable[[Any], Any] = None) -> str:
+        return cls.dumpb(obj, default=default).decode('utf-8')
+
+
+CodecType = Union[StdlibCodec, OrjsonCodec]
+CODECS = {
+    StdlibCodec.name: StdlibCodec,
+}
+if orjson is not None:
+    CODECS[OrjsonCodec.name] = OrjsonCodec
+
+_codec = OrjsonCodec() if orjson is not None else StdlibCodec()  # type: CodecType
+
+
+def get_codec() -> CodecType:
+    return _codec
+
+
+def set_codec(codec: Union[str, CodecType]):
+    """Swaps the codec used library-wide
+
+    Args:
+        codec: either the name of a built-in codec ('orjson', 'json') or an object
+            providing `loads`, `dumps` and `dumpb`
+    """
+    global _codec
+    if isinstance(codec, str):
+        if codec not in CODECS.keys():
+            raise ValueError(f'Unknown or unavailable codec: {codec}. Options: {", ".join(CODECS.keys())}')
+        codec = CODECS[codec]()
+    _codec = codec
+
+
+def loads(data: JsonInputType) -> Any:
+    return _codec.loads(data)
+
+
+def dumps(obj: Any, default: Callable[[Any], Any] = None) -> str:
+    return _codec.dumps(obj, default=default)
+
+
+def dumpb(obj: Any, default: Callable[[Any], Any] = None) -> bytes:
+    return _codec.dumpb(obj, default=default)
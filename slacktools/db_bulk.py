@@ -0,0 +1,179 @@
+"""Bulk writes - chunked upserts & Postgres COPY
+
+Rows come in as dicts (any iterable of them, e.g., a generator) or as a DataFrame and are written a chunk
+    at a time, each chunk in its own transaction. A failure partway through leaves the chunks before it written.
+"""
+from io import StringIO
+from itertools import islice
+import sys
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+    Union,
+)
+
+from loguru import logger
+from sqlalchemy import (
+    Table,
+    insert,
+)
+from sqlalchemy.dialects import (
+    postgresql,
+    sqlite,
+)
+from sqlalchemy.engine import Engine
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+RowsType = Union[Iterable[Dict[str, Any]], 'pd.DataFrame']
+
+UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+class BulkWriteResult:
+    """How many rows were written, in how many chunks and how fast"""
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        self.n_rows = 0
+        self.n_chunks = 0
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.n_rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    def asdict(self) -> Dict:
+        return {
+            'table': self.table_name,
+            'rows': self.n_rows,
+            'chunks': self.n_chunks,
+            'elapsed': self.elapsed,
+            'rows_per_sec': self.rows_per_sec,
+        }
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}(table={self.table_name}, rows={self.n_rows}, ' \
+               f'rows_per_sec={self.rows_per_sec:.0f})>'
+
+
+def get_table(table) -> Table:
+    """The Table of an ORM class (or the Table itself)"""
+    return getattr(table, '__table__', table)
+
+
+def iter_row_chunks(rows: RowsType, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Yields lists of up to chunk_size row dicts. Missing DataFrame values (NaN, NaT, etc.) come out as None"""
+    # Anything that's a DataFrame means pandas has been imported already
+    pd = sys.modules.get('pandas')
+    if pd is not None and isinstance(rows, pd.DataFrame):
+        for i in range(0, len(rows), chunk_size):
+            chunk = rows.iloc[i:i + chunk_size]
+            yield chunk.astype(object).where(chunk.notna(), None).to_dict('records')
+        return
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if len(chunk) == 0:
+            return
+        yield chunk
+
+
+def build_upsert(engine: Engine, table: Table, columns: Sequence[str], conflict_cols: Sequence[str] = None,
+                 update_cols: Sequence[str] = None):
+    """Builds an `insert ... on conflict` statement for the engine's dialect
+
+    Args:
+        columns: the columns given in each row
+        conflict_cols: the columns of the unique constraint to check for conflicts on. Defaults to the primary key
+        update_cols: the columns to update on conflict. Defaults to every given column outside of conflict_cols.
+            When there are none, conflicting rows are left as they are
+    """
+    dialect = engine.dialect.name
+    if dialect not in UPSERT_INSERTS:
+        raise ValueError(f'Upserts are supported for {list(UPSERT_INSERTS.keys())}, not {dialect}')
+    if conflict_cols is None:
+        conflict_cols = [x.name for x in table.primary_key.columns]
+    if update_cols is None:
+        update_cols = [x for x in columns if x not in conflict_cols]
+    stmt = UPSERT_INSERTS[dialect](table)
+    if len(update_cols) == 0:
+        return stmt.on_conflict_do_nothing(index_elements=conflict_cols)
+    return stmt.on_conflict_do_update(index_elements=conflict_cols,
+                                      set_={x: stmt.excluded[x] for x in update_cols})
+
+
+def bulk_upsert(engine: Engine, table, rows: RowsType, conflict_cols: Sequence[str] = None,
+                update_cols: Sequence[str] = None, chunk_size: int = 1000) -> BulkWriteResult:
+    """Inserts the rows, updating those that conflict with existing ones. See `build_upsert` for the args.
+    Every row needs the same keys (those of the first row)"""
+    table = get_table(table)
+    result = BulkWriteResult(table.name)
+    stmt = None
+    start = time.perf_counter()
+    for chunk in iter_row_chunks(rows, chunk_size=chunk_size):
+        if stmt is None:
+            stmt = build_upsert(engine, table, columns=list(chunk[0].keys()), conflict_cols=conflict_cols,
+                                update_cols=update_cols)
+        with engine.begin() as conn:
+            conn.execute(stmt, chunk)
+        result.n_rows += len(chunk)
+        result.n_chunks += 1
+        logger.debug(f'Upserted {result.n_rows} rows into {table.name}...')
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def _copy_value(value: Any) -> str:
+    """Formats a value for COPY's text format"""
+    if value is None:
+        return '\\N'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def bulk_insert(engine: Engine, table, rows: RowsType, chunk_size: int = 10000) -> BulkWriteResult:
+    """Appends the rows to the table - through COPY on Postgres, multi-row inserts elsewhere.
+    Every row needs the same keys (those of the first row)"""
+    table = get_table(table)
+    result = BulkWriteResult(table.name)
+    is_copy = engine.dialect.name == 'postgresql'
+    preparer = engine.dialect.identifier_preparer
+    columns = None  # type: List[str]
+    start = time.perf_counter()
+    for chunk in iter_row_chunks(rows, chunk_size=chunk_size):
+        if columns is None:
+            columns = list(chunk[0].keys())
+        if is_copy:
+            buffer = StringIO()
+            buffer.writelines(['\t'.join([_copy_value(row[x]) for x in columns]) + '\n' for row in chunk])
+            buffer.seek(0)
+            copy_sql = f'COPY {preparer.format_table(table)} ({", ".join([preparer.quote(x) for x in columns])}) ' \
+                       f'FROM STDIN'
+            raw_conn = engine.raw_connection()
+            try:
+                with raw_conn.cursor() as cursor:
+                    cursor.copy_expert(copy_sql, buffer)
+                raw_conn.commit()
+            except Exception:
+                raw_conn.rollback()
+                raise
+            finally:
+                raw_conn.close()
+        else:
+            with engine.begin() as conn:
+                conn.execute(insert(table), chunk)
+        result.n_rows += len(chunk)
+        result.n_chunks += 1
+        logger.debug(f'Inserted {result.n_rows} rows into {table.name}...')
+    result.elapsed = time.perf_counter() - start
+    return result
@@ -1,41 +1,373 @@
+import atexit
 from contextlib import contextmanager
+from contextvars import ContextVar
+import queue
+import re
+import sqlite3
+import threading
+import time
 import traceback
 from typing import (
     Any,
+    Callable,
+    ContextManager,
     Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
 )
 
 from loguru import logger
+from sqlalchemy import event
 from sqlalchemy.engine import (
     URL,
     Engine,
     create_engine,
 )
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import (
     Session,
+    scoped_session,
     sessionmaker,
 )
 
+from slacktools.db_bulk import (
+    BulkWriteResult,
+    RowsType,
+    bulk_insert,
+    bulk_upsert,
+)
+from slacktools.db_metrics import (
+    DEFAULT_SLOW_QUERY_S,
+    QueryMetrics,
+    QueryTotals,
+    instrument_engine,
+    session_query_scope,
+)
+from slacktools.metrics import Histogram
+from slacktools.startup_profiler import (
+    startup_phase,
+    timed_startup_phase,
+)
+
+# Connections idle in the pool for longer than this are replaced - servers (and anything in between)
+#   tend to drop idle connections, which otherwise only shows up as an error on the next query
+DEFAULT_POOL_RECYCLE_S = 1800
+DEFAULT_POOL_SETTINGS = {
+    'pool_size': 5,
+    'max_overflow': 10,
+    'pool_recycle': DEFAULT_POOL_RECYCLE_S,
+    'pool_pre_ping': True,
+    'pool_timeout': 30,
+}
+# Pragmas for SQLite as a local cache/archive: WAL lets readers carry on during writes, commits only fsync
+#   at checkpoints (a crash can lose the latest commits, but won't corrupt the db), reads go through mmap &
+#   a bigger page cache and writers wait on a lock rather than failing right away
+SQLITE_PERFORMANCE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64000,  # in KiB when negative
+    'busy_timeout': 5000,  # ms
+    'temp_store': 'MEMORY',
+}
+_PRAGMA_PART = re.compile(r'-?\w+')
+
+
+class PoolStats:
+    """Counts an engine's connection pool activity & times how long checkouts wait on the pool"""
+    WAIT_BOUNDS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._lock = threading.Lock()
+        self.reset()
+        for name in ['connect', 'checkout', 'checkin', 'invalidate']:
+            event.listen(engine, name, self._counter(name))
+        self._wrap_pool_connect(engine.pool)
+        # dispose() swaps the engine's pool for a new one, which needs timing too
+        event.listen(engine, 'engine_disposed', lambda disposed_engine: self._wrap_pool_connect(disposed_engine.pool))
+
+    def reset(self):
+        with self._lock:
+            self.counts = {'connect': 0, 'checkout': 0, 'checkin': 0, 'invalidate': 0, 'timeout': 0}
+            self.wait = Histogram(bounds=self.WAIT_BOUNDS)
+
+    def _counter(self, name: str):
+        def _count(*args):
+            with self._lock:
+                self.counts[name] += 1
+        return _count
+
+    def _wrap_pool_connect(self, pool):
+        """Times the checkouts from the pool, including any wait for a free connection (and the pre-ping).
+        Pool events don't mark the start of a checkout, so the pool's connect is wrapped instead"""
+        pool_connect = pool.connect
+
+        def _timed_connect(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return pool_connect(*args, **kwargs)
+            except PoolTimeoutError:
+                with self._lock:
+                    self.counts['timeout'] += 1
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.wait.observe(elapsed)
+        pool.connect = _timed_connect
+
+    def snapshot(self) -> Dict:
+        pool = self.engine.pool
+        with self._lock:
+            snap = {
+                **self.counts,
+                'wait': self.wait.asdict(),
+            }
+        snap.update({
+            'pool': pool.__class__.__name__,
+            'status': pool.status(),
+            'checked_out': pool.checkedout() if hasattr(pool, 'checkedout') else None,
+        })
+        return snap
+
+
+class ErrorLogWriter:
+    """Writes error rows to the db in batches from a background thread
+
+    Errors are put on a bounded queue and flushed once batch_size of them are waiting or flush_interval seconds
+        have passed. Identical errors (same table, type, class, text, traceback & extra values) within a batch
+        are written once along with how many times they happened, so an error storm doesn't become a write storm.
+        When the queue is full, errors are dropped (and counted) rather than blocking the caller.
+        Whatever's queued is written on `close`, which is also called at exit.
+    """
+
+    def __init__(self, session_mgr: Callable[[], ContextManager[Session]], max_queue: int = 1000,
+                 batch_size: int = 100, flush_interval: float = 2.0, count_field: str = None):
+        """
+        Args:
+            session_mgr: the transactional scope to write batches in (e.g., DBClient.session_mgr)
+            max_queue: int, errors held at most while waiting to be written
+            batch_size: int, errors taken off the queue per write
+            flush_interval: float, seconds an error waits at most before being written
+            count_field: str, the error table's column for the number of times the error happened.
+                Without one, repeats are noted at the end of error_text instead
+        """
+        self.session_mgr = session_mgr
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.count_field = count_field
+        self._queue = queue.Queue(maxsize=max_queue)  # type: queue.Queue[Tuple]
+        self._lock = threading.Lock()
+        self._thread = None  # type: Optional[threading.Thread]
+        self._is_closed = False
+        self.stats = {'queued': 0, 'dropped': 0, 'collapsed': 0, 'written': 0, 'failed': 0, 'batches': 0}
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self.stats[name] += n
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None or self._is_closed:
+                return
+            self._thread = threading.Thread(target=self._run, name='db-error-writer', daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, e: Exception, err_tbl, error_type, **kwargs) -> bool:
+        """Queues the error to be written. Returns False if it was dropped"""
+        if self._is_closed:
+            self._count('dropped')
+            return False
+        if self._thread is None:
+            self._start()
+        # The traceback's formatted now so the queue doesn't keep the frames (and everything in them) alive
+        record = (err_tbl, error_type, e.__class__.__name__, str(e), ''.join(traceback.format_tb(e.__traceback__)),
+                  tuple(sorted(kwargs.items())))
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._count('dropped')
+            with self._lock:
+                n_dropped = self.stats['dropped']
+            # Don't let the drops flood the log either
+            if n_dropped & (n_dropped - 1) == 0:
+                logger.warning(f'Error log queue is full. Errors dropped so far: {n_dropped}')
+            return False
+        self._count('queued')
+        return True
+
+    def _run(self):
+        is_draining = False
+        while True:
+            batch = []  # type: List[Tuple]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    if is_draining:
+                        record = self._queue.get_nowait()
+                    else:
+                        record = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if record is None:
+                    # Stop marker - write out what's left without waiting
+                    is_draining = True
+                    continue
+                batch.append(record)
+            if len(batch) > 0:
+                self._write(batch)
+            elif is_draining:
+                return
+
+    def _write(self, batch: List[Tuple]):
+        groups = {}  # type: Dict[Any, List]
+        for i, record in enumerate(batch):
+            try:
+                key = record if hash(record) is not None else i
+            except TypeError:
+                # Unhashable extra values - not collapsed
+                key = i
+            if key in groups:
+                groups[key][1] += 1
+            else:
+                groups[key] = [record, 1]
+        rows = []
+        for record, n in groups.values():
+            err_tbl, error_type, error_class, error_text, error_traceback, extra = record
+            extra = dict(extra)
+            if n > 1:
+                if self.count_field is not None:
+                    extra[self.count_field] = n
+                else:
+                    error_text = f'{error_text} [repeated {n} times]'
+            rows.append(err_tbl(error_type=error_type, error_class=error_class, error_text=error_text,
+                                error_traceback=error_traceback, **extra))
+        try:
+            with self.session_mgr() as session:
+                session.add_all(rows)
+        except Exception as err:
+            logger.error(f'Failed to write {len(batch)} errors to the db: {err}')
+            self._count('failed', len(batch))
+        else:
+            self._count('written', len(batch))
+            self._count('collapsed', len(batch) - len(rows))
+        self._count('batches')
+
+    def close(self, timeout: float = 10.0) -> bool:
+        """Writes out whatever's queued and stops the writer. Returns True if it finished within the timeout"""
+        with self._lock:
+            self._is_closed = True
+            thread = self._thread
+        if thread is None:
+            return True
+        atexit.unregister(self.close)
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(timeout=timeout)
+        return not thread.is_alive()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Errors queued, dropped (full queue / after closing), written, failed to write & collapsed into repeats"""
+        with self._lock:
+            return {**self.stats, 'pending': self._queue.qsize()}
+
 
 class DBClient:
     """Creates Postgres connection engine"""
 
-    def __init__(self, engine: Engine):
+    @timed_startup_phase('DBClient.__init__')
+    def __init__(self, engine: Engine, slow_query_threshold: Optional[float] = DEFAULT_SLOW_QUERY_S):
+        """
+        Args:
+            slow_query_threshold: float, seconds after which a query is logged as slow. None to not log any
+        """
         self.engine = engine
         self._dbsession = sessionmaker(bind=self.engine)
+        # One session per thread, kept for reuse (see session_mgr)
+        self._thread_sessions = scoped_session(self._dbsession)
+        # The session of the outermost session_scope in the current context
+        self._scope_session = ContextVar(
+            f'dbclient_session_{id(self)}', default=None
+        )  # type: ContextVar[Optional[Session]]
+        self.pool_stats = PoolStats(engine) if isinstance(engine, Engine) else None  # type: Optional[PoolStats]
+        self.query_metrics = QueryMetrics(slow_threshold=slow_query_threshold)
+        if isinstance(engine, Engine):
+            instrument_engine(engine, self.query_metrics)
+        # See enable_error_writer
+        self.error_writer = None  # type: Optional[ErrorLogWriter]
+
+    @staticmethod
+    def get_pool_kwargs(pool_size: int = None, max_overflow: int = None, pool_recycle: int = None,
+                        pool_pre_ping: bool = None, pool_timeout: float = None) -> Dict:
+        """Fills in the pool settings that weren't given with the defaults (DEFAULT_POOL_SETTINGS)"""
+        given = {
+            'pool_size': pool_size,
+            'max_overflow': max_overflow,
+            'pool_recycle': pool_recycle,
+            'pool_pre_ping': pool_pre_ping,
+            'pool_timeout': pool_timeout,
+        }
+        return {k: given[k] if given[k] is not None else v for k, v in DEFAULT_POOL_SETTINGS.items()}
 
     @contextmanager
-    def session_mgr(self):
-        """This sets up a transactional scope around a series of operations"""
-        session = self._dbsession()
-        try:
+    def session_mgr(self, is_thread_scoped: bool = False) -> Iterator[Session]:
+        """This sets up a transactional scope around a series of operations
+
+        Args:
+            is_thread_scoped: bool, if True, uses the current thread's session rather than creating a new one.
+                It's kept (without holding on to a connection) after the commit for the thread's next use.
+                Meant for hot paths; call `remove_thread_session` when the thread's done with it
+        """
+        session = self._thread_sessions() if is_thread_scoped else self._dbsession()
+        with session_query_scope(self.get_session_query_totals(session)):
+            try:
+                yield session
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                if not is_thread_scoped:
+                    session.close()
+
+    @staticmethod
+    def get_session_query_totals(session: Session) -> QueryTotals:
+        """The queries made in a session from session_mgr/session_scope - how many, how long they took & rows"""
+        return session.info.setdefault('query_totals', QueryTotals())
+
+    def get_query_stats(self) -> Dict:
+        """Query counts, durations & rows - overall, by statement kind and by bot command - along with the
+        recent slow queries. Command db time is also recorded with the command (see ApiMetricsRegistry)"""
+        return self.query_metrics.snapshot()
+
+    def remove_thread_session(self):
+        """Closes & drops the current thread's session"""
+        self._thread_sessions.remove()
+
+    @contextmanager
+    def session_scope(self) -> Iterator[Session]:
+        """Like session_mgr, but scopes nested within it (in the same thread/async context) share its session,
+        so a command's operations all run in one transaction that's committed at the end of the outermost scope"""
+        session = self._scope_session.get()
+        if session is not None:
             yield session
-            session.commit()
-        except Exception:
-            session.rollback()
-            raise
-        finally:
-            session.close()
+            return
+        with self.session_mgr() as session:
+            token = self._scope_session.set(session)
+            try:
+                yield session
+            finally:
+                self._scope_session.reset(token)
+
+    def get_pool_stats(self) -> Optional[Dict]:
+        """Connection pool checkouts, new connections, invalidations & timeouts, along with checkout wait times"""
+        return self.pool_stats.snapshot() if self.pool_stats is not None else None
 
     def refresh_table_object(self, tbl_obj, session: Session = None):
         """Refreshes a table object by adding it to the session, committing and refreshing it before
@@ -60,8 +392,47 @@ class DBClient:
             tbl_obj = _refresh(sess=session, tbl=tbl_obj)
         return tbl_obj
 
+    def bulk_upsert(self, table, rows: RowsType, conflict_cols: List[str] = None, update_cols: List[str] = None,
+                    chunk_size: int = 1000) -> BulkWriteResult:
+        """Inserts many rows at once, updating those that conflict with existing ones (Postgres & SQLite).
+        Rows are committed a chunk at a time.
+
+        Args:
+            table: the ORM class or Table to write to
+            rows: an iterable of row dicts, or a DataFrame
+            conflict_cols: the columns of the unique constraint to check for conflicts on. Defaults to the primary key
+            update_cols: the columns to update on conflict. Defaults to every other given column
+            chunk_size: int, rows per insert & commit
+        """
+        result = bulk_upsert(self.engine, table, rows, conflict_cols=conflict_cols, update_cols=update_cols,
+                             chunk_size=chunk_size)
+        logger.debug(f'Bulk upsert done: {result.asdict()}')
+        return result
+
+    def bulk_insert(self, table, rows: RowsType, chunk_size: int = 10000) -> BulkWriteResult:
+        """Appends many rows at once - through COPY on Postgres. Rows are committed a chunk at a time.
+        See bulk_upsert for the args"""
+        result = bulk_insert(self.engine, table, rows, chunk_size=chunk_size)
+        logger.debug(f'Bulk insert done: {result.asdict()}')
+        return result
+
+    def enable_error_writer(self, max_queue: int = 1000, batch_size: int = 100, flush_interval: float = 2.0,
+                            count_field: str = None) -> ErrorLogWriter:
+        """Has log_error_to_db queue errors for a background writer to write in batches rather than writing
+        each as it comes in. See ErrorLogWriter for the args"""
+        if self.error_writer is None:
+            self.error_writer = ErrorLogWriter(self.session_mgr, max_queue=max_queue, batch_size=batch_size,
+                                               flush_interval=flush_interval, count_field=count_field)
+        return self.error_writer
+
     def log_error_to_db(self, e: Exception, err_tbl, error_type, **kwargs):
-        """Logs error info to the service_error_log table"""
+        """Logs error info to the service_error_log table
+
+        When the error writer's enabled (see enable_error_writer), the error's queued and written in the background
+        """
+        if self.error_writer is not None:
+            self.error_writer.put(e, err_tbl, error_type, **kwargs)
+            return
         err = err_tbl(
             error_type=error_type,
             error_class=e.__class__.__name__,
@@ -75,23 +446,85 @@ class DBClient:
 
 class PSQLClient(DBClient):
 
-    def __init__(self, props: Dict, **kwargs):
-        self.engine = create_engine(URL.create(
-            drivername='postgresql+psycopg2',
-            username=props['usr'],
-            password=props['pwd'],
-            host=props['host'],
-            port=props['port'],
-            database=props['database']
-        ))
-        super().__init__(engine=self.engine)
+    def __init__(self, props: Dict, pool_size: int = None, max_overflow: int = None, pool_recycle: int = None,
+                 pool_pre_ping: bool = None, pool_timeout: float = None,
+                 slow_query_threshold: Optional[float] = DEFAULT_SLOW_QUERY_S, **kwargs):
+        """
+        Args:
+            pool_size: int, connections kept open in the pool
+            max_overflow: int, connections opened beyond pool_size when they're all checked out
+            pool_recycle: int, seconds after which a connection is replaced (-1 to never)
+            pool_pre_ping: bool, if True, connections are tested on checkout and replaced if they've gone stale
+            pool_timeout: float, seconds to wait for a connection before raising
+            slow_query_threshold: float, seconds after which a query is logged as slow. None to not log any
+        """
+        with startup_phase('PSQLClient.create_engine'):
+            self.engine = create_engine(URL.create(
+                drivername='postgresql+psycopg2',
+                username=props['usr'],
+                password=props['pwd'],
+                host=props['host'],
+                port=props['port'],
+                database=props['database']
+            ), **self.get_pool_kwargs(pool_size=pool_size, max_overflow=max_overflow, pool_recycle=pool_recycle,
+                                      pool_pre_ping=pool_pre_ping, pool_timeout=pool_timeout))
+        super().__init__(engine=self.engine, slow_query_threshold=slow_query_threshold)
 
 
 class SQLiteClient(DBClient):
 
-    def __init__(self, props: Dict, **kwargs):
-        self.engine = create_engine(URL.create(
-            drivername='sqlite',
-            database=props['database']
-        ))
-        super().__init__(engine=self.engine)
+    def __init__(self, props: Dict, pool_size: int = None, max_overflow: int = None, pool_recycle: int = None,
+                 pool_pre_ping: bool = None, pool_timeout: float = None, pragmas: Dict[str, Any] = None,
+                 is_shared_memory: bool = False, slow_query_threshold: Optional[float] = DEFAULT_SLOW_QUERY_S,
+                 **kwargs):
+        """
+        Args:
+            pool settings: see PSQLClient. pool_size, max_overflow & pool_timeout only apply to file databases,
+                as in-memory databases keep a single connection per thread. In-memory connections aren't recycled
+            pragmas: dict, pragma -> value set on each new connection, e.g., SQLITE_PERFORMANCE_PRAGMAS
+                (or a copy of it with changes)
+            is_shared_memory: bool, if True, the database is kept in memory under props['database'] as its name,
+                shared by every connection (& thread) in the process for as long as this client is around
+            slow_query_threshold: see PSQLClient
+        """
+        self.pragmas = self._check_pragmas(pragmas if pragmas is not None else {})
+        pool_kwargs = self.get_pool_kwargs(pool_size=pool_size, max_overflow=max_overflow,
+                                           pool_recycle=pool_recycle, pool_pre_ping=pool_pre_ping,
+                                           pool_timeout=pool_timeout)
+        self._memory_keeper = None  # type: Optional[sqlite3.Connection]
+        if is_shared_memory:
+            # Shared-cache memory dbs only last as long as a connection to them is open
+            uri = f'file:{props["database"]}?mode=memory&cache=shared'
+            self._memory_keeper = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            url = URL.create(drivername='sqlite', database=uri, query={'uri': 'true'})
+            pool_kwargs['pool_recycle'] = -1
+        else:
+            url = URL.create(drivername='sqlite', database=props['database'])
+            if props['database'] in [None, '', ':memory:']:
+                pool_kwargs = {'pool_pre_ping': pool_kwargs['pool_pre_ping']}
+        with startup_phase('SQLiteClient.create_engine'):
+            self.engine = create_engine(url, **pool_kwargs)
+        if len(self.pragmas) > 0:
+            event.listen(self.engine, 'connect', self._apply_pragmas)
+        super().__init__(engine=self.engine, slow_query_threshold=slow_query_threshold)
+
+    @staticmethod
+    def _check_pragmas(pragmas: Dict[str, Any]) -> Dict[str, Any]:
+        """Pragmas can't be parameterized, so only plain names & values are let through"""
+        for k, v in pragmas.items():
+            if _PRAGMA_PART.fullmatch(str(k)) is None or _PRAGMA_PART.fullmatch(str(v)) is None:
+                raise ValueError(f'Unexpected pragma: {k}={v}')
+        return dict(pragmas)
+
+    def _apply_pragmas(self, dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        try:
+            for k, v in self.pragmas.items():
+                cursor.execute(f'PRAGMA {k}={v}')
+        finally:
+            cursor.close()
+
+    def get_pragmas(self) -> Dict[str, Any]:
+        """Reads the current values of the configured pragmas from a connection"""
+        with self.engine.connect() as conn:
+            return {k: conn.exec_driver_sql(f'PRAGMA {k}').scalar() for k in self.pragmas.keys()}
@@ -0,0 +1,216 @@
+"""In-process instrumentation for db queries
+
+Query counts, durations & row counts are recorded overall, per statement kind (SELECT, INSERT, ...),
+    per bot command (see `metrics.command_scope`) and per session. The time is also added to the current
+    command's context, so a command's wall time can be split into db & non-db time.
+
+Usage:
+    >>> query_metrics = QueryMetrics(slow_threshold=0.5)
+    >>> instrument_engine(engine, query_metrics)
+    >>> with command_scope('^help'):
+    >>>     session.execute(...)
+    >>> query_metrics.snapshot()
+"""
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import time
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Iterator,
+    Optional,
+)
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from slacktools.metrics import (
+    Histogram,
+    get_current_command_context,
+)
+
+DEFAULT_SLOW_QUERY_S = 0.5
+# Statements are cut to this length in the slow query log
+MAX_STATEMENT_CHARS = 500
+_START_KEY = 'slacktools_query_start'
+
+
+class QueryTotals:
+    """Running totals for a group of queries (e.g., those made in a session)"""
+
+    def __init__(self):
+        self.queries = 0
+        self.errors = 0
+        self.time = 0.0
+        self.rows = 0
+
+    def add(self, elapsed: float, rows: Optional[int], is_error: bool = False):
+        self.queries += 1
+        self.time += elapsed
+        if rows is not None and rows > 0:
+            self.rows += rows
+        if is_error:
+            self.errors += 1
+
+    def asdict(self) -> Dict[str, Any]:
+        return {
+            'queries': self.queries,
+            'errors': self.errors,
+            'time': self.time,
+            'rows': self.rows,
+        }
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}(queries={self.queries}, time={self.time:.3f})>'
+
+
+_current_session_totals = ContextVar(
+    'slacktools_session_query_totals', default=None
+)  # type: ContextVar[Optional[QueryTotals]]
+
+
+@contextmanager
+def session_query_scope(totals: QueryTotals) -> Iterator[QueryTotals]:
+    """Adds the queries made within this scope to the given totals (e.g., a session's)"""
+    token = _current_session_totals.set(totals)
+    try:
+        yield totals
+    finally:
+        _current_session_totals.reset(token)
+
+
+def _describe_value(value: Any) -> str:
+    if isinstance(value, dict):
+        return '{' + ', '.join([f'{k}: {type(v).__name__}' for k, v in value.items()]) + '}'
+    if isinstance(value, (list, tuple)):
+        return '(' + ', '.join([type(x).__name__ for x in value]) + ')'
+    return type(value).__name__
+
+
+def describe_params(params: Any, is_many: bool = False) -> str:
+    """The shape of a statement's parameters without their values, e.g., '250 x {user_id: str, n: int}'"""
+    if params is None:
+        return 'none'
+    if is_many:
+        params = list(params)
+        return f'{len(params)} x {_describe_value(params[0])}' if len(params) > 0 else '0 x none'
+    return _describe_value(params)
+
+
+def _get_statement_kind(statement: str) -> str:
+    words = statement.split(None, 1)
+    return words[0].upper() if len(words) > 0 else 'OTHER'
+
+
+class QueryMetrics:
+    """Thread-safe registry of db query metrics"""
+
+    def __init__(self, slow_threshold: float = DEFAULT_SLOW_QUERY_S, max_slow_queries: int = 50):
+        """
+        Args:
+            slow_threshold: float, seconds after which a query is logged & kept as slow. None to not log any
+            max_slow_queries: int, the most recent slow queries kept for the snapshot
+        """
+        self.slow_threshold = slow_threshold
+        self.max_slow_queries = max_slow_queries
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.totals = QueryTotals()
+            self.latency = Histogram()
+            self._kinds = {}  # type: Dict[str, QueryTotals]
+            self._commands = {}  # type: Dict[str, QueryTotals]
+            self.n_slow = 0
+            self.slow_queries = deque(maxlen=self.max_slow_queries)  # type: Deque[Dict[str, Any]]
+
+    def record_query(self, statement: str, params: Any, elapsed: float, rows: Optional[int] = None,
+                     is_many: bool = False, is_error: bool = False):
+        """Records a single query. rows is the count the driver reports, if any"""
+        cmd_ctx = get_current_command_context()
+        if cmd_ctx is not None:
+            # Only ever changed from the thread handling the command
+            cmd_ctx.db_time += elapsed
+            cmd_ctx.db_queries += 1
+        session_totals = _current_session_totals.get()
+        if session_totals is not None:
+            session_totals.add(elapsed, rows, is_error=is_error)
+
+        kind = _get_statement_kind(statement)
+        command = cmd_ctx.name if cmd_ctx is not None else None
+        is_slow = self.slow_threshold is not None and elapsed >= self.slow_threshold
+        with self._lock:
+            self.totals.add(elapsed, rows, is_error=is_error)
+            self.latency.observe(elapsed)
+            self._kinds.setdefault(kind, QueryTotals()).add(elapsed, rows, is_error=is_error)
+            if command is not None:
+                self._commands.setdefault(command, QueryTotals()).add(elapsed, rows, is_error=is_error)
+            if is_slow:
+                self.n_slow += 1
+        if is_slow:
+            # Only the shape of the parameters - their values could be anything (incl. secrets)
+            params_shape = describe_params(params, is_many=is_many)
+            slow_query = {
+                'statement': statement[:MAX_STATEMENT_CHARS],
+                'params': params_shape,
+                'elapsed': elapsed,
+                'rows': rows,
+                'command': command,
+            }
+            with self._lock:
+                self.slow_queries.append(slow_query)
+            logger.warning(f'Slow query ({elapsed:.3f}s, command={command}, params={params_shape}): '
+                           f'{slow_query["statement"]}')
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns a point-in-time copy of all collected metrics"""
+        with self._lock:
+            return {
+                'slow_threshold': self.slow_threshold,
+                **self.totals.asdict(),
+                'latency': self.latency.asdict(),
+                'kinds': {k: v.asdict() for k, v in self._kinds.items()},
+                'commands': {k: v.asdict() for k, v in self._commands.items()},
+                'slow': self.n_slow,
+                'slow_queries': list(self.slow_queries),
+            }
+
+
+def instrument_engine(engine: Engine, query_metrics: QueryMetrics) -> Engine:
+    """Listens to the engine's cursor events to time every statement it runs. The engine's modified in place
+    and returned"""
+    if getattr(engine, '_slacktools_query_metrics', None) is not None:
+        return engine
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get(_START_KEY)
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        rows = cursor.rowcount if cursor is not None and cursor.rowcount >= 0 else None
+        query_metrics.record_query(statement, parameters, elapsed, rows=rows, is_many=executemany)
+
+    def _on_error(exception_context):
+        conn = exception_context.connection
+        starts = conn.info.get(_START_KEY) if conn is not None else None
+        if not starts or exception_context.statement is None:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        query_metrics.record_query(exception_context.statement, exception_context.parameters, elapsed,
+                                   is_many=exception_context.execution_context is not None and
+                                   exception_context.execution_context.executemany,
+                                   is_error=True)
+
+    event.listen(engine, 'before_cursor_execute', _before)
+    event.listen(engine, 'after_cursor_execute', _after)
+    event.listen(engine, 'handle_error', _on_error)
+    engine._slacktools_query_metrics = query_metrics
+    return engine
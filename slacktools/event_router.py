@@ -0,0 +1,228 @@
+"""Routes Events API payloads to their model classes & registered handlers"""
+import itertools
+import traceback
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from loguru import logger
+
+from slacktools import codec
+from slacktools.api.base import BaseApiObject
+from slacktools.api.events.channel import (
+    ChannelArchive,
+    ChannelCreated,
+    ChannelDeleted,
+    ChannelRename,
+    ChannelUnarchive,
+    MemberJoinedChannel,
+    MemberLeftChannel,
+)
+from slacktools.api.events.emoji import (
+    EmojiAdded,
+    EmojiRemoved,
+    EmojiRenamed,
+)
+from slacktools.api.events.message import Message
+from slacktools.api.events.pin import (
+    PinAdded,
+    PinRemoved,
+)
+from slacktools.api.events.reaction import (
+    ReactionAdded,
+    ReactionRemoved,
+)
+from slacktools.api.events.user import (
+    UserProfileChanged,
+    UserStatusChanged,
+    UserTyping,
+)
+
+# Handlers registered with this subtype receive the event type regardless of subtype
+ANY_SUBTYPE = '*'
+
+EventKeyType = Tuple[str, Optional[str]]
+PredicateType = Callable[[Dict], bool]
+
+
+class EventHandler:
+    """A handler registered against an event type"""
+    # Breaks priority ties by registration order
+    _counter = itertools.count()
+
+    def __init__(self, handler: Callable, priority: int = 0, predicate: PredicateType = None):
+        """
+        Args:
+            handler: Callable, called as handler(event_model, **context)
+            priority: int, handlers with higher priorities are called first
+            predicate: Callable[[Dict], bool], if set, evaluated on the raw event dict; the handler
+                is skipped (and the model isn't built on its account) when it returns False
+        """
+        self.handler = handler
+        self.priority = priority
+        self.predicate = predicate
+        self.order = next(self._counter)
+
+    @property
+    def sort_key(self) -> Tuple[int, int]:
+        return -self.priority, self.order
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}(handler={getattr(self.handler, "__name__", self.handler)}, ' \
+               f'priority={self.priority})>'
+
+
+class EventRouter:
+    """Maps (type, subtype) of incoming events to their model classes and handlers.
+
+    Each payload is parsed into its model at most once, and only when there's a handler to take it.
+        All handlers for the event then receive that same model object.
+    """
+    DEFAULT_MODELS = [
+        ChannelArchive, ChannelCreated, ChannelDeleted, ChannelRename, ChannelUnarchive,
+        MemberJoinedChannel, MemberLeftChannel,
+        EmojiAdded, EmojiRemoved, EmojiRenamed,
+        Message,
+        PinAdded, PinRemoved,
+        ReactionAdded, ReactionRemoved,
+        UserProfileChanged, UserStatusChanged, UserTyping,
+    ]
+
+    def __init__(self, models: List[type] = None, is_raise: bool = False):
+        """
+        Args:
+            models: List[type], event model classes to register (they must define `type` and, optionally,
+                `subtype` class attributes). default: DEFAULT_MODELS
+            is_raise: bool, if True, handler exceptions are raised instead of logged
+        """
+        self.is_raise = is_raise
+        self._models = {}  # type: Dict[EventKeyType, type]
+        self._handlers = {}  # type: Dict[EventKeyType, List[EventHandler]]
+        # Combined (exact + wildcard subtype) handler lists, built on first dispatch of a given key
+        self._resolved = {}  # type: Dict[EventKeyType, List[EventHandler]]
+        for model_cls in (self.DEFAULT_MODELS if models is None else models):
+            self.register_model(model_cls)
+
+    def register_model(self, model_cls: type, event_type: str = None, subtype: Optional[str] = ANY_SUBTYPE):
+        """Registers the model class to build for an event type (and subtype).
+
+        Args:
+            model_cls: type, the class to build
+            event_type: str, the event's `type`. default: the class's `type` attribute
+            subtype: str, the event's `subtype`. default: the class's `subtype` attribute (None if it has none)
+        """
+        if event_type is None:
+            event_type = getattr(model_cls, 'type', None)
+            if not isinstance(event_type, str):
+                raise ValueError(f'Unable to determine the event type for {model_cls}')
+        if subtype == ANY_SUBTYPE:
+            subtype = getattr(model_cls, 'subtype', None)
+        self._models[(event_type, subtype)] = model_cls
+
+    def get_model(self, event_type: str, subtype: str = None) -> type:
+        """Returns the model registered for the type/subtype, falling back to the type's general model"""
+        model_cls = self._models.get((event_type, subtype))
+        if model_cls is None and subtype is not None:
+            model_cls = self._models.get((event_type, None))
+        return BaseApiObject if model_cls is None else model_cls
+
+    def add_handler(self, event_type: str, handler: Callable, subtype: str = ANY_SUBTYPE, priority: int = 0,
+                    predicate: PredicateType = None) -> EventHandler:
+        """Registers a handler for an event type
+
+        Args:
+            event_type: str, the event's `type`
+            handler: Callable, called as handler(event_model, **context)
+            subtype: str, the event's `subtype`. By default, the handler receives every subtype.
+                Pass None to only receive events without a subtype
+            priority: int, handlers with higher priorities are called first
+            predicate: Callable[[Dict], bool], optional filter evaluated on the raw event dict
+        """
+        event_handler = EventHandler(handler, priority=priority, predicate=predicate)
+        handlers = self._handlers.setdefault((event_type, subtype), [])
+        handlers.append(event_handler)
+        handlers.sort(key=lambda x: x.sort_key)
+        self._resolved = {}
+        return event_handler
+
+    def remove_handler(self, event_handler: EventHandler):
+        for handlers in self._handlers.values():
+            if event_handler in handlers:
+                handlers.remove(event_handler)
+        self._resolved = {}
+
+    def on(self, event_type: str, subtype: str = ANY_SUBTYPE, priority: int = 0,
+           predicate: PredicateType = None) -> Callable:
+        """Decorator form of `add_handler`"""
+        def wrapper(func: Callable) -> Callable:
+            self.add_handler(event_type, func, subtype=subtype, priority=priority, predicate=predicate)
+            return func
+        return wrapper
+
+    def get_handlers(self, event_type: str, subtype: str = None) -> List[EventHandler]:
+        key = (event_type, subtype)
+        handlers = self._resolved.get(key)
+        if handlers is None:
+            handlers = self._handlers.get(key, []) + self._handlers.get((event_type, ANY_SUBTYPE), [])
+            handlers.sort(key=lambda x: x.sort_key)
+            self._resolved[key] = handlers
+        return handlers
+
+    @staticmethod
+    def unwrap(event: Union[Dict, codec.JsonInputType]) -> Dict:
+        """Returns the inner event from an Events API envelope; bare events pass through.
+        Raw JSON (bytes or str) is decoded first"""
+        if isinstance(event, codec.JSON_INPUT_TYPES):
+            event = codec.loads(event)
+        inner = event.get('event')
+        if isinstance(inner, dict):
+            return inner
+        return event
+
+    def parse(self, event: Union[Dict, codec.JsonInputType]) -> BaseApiObject:
+        """Builds the model for an event (or envelope) without dispatching it"""
+        event_dict = self.unwrap(event)
+        return self.get_model(event_dict.get('type'), event_dict.get('subtype'))(event_dict)
+
+    def dispatch(self, event: Union[Dict, codec.JsonInputType], **context) -> int:
+        """Sends an event (or a full Events API envelope) to its handlers
+
+        Args:
+            event: dict, the event payload (or its raw JSON as bytes/str)
+            context: passed through to every handler as keyword args
+
+        Returns:
+            int, the number of handlers called
+        """
+        event_dict = self.unwrap(event)
+        event_type = event_dict.get('type')
+        subtype = event_dict.get('subtype')
+        handlers = self.get_handlers(event_type, subtype)
+        if len(handlers) == 0:
+            return 0
+
+        model = None
+        n_called = 0
+        for event_handler in handlers:
+            if event_handler.predicate is not None and not event_handler.predicate(event_dict):
+                continue
+            if model is None:
+                model = self.get_model(event_type, subtype)(event_dict)
+            n_called += 1
+            try:
+                event_handler.handler(model, **context)
+            except Exception as e:
+                if self.is_raise:
+                    raise
+                logger.error(f'Handler {event_handler} failed on {event_type} event: '
+                             f'{e.__class__.__name__}: {e}\n{traceback.format_exc()}')
+        return n_called
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}(models={len(self._models)}, ' \
+               f'handlers={sum(len(x) for x in self._handlers.values())})>'
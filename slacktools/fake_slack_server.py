@@ -0,0 +1,628 @@
+"""A local, in-memory stand-in for the subset of the Slack Web API used by SlackMethods & SlackSession.
+
+Meant for offline load & latency testing - responses take a configurable amount of time and the server can
+    inject rate limits (429s) and errors, so client behavior can be measured without touching a real workspace.
+
+Usage:
+    >>> with FakeSlackServer(latency=0.05, jitter=0.02, rate_limit_rate=0.01) as server:
+    >>>     server.seed_workspace(n_users=50, n_channels=10)
+    >>>     st = SlackMethods(props, main_channel='C00000001', base_url=server.base_url)
+
+    Or from the command line:
+        python -m slacktools.fake_slack_server --port 8089 --latency 0.05
+"""
+import argparse
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import (
+    BaseHTTPRequestHandler,
+    ThreadingHTTPServer,
+)
+import json
+import random
+import re
+import threading
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+from urllib.parse import (
+    parse_qs,
+    urlparse,
+)
+
+from loguru import logger
+
+
+class FakeSlackError(Exception):
+    """Raised within a method handler to return an `ok: false` response"""
+
+    def __init__(self, error: str):
+        self.error = error
+        super().__init__(error)
+
+
+class FakeWorkspace:
+    """In-memory workspace state (users, channels, messages, emojis, files)"""
+
+    def __init__(self, team: str = 'fake-team', team_id: str = 'T00000001', bot_id: str = 'B00000001',
+                 bot_user_id: str = 'U00000001'):
+        self.team = team
+        self.team_id = team_id
+        self.bot_id = bot_id
+        self.bot_user_id = bot_user_id
+        self.users = {}  # type: Dict[str, Dict]
+        self.channels = {}  # type: Dict[str, Dict]
+        self.members = {}  # type: Dict[str, List[str]]
+        self.messages = {}  # type: Dict[str, List[Dict]]
+        self.emojis = {}  # type: Dict[str, str]
+        self.files = {}  # type: Dict[str, Dict]
+        self._id_counter = 1
+        self._last_ts = 0.0
+        self.add_user('fakebot', user_id=bot_user_id, is_bot=True)
+
+    def next_id(self, prefix: str) -> str:
+        self._id_counter += 1
+        return f'{prefix}{self._id_counter:08d}'
+
+    def next_ts(self) -> str:
+        # Timestamps double as message ids, so they must be unique
+        self._last_ts = max(time.time(), self._last_ts + 0.000001)
+        return f'{self._last_ts:.6f}'
+
+    def add_user(self, name: str, user_id: str = None, is_bot: bool = False) -> Dict:
+        user_id = self.next_id('U') if user_id is None else user_id
+        self.users[user_id] = {
+            'id': user_id,
+            'team_id': self.team_id,
+            'name': name,
+            'deleted': False,
+            'real_name': name.title(),
+            'is_bot': is_bot,
+            'is_admin': False,
+            'updated': int(time.time()),
+            'profile': {
+                'real_name': name.title(),
+                'display_name': name,
+                'real_name_normalized': name.title(),
+                'display_name_normalized': name,
+                'status_text': '',
+                'status_emoji': '',
+                'team': self.team_id,
+            }
+        }
+        return self.users[user_id]
+
+    def add_channel(self, name: str, channel_id: str = None, members: List[str] = None, is_private: bool = False,
+                    is_im: bool = False) -> Dict:
+        channel_id = self.next_id('D' if is_im else 'G' if is_private else 'C') if channel_id is None else channel_id
+        self.channels[channel_id] = {
+            'id': channel_id,
+            'name': name,
+            'created': int(time.time()),
+            'creator': self.bot_user_id,
+            'is_channel': not is_private and not is_im,
+            'is_group': is_private,
+            'is_im': is_im,
+            'is_private': is_private or is_im,
+            'is_archived': False,
+            'is_member': True,
+        }
+        self.members[channel_id] = list(members) if members is not None else [self.bot_user_id]
+        self.messages[channel_id] = []
+        return self.channels[channel_id]
+
+    def add_message(self, channel: str, text: str, user: str = None, thread_ts: str = None,
+                    blocks: List[Dict] = None, **kwargs) -> Dict:
+        if channel not in self.channels.keys():
+            raise FakeSlackError('channel_not_found')
+        msg = {
+            'type': 'message',
+            'user': self.bot_user_id if user is None else user,
+            'text': text,
+            'ts': self.next_ts(),
+        }
+        if user is None:
+            msg['bot_id'] = self.bot_id
+        if blocks is not None:
+            msg['blocks'] = blocks
+        if thread_ts is not None:
+            msg['thread_ts'] = thread_ts
+            parent = self.find_message(channel, thread_ts)
+            if parent is not None:
+                parent['thread_ts'] = thread_ts
+                parent['reply_count'] = parent.get('reply_count', 0) + 1
+        msg.update(kwargs)
+        self.messages[channel].append(msg)
+        return msg
+
+    def find_message(self, channel: str, ts: str) -> Optional[Dict]:
+        for msg in self.messages.get(channel, []):
+            if msg['ts'] == ts:
+                return msg
+        return None
+
+
+def _paginate(items: List[Any], params: Dict[str, Any], default_limit: int = 100) -> Tuple[List[Any], str]:
+    """Offset-based cursor pagination"""
+    limit = int(params.get('limit') or default_limit)
+    offset = int(params.get('cursor') or 0)
+    page = items[offset:offset + limit]
+    next_cursor = str(offset + limit) if offset + limit < len(items) else ''
+    return page, next_cursor
+
+
+class FakeSlackServer:
+    """Serves the fake Web API on a background thread.
+
+    Args:
+        host: str, the interface to bind to
+        port: int, the port to bind to. 0 picks a free port
+        latency: float, seconds to wait before answering each call
+        jitter: float, up to this many extra seconds (uniformly random) are added to the latency
+        rate_limit_rate: float, probability [0, 1] that a call is answered with a 429
+        error_rate: float, probability [0, 1] that a call is answered with `ok: false` (`internal_error`)
+        retry_after: int, the Retry-After value (seconds) sent along with 429s
+        seed: int, seeds the random generator behind jitter & fault injection so runs are reproducible
+        workspace: FakeWorkspace, initial state. A fresh one is created if not provided
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 rate_limit_rate: float = 0.0, error_rate: float = 0.0, retry_after: int = 1, seed: int = None,
+                 workspace: FakeWorkspace = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.workspace = workspace if workspace is not None else FakeWorkspace()
+        self.call_counts = {}  # type: Dict[str, int]
+        self._rand = random.Random(seed)
+        self._lock = threading.RLock()
+        self._forced_errors = {}  # type: Dict[str, List[str]]
+        self._thread = None  # type: Optional[threading.Thread]
+        self._methods = {
+            'auth.test': self.auth_test,
+            'chat.postMessage': self.chat_post_message,
+            'chat.postEphemeral': self.chat_post_ephemeral,
+            'chat.update': self.chat_update,
+            'chat.delete': self.chat_delete,
+            'conversations.list': self.conversations_list,
+            'conversations.info': self.conversations_info,
+            'conversations.members': self.conversations_members,
+            'conversations.history': self.conversations_history,
+            'conversations.replies': self.conversations_replies,
+            'conversations.open': self.conversations_open,
+            'conversations.create': self.conversations_create,
+            'conversations.invite': self.conversations_invite,
+            'channels.invite': self.conversations_invite,
+            'users.info': self.users_info,
+            'users.list': self.users_list,
+            'emoji.list': self.emoji_list,
+            'emoji.add': self.emoji_add,
+            'emoji.adminList': self.emoji_admin_list,
+            'search.messages': self.search_messages,
+            'files.upload': self.files_upload,
+            'files.getUploadURLExternal': self.files_get_upload_url_external,
+            'files.completeUploadExternal': self.files_complete_upload_external,
+            'files.info': self.files_info,
+            'views.publish': self.views_publish,
+            'dialog.open': self.dialog_open,
+        }  # type: Dict[str, Callable[[Dict], Dict]]
+        self.httpd = ThreadingHTTPServer((host, port), self._build_handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def base_url(self) -> str:
+        """The url to pass as `base_url` to WebClient/SlackMethods"""
+        return f'{self.url}/api/'
+
+    def start(self) -> 'FakeSlackServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, kwargs={'poll_interval': 0.05},
+                                        name='fake-slack-server', daemon=True)
+        self._thread.start()
+        logger.debug(f'Fake Slack server listening at {self.base_url}')
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'FakeSlackServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def seed_workspace(self, n_users: int = 10, n_channels: int = 5, n_messages: int = 20, n_emojis: int = 10):
+        """Populates the workspace with synthetic users, channels, messages and emojis"""
+        with self._lock:
+            ws = self.workspace
+            user_ids = [ws.add_user(f'user{i}')['id'] for i in range(n_users)]
+            for i in range(n_channels):
+                channel = ws.add_channel(f'channel-{i}', members=[ws.bot_user_id] + user_ids)
+                for j in range(n_messages):
+                    ws.add_message(channel['id'], text=f'message {j} in channel-{i}',
+                                   user=user_ids[j % len(user_ids)] if len(user_ids) > 0 else None)
+            for i in range(n_emojis):
+                ws.emojis[f'emoji-{i}'] = f'https://emoji.slack-edge.com/{ws.team_id}/emoji-{i}.png'
+
+    def fail_next(self, method: str, error: str = 'internal_error', times: int = 1):
+        """Forces the next n calls to a method to fail. Use error='ratelimited' for a 429"""
+        with self._lock:
+            self._forced_errors.setdefault(method, []).extend([error] * times)
+
+    # Fault injection
+    # -----------------------------------------------------------------------------------------------------------------
+    def _get_fault(self, method: str) -> Optional[str]:
+        with self._lock:
+            forced = self._forced_errors.get(method)
+            if forced:
+                return forced.pop(0)
+            if self.rate_limit_rate > 0 and self._rand.random() < self.rate_limit_rate:
+                return 'ratelimited'
+            if self.error_rate > 0 and self._rand.random() < self.error_rate:
+                return 'internal_error'
+        return None
+
+    def _get_delay(self) -> float:
+        with self._lock:
+            return self.latency + (self._rand.uniform(0, self.jitter) if self.jitter > 0 else 0)
+
+    def dispatch(self, method: str, params: Dict[str, Any]) -> Tuple[int, Dict, Dict[str, str]]:
+        """Handles a single call, returning the status code, response body and any extra headers"""
+        with self._lock:
+            self.call_counts[method] = self.call_counts.get(method, 0) + 1
+        delay = self._get_delay()
+        if delay > 0:
+            time.sleep(delay)
+        handler = self._methods.get(method)
+        if handler is None:
+            return 404, {'ok': False, 'error': 'unknown_method'}, {}
+        fault = self._get_fault(method)
+        if fault == 'ratelimited':
+            return 429, {'ok': False, 'error': 'ratelimited'}, {'Retry-After': str(self.retry_after)}
+        elif fault is not None:
+            return 200, {'ok': False, 'error': fault}, {}
+        try:
+            with self._lock:
+                resp = handler(params)
+        except FakeSlackError as e:
+            return 200, {'ok': False, 'error': e.error}, {}
+        except (KeyError, ValueError) as e:
+            return 200, {'ok': False, 'error': 'invalid_arguments', 'detail': str(e)}, {}
+        return 200, {'ok': True, **resp}, {}
+
+    def _build_handler(self):
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def log_message(self, format: str, *args):
+                # Keep the load tests quiet
+                pass
+
+            def _read_params(self) -> Dict[str, Any]:
+                parsed = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length > 0 else b''
+                content_type = self.headers.get('Content-Type', '')
+                if len(body) > 0:
+                    if content_type.startswith('application/json'):
+                        params.update(json.loads(body))
+                    elif content_type.startswith('multipart/form-data'):
+                        params.update(_parse_multipart(content_type, body))
+                    elif content_type.startswith('application/x-www-form-urlencoded'):
+                        params.update({k: v[0] for k, v in parse_qs(body.decode('utf-8')).items()})
+                    else:
+                        params['_body'] = body
+                for key in ['blocks', 'attachments', 'view', 'files']:
+                    # These can come in as JSON-encoded strings
+                    if isinstance(params.get(key), str):
+                        try:
+                            params[key] = json.loads(params[key])
+                        except ValueError:
+                            pass
+                return params
+
+            def _handle(self):
+                path = urlparse(self.path).path
+                upload_match = re.match(r'^/upload/(\w+)$', path)
+                if upload_match is not None:
+                    status, resp, headers = server.receive_upload(upload_match.group(1), self._read_params())
+                else:
+                    method = path.rstrip('/').split('/')[-1]
+                    status, resp, headers = server.dispatch(method, self._read_params())
+                body = json.dumps(resp).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _handle
+            do_POST = _handle
+
+        return _Handler
+
+    # Method implementations
+    # -----------------------------------------------------------------------------------------------------------------
+    def _get_channel(self, params: Dict) -> Dict:
+        channel_id = params.get('channel') or params.get('channel_id')
+        channel = self.workspace.channels.get(channel_id)
+        if channel is None:
+            raise FakeSlackError('channel_not_found')
+        return channel
+
+    def auth_test(self, params: Dict) -> Dict:
+        ws = self.workspace
+        return {
+            'url': f'https://{ws.team}.slack.com/',
+            'team': ws.team,
+            'user': ws.users[ws.bot_user_id]['name'],
+            'team_id': ws.team_id,
+            'user_id': ws.bot_user_id,
+            'bot_id': ws.bot_id,
+        }
+
+    def chat_post_message(self, params: Dict) -> Dict:
+        channel = self._get_channel(params)
+        msg = self.workspace.add_message(channel['id'], text=params.get('text') or '',
+                                         thread_ts=params.get('thread_ts'), blocks=params.get('blocks'))
+        return {'channel': channel['id'], 'ts': msg['ts'], 'message': msg}
+
+    def chat_post_ephemeral(self, params: Dict) -> Dict:
+        self._get_channel(params)
+        if params.get('user') not in self.workspace.users.keys():
+            raise FakeSlackError('user_not_in_channel')
+        return {'message_ts': self.workspace.next_ts()}
+
+    def chat_update(self, params: Dict) -> Dict:
+        channel = self._get_channel(params)
+        msg = self.workspace.find_message(channel['id'], params.get('ts'))
+        if msg is None:
+            raise FakeSlackError('message_not_found')
+        if params.get('text') is not None:
+            msg['text'] = params['text']
+        if params.get('blocks') is not None:
+            msg['blocks'] = params['blocks']
+        return {'channel': channel['id'], 'ts': msg['ts'], 'text': msg['text']}
+
+    def chat_delete(self, params: Dict) -> Dict:
+        channel = self._get_channel(params)
+        msg = self.workspace.find_message(channel['id'], params.get('ts'))
+        if msg is None:
+            raise FakeSlackError('message_not_found')
+        self.workspace.messages[channel['id']].remove(msg)
+        return {'channel': channel['id'], 'ts': msg['ts']}
+
+    def conversations_list(self, params: Dict) -> Dict:
+        types = (params.get('types') or 'public_channel').split(',')
+        is_exclude_archived = str(params.get('exclude_archived')).lower() in ['true', '1']
+        channels = []
+        for channel in self.workspace.channels.values():
+            if channel['is_im']:
+                continue
+            if (channel['is_private'] and 'private_channel' not in types) or \
+                    (not channel['is_private'] and 'public_channel' not in types):
+                continue
+            if is_exclude_archived and channel['is_archived']:
+                continue
+            channels.append({**channel, 'num_members': len(self.workspace.members[channel['id']])})
+        page, next_cursor = _paginate(channels, params)
+        return {'channels': page, 'response_metadata': {'next_cursor': next_cursor}}
+
+    def conversations_info(self, params: Dict) -> Dict:
+        return {'channel': self._get_channel(params)}
+
+    def conversations_members(self, params: Dict) -> Dict:
+        channel = self._get_channel(params)
+        page, next_cursor = _paginate(self.workspace.members[channel['id']], params)
+        return {'members': page, 'response_metadata': {'next_cursor': next_cursor}}
+
+    def conversations_history(self, params: Dict) -> Dict:
+        channel = self._get_channel(params)
+        latest = params.get('latest')
+        is_inclusive = str(params.get('inclusive')).lower() in ['true', '1']
+        msgs = [x for x in self.workspace.messages[channel['id']]
+                if 'thread_ts' not in x.keys() or x['thread_ts'] == x['ts']]
+        if latest is not None:
+            msgs = [x for x in msgs if float(x['ts']) < float(latest) or (is_inclusive and x['ts'] == latest)]
+        # Newest first
+        page, next_cursor = _paginate(list(reversed(msgs)), params)
+        return {'messages': page, 'has_more': next_cursor != '', 'pin_count': 0,
+                'response_metadata': {'next_cursor': next_cursor}}
+
+    def conversations_replies(self, params: Dict) -> Dict:
+        channel = self._get_channel(params)
+        ts = params['ts']
+        latest = params.get('latest')
+        msgs = [x for x in self.workspace.messages[channel['id']] if x['ts'] == ts or x.get('thread_ts') == ts]
+        if latest is not None:
+            msgs = [x for x in msgs if float(x['ts']) <= float(latest)]
+        # Oldest first, parent included
+        page, next_cursor = _paginate(msgs, params)
+        return {'messages': page, 'has_more': next_cursor != '', 'response_metadata': {'next_cursor': next_cursor}}
+
+    def conversations_open(self, params: Dict) -> Dict:
+        user_ids = [x for x in (params.get('users') or '').split(',') if x != '']
+        if len(user_ids) == 0 or any([x not in self.workspace.users.keys() for x in user_ids]):
+            raise FakeSlackError('user_not_found')
+        members = sorted(set([self.workspace.bot_user_id] + user_ids))
+        for channel_id, channel in self.workspace.channels.items():
+            if channel['is_im'] and sorted(self.workspace.members[channel_id]) == members:
+                return {'channel': {'id': channel_id}}
+        channel = self.workspace.add_channel(name='-'.join(user_ids), members=members, is_im=True)
+        return {'channel': {'id': channel['id']}}
+
+    def conversations_create(self, params: Dict) -> Dict:
+        name = params['name']
+        if any([x['name'] == name for x in self.workspace.channels.values()]):
+            raise FakeSlackError('name_taken')
+        is_private = str(params.get('is_private')).lower() in ['true', '1']
+        return {'channel': self.workspace.add_channel(name=name, is_private=is_private)}
+
+    def conversations_invite(self, params: Dict) -> Dict:
+        channel = self._get_channel(params)
+        members = self.workspace.members[channel['id']]
+        for user_id in (params.get('users') or params.get('user') or '').split(','):
+            if user_id not in self.workspace.users.keys():
+                raise FakeSlackError('user_not_found')
+            if user_id not in members:
+                members.append(user_id)
+        return {'channel': channel}
+
+    def users_info(self, params: Dict) -> Dict:
+        user = self.workspace.users.get(params.get('user'))
+        if user is None:
+            raise FakeSlackError('user_not_found')
+        return {'user': user}
+
+    def users_list(self, params: Dict) -> Dict:
+        page, next_cursor = _paginate(list(self.workspace.users.values()), params)
+        return {'members': page, 'response_metadata': {'next_cursor': next_cursor}}
+
+    def emoji_list(self, params: Dict) -> Dict:
+        return {'emoji': dict(self.workspace.emojis)}
+
+    def emoji_add(self, params: Dict) -> Dict:
+        name = params['name']
+        if name in self.workspace.emojis.keys():
+            raise FakeSlackError('error_name_taken')
+        self.workspace.emojis[name] = f'https://emoji.slack-edge.com/{self.workspace.team_id}/{name}.png'
+        return {}
+
+    def emoji_admin_list(self, params: Dict) -> Dict:
+        emoji = [{'name': k, 'url': v} for k, v in self.workspace.emojis.items()]
+        page, next_cursor = _paginate(emoji, params)
+        return {'emoji': page, 'paging': {'count': len(page), 'total': len(emoji)}}
+
+    def search_messages(self, params: Dict) -> Dict:
+        terms = []
+        channel_name = None
+        for part in (params.get('query') or '').split():
+            if part.startswith('in:'):
+                channel_name = part[3:].lstrip('#')
+            elif ':' not in part:
+                terms.append(part.lower())
+        matches = []
+        for channel_id, msgs in self.workspace.messages.items():
+            channel = self.workspace.channels[channel_id]
+            if channel_name is not None and channel_name not in [channel_id, channel['name']]:
+                continue
+            for msg in msgs:
+                if all([x in msg['text'].lower() for x in terms]):
+                    matches.append({**msg, 'channel': {'id': channel_id, 'name': channel['name']}})
+        count = int(params.get('count') or 20)
+        return {'query': params.get('query'), 'messages': {'matches': matches[:count], 'total': len(matches)}}
+
+    def files_upload(self, params: Dict) -> Dict:
+        file_id = self.workspace.next_id('F')
+        content = params.get('file') or params.get('content') or b''
+        self.workspace.files[file_id] = {
+            'id': file_id,
+            'name': params.get('filename'),
+            'title': params.get('title') or params.get('filename'),
+            'size': len(content),
+            'channels': [x for x in (params.get('channels') or '').split(',') if x != ''],
+        }
+        return {'file': self.workspace.files[file_id]}
+
+    def files_get_upload_url_external(self, params: Dict) -> Dict:
+        file_id = self.workspace.next_id('F')
+        self.workspace.files[file_id] = {
+            'id': file_id,
+            'name': params['filename'],
+            'title': params['filename'],
+            'size': int(params['length']),
+            'is_complete': False,
+            'channels': [],
+        }
+        return {'upload_url': f'{self.url}/upload/{file_id}', 'file_id': file_id}
+
+    def receive_upload(self, file_id: str, params: Dict) -> Tuple[int, Dict, Dict[str, str]]:
+        with self._lock:
+            file = self.workspace.files.get(file_id)
+            if file is None:
+                return 404, {'ok': False, 'error': 'file_not_found'}, {}
+            file['is_uploaded'] = True
+        return 200, {'ok': True}, {}
+
+    def files_complete_upload_external(self, params: Dict) -> Dict:
+        files = []
+        channel_id = params.get('channel_id')
+        for file_item in params['files']:
+            file = self.workspace.files.get(file_item['id'])
+            if file is None:
+                raise FakeSlackError('file_not_found')
+            file.update({'is_complete': True, 'title': file_item.get('title') or file['title']})
+            if channel_id is not None:
+                file['channels'].append(channel_id)
+            files.append(file)
+        return {'files': files}
+
+    def files_info(self, params: Dict) -> Dict:
+        file = self.workspace.files.get(params.get('file'))
+        if file is None:
+            raise FakeSlackError('file_not_found')
+        return {'file': file}
+
+    def views_publish(self, params: Dict) -> Dict:
+        if params.get('user_id') not in self.workspace.users.keys():
+            raise FakeSlackError('user_not_found')
+        return {'view': {'id': self.workspace.next_id('V'), **(params.get('view') or {})}}
+
+    def dialog_open(self, params: Dict) -> Dict:
+        return {}
+
+
+def _parse_multipart(content_type: str, body: bytes) -> Dict[str, Any]:
+    """Parses a multipart/form-data body into a dict. File parts are kept as bytes"""
+    msg = BytesParser(policy=HTTP).parsebytes(f'Content-Type: {content_type}\r\n\r\n'.encode('utf-8') + body)
+    params = {}
+    for part in msg.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        if name is None:
+            continue
+        payload = part.get_payload(decode=True)
+        if part.get_filename() is not None:
+            params[name] = payload
+            params.setdefault('filename', part.get_filename())
+        else:
+            params[name] = payload.decode('utf-8')
+    return params
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Runs a local fake Slack Web API server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    fake_server = FakeSlackServer(host=args.host, port=args.port, latency=args.latency, jitter=args.jitter,
+                                  rate_limit_rate=args.rate_limit_rate, error_rate=args.error_rate, seed=args.seed)
+    fake_server.seed_workspace()
+    logger.info(f'Serving fake Slack Web API at {fake_server.base_url}')
+    try:
+        fake_server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        fake_server.httpd.server_close()
@@ -1,21 +1,25 @@
 import json
 import os
-
-import pandas as pd
-import pygsheets
+from typing import TYPE_CHECKING
 
 from slacktools.secretstore import SecretStore
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 class GSheetAgent:
     """A class to help with reading in Google Sheets"""
     def __init__(self, sec_store: SecretStore, sheet_key: str):
+        # Only needed once there's a sheet to read
+        import pygsheets
+
         creds = sec_store.get_key('gsheet-reader')
         os.environ['GDRIVE_API_CREDENTIALS'] = json.dumps(creds)
         self.gc = pygsheets.authorize(service_account_env_var='GDRIVE_API_CREDENTIALS')
         self.sheets = self.gc.open_by_key(sheet_key).worksheets()
 
-    def get_sheet(self, sheet_name: str) -> pd.DataFrame:
+    def get_sheet(self, sheet_name: str) -> 'pd.DataFrame':
         """Retrieves a sheet as a pandas dataframe"""
         for sheet in self.sheets:
             if sheet.title == sheet_name:
@@ -23,7 +27,7 @@ class GSheetAgent:
         raise ValueError(f'The sheet name "{sheet_name}" was not found '
                          f'in the list of available sheets: ({",".join([x.title for x in self.sheets])})')
 
-    def write_df_to_sheet(self, sheet_key: str, sheet_name: str, df: pd.DataFrame):
+    def write_df_to_sheet(self, sheet_key: str, sheet_name: str, df: 'pd.DataFrame'):
         """Write df to sheet"""
         wb = self.gc.open_by_key(sheet_key)
         sheet = wb.worksheet_by_title(sheet_name)
@@ -0,0 +1,136 @@
+"""The bot's identity (from auth.test), kept on disk so short-lived processes don't each have to ask Slack for it
+
+Entries are keyed by a hash of the bot token - the token itself is never written.
+
+Usage:
+    >>> cache = IdentityCache('~/.cache/slacktools/identity.json', ttl=86400)
+    >>> identity = cache.get(xoxb_token)
+    >>> if identity is None:
+    >>>     identity = BotIdentity.from_auth_test(bot.auth_test())
+    >>>     cache.set(xoxb_token, identity)
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+import tempfile
+import threading
+import time
+from typing import (
+    Any,
+    Dict,
+    Optional,
+)
+
+from loguru import logger
+
+DEFAULT_IDENTITY_TTL = 24 * 60 * 60
+
+
+class BotIdentity:
+    """Who the bot is in the workspace"""
+
+    def __init__(self, bot_id: str, user_id: str, team_id: str = None, cached_at: float = None):
+        self.bot_id = bot_id
+        self.user_id = user_id
+        self.team_id = team_id
+        # When it was read from Slack (epoch seconds)
+        self.cached_at = cached_at if cached_at is not None else time.time()
+
+    @classmethod
+    def from_auth_test(cls, auth_test: Any) -> 'BotIdentity':
+        return cls(bot_id=auth_test['bot_id'], user_id=auth_test['user_id'], team_id=auth_test.get('team_id'))
+
+    def asdict(self) -> Dict[str, Any]:
+        return {
+            'bot_id': self.bot_id,
+            'user_id': self.user_id,
+            'team_id': self.team_id,
+            'cached_at': self.cached_at,
+        }
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}(bot_id={self.bot_id}, user_id={self.user_id})>'
+
+
+class IdentityCache:
+    """A JSON file of token hash -> BotIdentity. It's rewritten whole (atomically) on each change,
+    so processes sharing the file never read a partial one"""
+
+    def __init__(self, path: str, ttl: float = DEFAULT_IDENTITY_TTL):
+        """
+        Args:
+            path: str, the cache file. Its directory is made if it doesn't exist
+            ttl: float, seconds after which an identity is read from Slack again
+        """
+        self.path = Path(path).expanduser()
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_token_key(token: str) -> str:
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def _read(self) -> Dict[str, Dict]:
+        try:
+            with self.path.open() as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f'Ignoring unreadable identity cache at {self.path}: {e}')
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def _write(self, entries: Dict[str, Dict]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f'.{self.path.name}.')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def is_expired(self, identity: BotIdentity) -> bool:
+        return time.time() - identity.cached_at > self.ttl
+
+    def get(self, token: str, is_allow_expired: bool = False) -> Optional[BotIdentity]:
+        """The token's identity, if it's cached & hasn't expired
+
+        Args:
+            token: str, the bot token
+            is_allow_expired: bool, if True, an expired identity is returned too (e.g., when Slack can't be reached)
+        """
+        entry = self._read().get(self.get_token_key(token))
+        if entry is None:
+            return None
+        try:
+            identity = BotIdentity(**entry)
+        except TypeError:
+            return None
+        if self.is_expired(identity) and not is_allow_expired:
+            return None
+        return identity
+
+    def set(self, token: str, identity: BotIdentity):
+        """Caches the token's identity, dropping any expired entries along the way"""
+        with self._lock:
+            entries = {k: v for k, v in self._read().items()
+                       if isinstance(v, dict) and time.time() - v.get('cached_at', 0) <= self.ttl}
+            entries[self.get_token_key(token)] = identity.asdict()
+            try:
+                self._write(entries)
+            except OSError as e:
+                # The cache only saves a round trip - not being able to write it isn't worth failing over
+                logger.warning(f'Couldn\'t write the identity cache at {self.path}: {e}')
+
+    def invalidate(self, token: str = None):
+        """Forgets the token's identity. All identities when None"""
+        with self._lock:
+            entries = {}
+            if token is not None:
+                entries = self._read()
+                entries.pop(self.get_token_key(token), None)
+            self._write(entries)
@@ -0,0 +1,310 @@
+"""In-process instrumentation for Slack Web API calls
+
+Usage:
+    >>> registry = ApiMetricsRegistry(sample_rate=0.25)
+    >>> client = instrument_web_client(WebClient(token), registry=registry, client_name='bot')
+    >>> with command_scope('^help'):
+    >>>     client.chat_postMessage(channel='C123', text='hi')
+    >>> registry.snapshot()
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+import random
+import threading
+import time
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from urllib.parse import urlparse
+
+from loguru import logger
+import requests
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web import WebClient
+
+from slacktools import codec
+
+UNMATCHED_COMMAND = 'unmatched'
+
+
+class CommandContext:
+    """Tracks the bot command currently being handled so that calls made while handling it can be
+    attributed back to it"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end = None  # type: Optional[float]
+        # Time spent on db queries while handling the command (see db_metrics.instrument_engine)
+        self.db_time = 0.0
+        self.db_queries = 0
+
+    @property
+    def elapsed(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return end - self.start
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}(name={self.name})>'
+
+
+_current_command = ContextVar('slacktools_current_command', default=None)  # type: ContextVar[Optional[CommandContext]]
+
+
+@contextmanager
+def command_scope(name: str) -> Iterator[CommandContext]:
+    """Marks calls made within this scope as being triggered by the given command.
+    The name can be changed on the yielded context once the command is known (e.g., after pattern matching)."""
+    ctx = CommandContext(name)
+    token = _current_command.set(ctx)
+    try:
+        yield ctx
+    finally:
+        ctx.end = time.perf_counter()
+        _current_command.reset(token)
+
+
+def get_current_command() -> Optional[str]:
+    """Returns the name of the command currently being handled, if any"""
+    ctx = _current_command.get()
+    return ctx.name if ctx is not None else None
+
+
+def get_current_command_context() -> Optional[CommandContext]:
+    return _current_command.get()
+
+
+class Histogram:
+    """A fixed-bucket histogram (bounds are inclusive upper bounds, in seconds for latencies)"""
+    DEFAULT_BOUNDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BOUNDS):
+        self.bounds = tuple(bounds)
+        self.buckets = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None  # type: Optional[float]
+        self.max = None  # type: Optional[float]
+
+    def observe(self, value: float):
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Approximates a percentile by the upper bound of the bucket it falls into"""
+        if self.count == 0:
+            return None
+        threshold = self.count * pct / 100
+        running = 0
+        for i, n in enumerate(self.buckets):
+            running += n
+            if running >= threshold:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    def asdict(self) -> Dict:
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count > 0 else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'buckets': {f'le_{b}': n for b, n in zip(self.bounds + ('inf', ), self.buckets)},
+        }
+
+
+class ApiMethodStats:
+    """Aggregated stats for a single client/method pair"""
+
+    def __init__(self):
+        self.calls = 0
+        self.rate_limited = 0
+        self.errors = {}  # type: Dict[str, int]
+        self.sampled = 0
+        self.latency = Histogram()
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+    def asdict(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'rate_limited': self.rate_limited,
+            'errors': dict(self.errors),
+            'sampled': self.sampled,
+            'latency': self.latency.asdict(),
+            'request_bytes': self.request_bytes,
+            'response_bytes': self.response_bytes,
+        }
+
+
+class ApiMetricsRegistry:
+    """Thread-safe registry of Web API call metrics.
+
+    Call counts, errors and rate limits are always recorded; latencies and payload sizes are recorded
+        for the sampled share of calls (sample_rate=1.0 samples everything).
+    """
+
+    def __init__(self, sample_rate: float = 1.0):
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self._methods = {}  # type: Dict[Tuple[str, str], ApiMethodStats]
+        self._commands = {}  # type: Dict[str, Dict[str, Any]]
+
+    def is_sampled(self) -> bool:
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def record_call(self, client_name: str, method: str, latency: float = None, request_bytes: int = None,
+                    response_bytes: int = None, error: str = None, is_rate_limited: bool = False,
+                    command: str = None):
+        """Records a single API call. Latency and byte counts should only be passed for sampled calls"""
+        if command is None:
+            command = get_current_command()
+        with self._lock:
+            stats = self._methods.get((client_name, method))
+            if stats is None:
+                stats = self._methods[(client_name, method)] = ApiMethodStats()
+            stats.calls += 1
+            if is_rate_limited:
+                stats.rate_limited += 1
+            if error is not None:
+                stats.errors[error] = stats.errors.get(error, 0) + 1
+            if latency is not None:
+                stats.sampled += 1
+                stats.latency.observe(latency)
+            if request_bytes is not None:
+                stats.request_bytes += request_bytes
+            if response_bytes is not None:
+                stats.response_bytes += response_bytes
+            if command is not None:
+                cmd_stats = self._get_command_stats(command)
+                cmd_stats['api_calls'][method] = cmd_stats['api_calls'].get(method, 0) + 1
+                if latency is not None:
+                    cmd_stats['api_time'] += latency
+
+    def _get_command_stats(self, command: str) -> Dict[str, Any]:
+        cmd_stats = self._commands.get(command)
+        if cmd_stats is None:
+            cmd_stats = self._commands[command] = {'calls': 0, 'total_time': 0.0, 'api_time': 0.0, 'api_calls': {},
+                                                   'db_time': 0.0, 'db_queries': 0}
+        return cmd_stats
+
+    def record_command(self, command: str, elapsed: float, db_time: float = 0.0, db_queries: int = 0):
+        """Records the wall time taken to handle a command, along with how much of it went to db queries"""
+        with self._lock:
+            cmd_stats = self._get_command_stats(command)
+            cmd_stats['calls'] += 1
+            cmd_stats['total_time'] += elapsed
+            cmd_stats['db_time'] += db_time
+            cmd_stats['db_queries'] += db_queries
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns a point-in-time copy of all collected metrics"""
+        with self._lock:
+            return {
+                'sample_rate': self.sample_rate,
+                'methods': {f'{client}:{method}': stats.asdict() for (client, method), stats in self._methods.items()},
+                'commands': {cmd: {**stats, 'api_calls': dict(stats['api_calls']),
+                                   'non_db_time': stats['total_time'] - stats['db_time']}
+                             for cmd, stats in self._commands.items()},
+            }
+
+    def reset(self):
+        with self._lock:
+            self._methods = {}
+            self._commands = {}
+
+
+def _estimate_size(obj: Any) -> int:
+    if obj is None:
+        return 0
+    if isinstance(obj, (bytes, bytearray)):
+        return len(obj)
+    if isinstance(obj, str):
+        return len(obj.encode('utf-8'))
+    try:
+        return len(codec.dumpb(obj, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def instrument_web_client(client: WebClient, registry: ApiMetricsRegistry, client_name: str) -> WebClient:
+    """Wraps the client's `api_call` (which all WebClient methods route through) to record metrics in the registry.
+    The client is modified in place and returned."""
+    if getattr(client, '_slacktools_instrumented', False) is True:
+        return client
+    wrapped_call = client.api_call
+
+    def api_call(api_method: str, **kwargs):
+        is_sampled = registry.is_sampled()
+        start = time.perf_counter()
+        error = None
+        is_rate_limited = False
+        resp = None
+        try:
+            resp = wrapped_call(api_method, **kwargs)
+            if isinstance(resp.data, dict) and not resp.data.get('ok', True):
+                # Client was configured not to raise; catch the error here
+                error = resp.data.get('error')
+            return resp
+        except SlackApiError as e:
+            resp = e.response
+            error = resp.get('error') if resp is not None else e.__class__.__name__
+            is_rate_limited = resp is not None and resp.status_code == 429
+            raise
+        except Exception as e:
+            error = e.__class__.__name__
+            raise
+        finally:
+            latency = request_bytes = response_bytes = None
+            if is_sampled:
+                latency = time.perf_counter() - start
+                request_bytes = sum(_estimate_size(kwargs.get(x)) for x in ['json', 'data', 'params'])
+                if resp is not None:
+                    response_bytes = _estimate_size(resp.data)
+            registry.record_call(client_name, api_method, latency=latency, request_bytes=request_bytes,
+                                 response_bytes=response_bytes, error=error, is_rate_limited=is_rate_limited)
+
+    client.api_call = api_call
+    client._slacktools_instrumented = True
+    return client
+
+
+def instrument_session(session: requests.Session, registry: ApiMetricsRegistry,
+                       client_name: str = 'session') -> requests.Session:
+    """Adds a response hook to a requests session (e.g., the one in SlackSession) that records metrics in the
+    registry. The method name is taken from the last part of the url path (e.g., 'emoji.add')"""
+
+    def _hook(resp: requests.Response, *args, **kwargs):
+        method = urlparse(resp.url).path.rstrip('/').split('/')[-1]
+        error = None
+        if resp.status_code >= 400:
+            error = f'http_{resp.status_code}'
+        latency = request_bytes = response_bytes = None
+        if registry.is_sampled():
+            latency = resp.elapsed.total_seconds()
+            request_bytes = _estimate_size(resp.request.body) if resp.request is not None else None
+            response_bytes = len(resp.content)
+            if error is None and 'json' in resp.headers.get('content-type', ''):
+                try:
+                    resp_json = resp.json()
+                    if isinstance(resp_json, dict) and not resp_json.get('ok', True):
+                        error = resp_json.get('error')
+                except ValueError:
+                    logger.debug(f'Unable to decode JSON response from {method} for metrics.')
+        registry.record_call(client_name, method, latency=latency, request_bytes=request_bytes,
+                             response_bytes=response_bytes, error=error, is_rate_limited=resp.status_code == 429)
+        return resp
+
+    session.hooks['response'].append(_hook)
+    return session
@@ -0,0 +1,233 @@
+"""Server-side typeahead for external select menus
+
+Slack sends a `block_suggestion` payload as the user types in an external select and expects the options back
+    within 3 seconds. Option sources are loaded once into an `OptionIndex` (refreshed in the background once
+    they're older than their ttl), so answering a suggestion is an index lookup rather than a reload.
+
+Example:
+    >>> bot.register_option_source('emoji-select', lambda: [(f':{x}: {x}', x) for x in bot.get_emojis()])
+    >>> # In the endpoint receiving interactive payloads of type 'block_suggestion'
+    >>> return bot.handle_block_suggestion(payload)
+"""
+from bisect import bisect_left
+from collections import OrderedDict
+import re
+import threading
+import time
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from loguru import logger
+
+from slacktools.block_kit.elements.input.select import OptionObject
+from slacktools.block_kit.limits import TEXT_OBJECT_LIMITS
+
+OptionPairType = Tuple[str, str]  # (text, value)
+OptionsInputType = Iterable[Union[OptionPairType, OptionObject]]
+
+# Slack won't show more than this many options in a menu
+MAX_SUGGESTED_OPTIONS = 100
+# Slack gives up on a suggestion request after 3 seconds - leave some room for the response itself
+SUGGESTION_DEADLINE_S = 2.5
+
+_TOKEN_SPLIT = re.compile(r'[^\w]+')
+
+
+def _normalize(text: str) -> str:
+    return text.casefold().strip()
+
+
+def _trigrams(text: str) -> List[str]:
+    return [text[i:i + 3] for i in range(len(text) - 2)]
+
+
+class OptionIndex:
+    """Immutable index of (text, value) options for prefix & substring lookup
+
+    Matches are ranked by how the query matched, then by the order the options were given in:
+        1. the start of the option text
+        2. the start of any word in the text
+        3. anywhere in the text (found through a trigram index, for queries of 3+ characters)
+    """
+
+    def __init__(self, options: OptionsInputType, query_cache_size: int = 256):
+        self.texts = []  # type: List[str]
+        self.values = []  # type: List[str]
+        for opt in options:
+            if isinstance(opt, OptionObject):
+                opt = (opt.text.text, opt.value)
+            text, value = opt
+            self.texts.append(str(text))
+            self.values.append(str(value))
+        self._normalized = [_normalize(x) for x in self.texts]
+
+        # Sorted (key, option id) pairs for prefix lookup. Keys are the full text and each word in it
+        prefix_pairs = []
+        trigrams = {}  # type: Dict[str, List[int]]
+        for i, text in enumerate(self._normalized):
+            prefix_pairs.append((text, i))
+            prefix_pairs += [(x, i) for x in _TOKEN_SPLIT.split(text)[1:] if x != '']
+            for gram in dict.fromkeys(_trigrams(text)):
+                trigrams.setdefault(gram, []).append(i)
+        prefix_pairs.sort()
+        self._prefix_keys = [x for x, _ in prefix_pairs]
+        self._prefix_ids = [x for _, x in prefix_pairs]
+        self._trigrams = trigrams
+
+        self._query_cache_size = query_cache_size
+        self._query_cache = OrderedDict()  # type: OrderedDict[Tuple[str, int], List[int]]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def _prefix_matches(self, query: str) -> Tuple[List[int], List[int]]:
+        """Ids of options whose full text starts with the query, then those with a word that does"""
+        full, word = [], []
+        keys = self._prefix_keys
+        i = bisect_left(keys, query)
+        while i < len(keys) and keys[i].startswith(query):
+            option_id = self._prefix_ids[i]
+            (full if self._normalized[option_id].startswith(query) else word).append(option_id)
+            i += 1
+        return sorted(set(full)), sorted(set(word))
+
+    def _substring_matches(self, query: str) -> List[int]:
+        if len(query) < 3:
+            return []
+        postings = [self._trigrams.get(x, []) for x in _trigrams(query)]
+        # Only the options holding the rarest trigram need checking
+        candidates = min(postings, key=len)
+        return [i for i in candidates if query in self._normalized[i]]
+
+    def search_ids(self, query: str, limit: int = MAX_SUGGESTED_OPTIONS) -> List[int]:
+        query = _normalize(query)
+        if query == '':
+            return list(range(min(limit, len(self.texts))))
+        cache_key = (query, limit)
+        with self._lock:
+            ids = self._query_cache.get(cache_key)
+            if ids is not None:
+                self._query_cache.move_to_end(cache_key)
+                return ids
+
+        full, word = self._prefix_matches(query)
+        ids = list(dict.fromkeys(full + word))
+        if len(ids) < limit:
+            ids = list(dict.fromkeys(ids + self._substring_matches(query)))
+        ids = ids[:limit]
+
+        with self._lock:
+            self._query_cache[cache_key] = ids
+            while len(self._query_cache) > self._query_cache_size:
+                self._query_cache.popitem(last=False)
+        return ids
+
+    def search(self, query: str, limit: int = MAX_SUGGESTED_OPTIONS) -> List[OptionPairType]:
+        """Finds the options matching the query, best matches first"""
+        return [(self.texts[i], self.values[i]) for i in self.search_ids(query, limit=limit)]
+
+    def build_options(self, query: str, limit: int = MAX_SUGGESTED_OPTIONS) -> List[Dict]:
+        """Builds the matching options as Slack expects them in a block_suggestion response.
+        Texts are cut down to Slack's limit (values aren't, as they have to come back unchanged)"""
+        max_text = TEXT_OBJECT_LIMITS[('option', 'text')]
+        return [
+            {'text': {'type': 'plain_text', 'text': self.texts[i][:max_text]}, 'value': self.values[i]}
+            for i in self.search_ids(query, limit=limit)
+        ]
+
+
+class OptionSource:
+    """Options for one menu, loaded into an OptionIndex and kept for `ttl` seconds.
+
+    Once the index is older than the ttl, the next lookup triggers a reload in the background and is answered
+        with the current index in the meantime, so the loader's latency never counts against Slack's deadline
+        (apart from the very first load, if it wasn't preloaded).
+    After a failed load, lookups are answered right away with what's there (possibly nothing) until
+        `retry_after` seconds have passed, rather than each one waiting on & triggering another reload.
+    """
+
+    def __init__(self, loader: Union[Callable[[], OptionsInputType], OptionsInputType], ttl: Optional[float] = 300,
+                 retry_after: float = 30):
+        """
+        Args:
+            loader: the options, or a callable returning them (e.g., to read them from the API or a db)
+            ttl: float, seconds before the options are reloaded. None to never reload.
+                Options given directly (not as a callable) are never reloaded
+            retry_after: float, seconds to wait after a failed load before trying again
+        """
+        if callable(loader):
+            self._loader = loader
+        else:
+            options = list(loader)
+            self._loader = lambda: options
+            ttl = None
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self._index = None  # type: Optional[OptionIndex]
+        self._loaded_at = 0.0
+        self._failed_at = None  # type: Optional[float]
+        self._lock = threading.Lock()
+        self._is_refreshing = False
+        # Set once a load attempt is done, whether it worked or not
+        self._is_load_done = threading.Event()
+
+    @property
+    def is_stale(self) -> bool:
+        return self.ttl is not None and time.monotonic() - self._loaded_at > self.ttl
+
+    @property
+    def is_backing_off(self) -> bool:
+        """Whether the last load failed and it's not yet time to try again"""
+        failed_at = self._failed_at
+        return failed_at is not None and time.monotonic() - failed_at < self.retry_after
+
+    def refresh(self):
+        """Reloads the options and swaps in the new index"""
+        try:
+            index = OptionIndex(self._loader())
+            with self._lock:
+                self._index = index
+                self._loaded_at = time.monotonic()
+                self._failed_at = None
+        except Exception as err:
+            logger.error(f'Failed to load options (retrying in {self.retry_after}s): {err}')
+            with self._lock:
+                self._failed_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._is_refreshing = False
+            self._is_load_done.set()
+
+    def refresh_in_background(self):
+        with self._lock:
+            if self._is_refreshing:
+                return
+            self._is_refreshing = True
+            if self._index is None:
+                # Lookups wait on this attempt, not on one that already failed
+                self._is_load_done.clear()
+        threading.Thread(target=self.refresh, name='option-source-refresh', daemon=True).start()
+
+    def get_index(self, timeout: Optional[float] = SUGGESTION_DEADLINE_S) -> Optional[OptionIndex]:
+        """Returns the current index, kicking off a reload when it's stale.
+        Waits up to timeout seconds for the first load, returning None if it's still not done.
+        While backing off from a failed load, returns right away without reloading"""
+        if self.is_backing_off:
+            return self._index
+        if self._index is None or self.is_stale:
+            self.refresh_in_background()
+        if self._index is None:
+            self._is_load_done.wait(timeout=timeout)
+        return self._index
+
+    def __repr__(self) -> str:
+        n_options = len(self._index) if self._index is not None else None
+        return f'<{self.__class__.__name__}(options={n_options}, ttl={self.ttl})>'
@@ -1,10 +1,54 @@
+import copy
+import hashlib
 import json
 from pathlib import Path
+import threading
 from types import SimpleNamespace
-from typing import Dict
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    Optional,
+    Tuple,
+)
 
-from pykeepass import PyKeePass
-from pykeepass.entry import Entry
+from slacktools.startup_profiler import (
+    startup_phase,
+    timed_startup_phase,
+)
+
+if TYPE_CHECKING:
+    from pykeepass import PyKeePass
+    from pykeepass.entry import Entry
+
+DatabaseKeyType = Tuple[str, int, str]  # (path, mtime_ns, password hash)
+
+
+class _OpenDatabase:
+    """An opened database, along with the keys already read from it"""
+
+    def __init__(self, db: 'PyKeePass'):
+        self.db = db
+        self.keys = {}  # type: Dict[str, Dict]
+        self.lock = threading.Lock()
+
+
+# Opening a database runs its key derivation, which is slow on purpose (~1s). They're opened once per process
+#   and file version, then shared by every SecretStore reading the same file with the same password
+_DATABASES = {}  # type: Dict[DatabaseKeyType, _OpenDatabase]
+_DATABASES_LOCK = threading.Lock()
+
+
+def _get_database_key(path: Path, password: str) -> DatabaseKeyType:
+    # Only the hash of the password is kept around in the key
+    password_hash = hashlib.sha256((password or '').encode('utf-8')).hexdigest()
+    return str(path.resolve()), path.stat().st_mtime_ns, password_hash
+
+
+def clear_database_cache():
+    """Drops every opened database (and the keys read from them) from the process-wide cache"""
+    with _DATABASES_LOCK:
+        _DATABASES.clear()
 
 
 class SecretStore:
@@ -12,24 +56,68 @@ class SecretStore:
     DEFAULT_FILE_NAME = 'secretprops.kdbx'
     DEFAULT_PASSWORD_FILE = 'SECRETPROP'
 
+    @timed_startup_phase('SecretStore.__init__')
     def __init__(self, fname: str = DEFAULT_FILE_NAME, password: str = None,
                  password_fname: str = DEFAULT_PASSWORD_FILE):
         self.db = None
+        self._open_db = None  # type: Optional[_OpenDatabase]
+        self._db_key = None  # type: Optional[DatabaseKeyType]
+        self.fname = fname
 
         if password_fname is not None and password is None:
             with open(self.KEY_DIR.joinpath(password_fname)) as f:
                 password = f.read().strip()
+        self._password = password
         # Read in the database
         self.load_database(fname, password)
 
     def load_database(self, fname: str, password: str):
-        self.db = PyKeePass(self.KEY_DIR.joinpath(fname), password=password)
+        """Opens the database - or reuses it, if it's already been opened in this process and
+        the file hasn't changed since"""
+        with startup_phase('import pykeepass'):
+            from pykeepass import PyKeePass
+
+        path = self.KEY_DIR.joinpath(fname)
+        db_key = _get_database_key(path, password)
+        with _DATABASES_LOCK:
+            open_db = _DATABASES.get(db_key)
+            if open_db is None:
+                # Where the key derivation happens
+                with startup_phase('SecretStore.open_database'):
+                    open_db = _DATABASES[db_key] = _OpenDatabase(PyKeePass(path, password=password))
+                # Older versions of the file won't be asked for again
+                for old_key in [x for x in _DATABASES.keys() if x[0] == db_key[0] and x != db_key]:
+                    del _DATABASES[old_key]
+        self.fname = fname
+        self._password = password
+        self._db_key = db_key
+        self._open_db = open_db
+        self.db = open_db.db
+
+    def invalidate(self, key_name: str = None, is_reload: bool = False):
+        """Forgets keys that have already been read, so they're read from the database again
+
+        Args:
+            key_name: str, the key to forget. All keys when None
+            is_reload: bool, if True, the database is opened again from the file (e.g., after it was changed),
+                rather than reused
+        """
+        if is_reload:
+            with _DATABASES_LOCK:
+                _DATABASES.pop(self._db_key, None)
+            self.load_database(self.fname, self._password)
+            return
+        with self._open_db.lock:
+            if key_name is None:
+                self._open_db.keys.clear()
+            else:
+                self._open_db.keys.pop(key_name, None)
 
-    def get_entry(self, entry_name: str) -> Entry:
+    def get_entry(self, entry_name: str) -> 'Entry':
         return self.db.find_entries(title=entry_name, first=True)
 
-    def get_key(self, key_name: str) -> Dict:
-        entry = self.get_entry(key_name)
+    @staticmethod
+    def _entry_to_dict(entry: Optional['Entry']) -> Dict:
         if entry is None:
             return {}
         if any([x is not None for x in [entry.username, entry.password]]):
@@ -52,6 +140,31 @@ class SecretStore:
         resp.update(entry.custom_properties)
         return resp
 
+    def get_key(self, key_name: str) -> Dict:
+        """Reads the entry's username/password, attachments & custom properties into a dict.
+        Entries are only read once (see `invalidate`) - each call gets its own copy"""
+        with self._open_db.lock:
+            resp = self._open_db.keys.get(key_name)
+            if resp is None:
+                resp = self._open_db.keys[key_name] = self._entry_to_dict(self.get_entry(key_name))
+        return copy.deepcopy(resp)
+
+    def get_keys(self, key_names: Iterable[str]) -> Dict[str, Dict]:
+        """Like get_key for each of the key names, but any that haven't been read yet are found
+        in a single pass over the database's entries"""
+        key_names = list(dict.fromkeys(key_names))
+        with self._open_db.lock:
+            missing = {x for x in key_names if x not in self._open_db.keys}
+            if len(missing) > 0:
+                entries = {}  # type: Dict[str, 'Entry']
+                for entry in self.db.entries:
+                    # Same as find_entries(first=True) - the first entry with the title wins
+                    if entry.title in missing and entry.title not in entries:
+                        entries[entry.title] = entry
+                for name in missing:
+                    self._open_db.keys[name] = self._entry_to_dict(entries.get(name))
+            return {x: copy.deepcopy(self._open_db.keys[x]) for x in key_names}
+
     def get_key_and_make_ns(self, entry: str) -> SimpleNamespace:
         entry_dict = self.get_key(entry)
         processed_dict = {}
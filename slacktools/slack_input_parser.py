@@ -1,12 +1,27 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import re
+import threading
 from typing import (
+    Any,
+    Callable,
     Dict,
+    Hashable,
     List,
     Optional,
     Tuple,
     Union,
 )
 
+from slacktools import codec
+from slacktools.api.base import BaseApiObject
+from slacktools.block_kit.base import (
+    BaseElement,
+    encode_blocks,
+)
+
+_MISSING = object()
+
 
 def nested_dict_field_extractor_replacer(d: Dict, num: int = 0, placeholders: Dict[str, str] = None,
                                          extract: bool = True) -> Tuple[Dict, Dict, int]:
@@ -46,36 +61,155 @@ def nested_dict_field_extractor_replacer(d: Dict, num: int = 0, placeholders: Di
     return placeholders, d, num
 
 
-def block_text_converter(blocks: List[Dict], callable_list: List) -> List[Dict]:
+class TextMemo:
+    """Thread-safe LRU memo of text conversions, shared across the `block_text_converter` calls it's passed to
+
+    Keys are (callable, extra args, text), so the same text converted by different callables
+        (or with different arguments) is kept apart.
     """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._cache = OrderedDict()  # type: OrderedDict[Hashable, Any]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value = self._cache[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+TEXT_MEMO = TextMemo()
+
+
+def collect_text_refs(node: Any, refs: List[Tuple[Dict, str]] = None) -> List[Tuple[Dict, str]]:
+    """Walks a block tree once, collecting (containing dict, key) for every string `text` field"""
+    if refs is None:
+        refs = []
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            for k, v in item.items():
+                if isinstance(v, (dict, list)):
+                    stack.append(v)
+                elif k == 'text' and isinstance(v, str):
+                    refs.append((item, k))
+        elif isinstance(item, list):
+            stack.extend(x for x in item if isinstance(x, (dict, list)))
+    return refs
+
+
+def _to_mutable_block(block: Any) -> Any:
+    if isinstance(block, BaseElement):
+        # Rendered fresh through the encoder, as asdict on frozen elements hands back shared dicts
+        return codec.loads(encode_blocks(block))
+    if isinstance(block, BaseApiObject):
+        return block.asdict()
+    return block
+
+
+def block_text_converter(blocks: List[Dict], callable_list: List = None, n_workers: int = 1,
+                         batch_callable: Callable[[List[str]], List[str]] = None,
+                         memo: Optional[TextMemo] = None) -> List[Dict]:
+    """Converts the text of every `text` field in the blocks, in place
+
     Process:
-        1. Iterates through a block, grabs text from target fields, replaces it with 'placeholder_x',
-            where x is the nth replacement
-        2. Take the dictionary of text with placeholders, applies a function to every text to
-            process it in to something else, then replacing the text in that dictionary with the modified text
-        3. Takes the dictionary with the replaced text and applies it back into the block
-    """
-    translations_dict = {}
-    for block in blocks:
-        txt_dict, block_dict, n = nested_dict_field_extractor_replacer(block)
-        if len(txt_dict) > 0:
-            for k, v in txt_dict.items():
-                if 'text' in callable_list:
-                    # Duplicate the list to avoid the original being overwritten
-                    clist = callable_list.copy()
-                    # Swap this string out for the actual text
-                    txt_pos = clist.index('text')
-                    clist[txt_pos] = v
-                    translations_dict[k] = clist[0](*clist[1:])
-                else:
-                    translations_dict[k] = callable_list[0](*callable_list[1:])
+        1. Walks the blocks once, collecting references to the text fields
+        2. Converts each unique text once, skipping those already in the memo
+        3. Writes the converted text back through the references
 
-    # Replace blocks with translations
+    Args:
+        blocks: list of block dicts (elements & api objects are rendered to dicts in the list)
+        callable_list: list, the callable followed by its arguments, with 'text' standing in for the text
+            to convert (e.g., [translate, 'text', 'en']). Without 'text', the callable is called once
+            per field and never memoized (e.g., for random replacements)
+        n_workers: int, converts unique texts through a thread pool of this size when > 1 - handy for
+            I/O bound callables
+        batch_callable: takes the list of unique texts to convert and returns them converted, in the
+            same order. Used instead of callable_list when provided
+        memo: TextMemo, where conversions are remembered across calls (e.g., the shared TEXT_MEMO).
+            Nothing's remembered when None. Only pass a memo with callables that always give the same output
+            for the same text - a random one's first output would be reused from then on
+    """
+    refs = []  # type: List[Tuple[Dict, str]]
     for i, block in enumerate(blocks):
-        txt_dict, block_dict, n = nested_dict_field_extractor_replacer(block, placeholders=translations_dict,
-                                                                       extract=False)
-        blocks[i] = block_dict
+        blocks[i] = block = _to_mutable_block(block)
+        collect_text_refs(block, refs)
+    if len(refs) == 0:
+        return blocks
+
+    if batch_callable is None and 'text' not in callable_list:
+        # Not a conversion of the text, so each field gets its own call
+        func, args = callable_list[0], callable_list[1:]
+        for d, k in refs:
+            d[k] = func(*args)
+        return blocks
+
+    if batch_callable is not None:
+        memo_ns = (batch_callable, )
+    else:
+        func, args = callable_list[0], callable_list[1:]
+        txt_pos = args.index('text')
+        memo_ns = (func, *args)
+        try:
+            hash(memo_ns)
+        except TypeError:
+            # Unhashable arguments - can't be keyed in the memo
+            memo = None
+
+    # Unique texts, in order of appearance
+    converted = dict.fromkeys(d[k] for d, k in refs)
+    missing = []
+    for text in converted.keys():
+        value = memo.get((memo_ns, text), _MISSING) if memo is not None else _MISSING
+        if value is _MISSING:
+            missing.append(text)
+        else:
+            converted[text] = value
+
+    if len(missing) > 0:
+        if batch_callable is not None:
+            results = batch_callable(missing)
+        else:
+            def _convert(txt: str) -> Any:
+                return func(*args[:txt_pos], txt, *args[txt_pos + 1:])
+
+            if n_workers > 1 and len(missing) > 1:
+                with ThreadPoolExecutor(max_workers=min(n_workers, len(missing))) as executor:
+                    results = list(executor.map(_convert, missing))
+            else:
+                results = [_convert(x) for x in missing]
+        for text, result in zip(missing, results):
+            converted[text] = result
+            if memo is not None:
+                memo.set((memo_ns, text), result)
 
+    for d, k in refs:
+        d[k] = converted[d[k]]
     return blocks
 
 
@@ -1,11 +1,19 @@
 from asyncio import Future
+from concurrent.futures import Future as ConcurrentFuture
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    wait,
+)
+import contextvars
 from datetime import (
     datetime,
     timedelta,
 )
 from io import BytesIO
+import threading
 import time
 from typing import (
+    Callable,
     Dict,
     List,
     Optional,
@@ -20,8 +28,8 @@ from slack_sdk.web import WebClient
 from slack_sdk.web.slack_response import SlackResponse
 
 from slacktools.api.web.conversations import (
+    ChannelInfo,
     ConversationHistory,
-    ConversationMembers,
     ConversationReply,
     Message,
     ThreadMessage,
@@ -30,13 +38,56 @@ from slacktools.api.web.users import UserInfo
 from slacktools.block_kit.base import (
     BaseElement,
     BlocksType,
+    ExceededMaxLengthException,
+    encode_blocks,
+)
+from slacktools.block_kit.limits import MAX_BLOCKS_VIEW
+from slacktools.block_kit.planner import (
+    SPLIT_MODES,
+    SPLIT_SEQUENTIAL,
+    SPLIT_THREAD,
+    MessagePlan,
+    plan_message,
+)
+from slacktools.block_kit.validator import validate_before_send
+from slacktools.channel_directory import ChannelDirectory
+from slacktools.identity_cache import (
+    DEFAULT_IDENTITY_TTL,
+    BotIdentity,
+    IdentityCache,
+)
+from slacktools.metrics import (
+    ApiMetricsRegistry,
+    instrument_web_client,
 )
 from slacktools.slack_session import SlackSession
+from slacktools.startup_profiler import (
+    startup_phase,
+    timed_startup_phase,
+)
 
 
 class SlackMethods:
 
-    def __init__(self, props: Dict, main_channel: str, is_use_session: bool = False):
+    @timed_startup_phase('SlackMethods.__init__')
+    def __init__(self, props: Dict, main_channel: str, is_use_session: bool = False,
+                 api_metrics: ApiMetricsRegistry = None, base_url: str = None, bot_id: str = None,
+                 user_id: str = None, identity_cache_path: str = None,
+                 identity_cache_ttl: float = DEFAULT_IDENTITY_TTL):
+        """
+        Args:
+            props: dict, contains tokens & other secrets for connecting & interacting with Slack
+            main_channel: str, the channel to send messages by default
+            is_use_session: bool, if True, will set up a session, namely for doing things like uploading emojis
+            api_metrics: ApiMetricsRegistry, where to record Web API call metrics. A new one is made if not provided
+            base_url: str, overrides the Web API url (e.g., 'http://localhost:8089/api/' to point at a
+                FakeSlackServer)
+            bot_id: str, the bot's id. Along with user_id, skips looking up the bot's identity
+            user_id: str, the bot's user id
+            identity_cache_path: str, a file to keep the bot's identity in (see IdentityCache), so other
+                processes using the same token don't have to look it up. Not cached when None
+            identity_cache_ttl: float, seconds a cached identity is used for
+        """
         # Get team name
         self.team = props['team']
         self.main_channel = main_channel
@@ -44,12 +95,28 @@ class SlackMethods:
         self.xoxp_token = props['xoxp-token']
         self.xoxb_token = props['xoxb-token']
         logger.debug('Spinning up user and bot methods...')
-        self.user = WebClient(self.xoxp_token)
-        self.bot = WebClient(self.xoxb_token)
-        logger.debug('Retrieving bot id with an authentication test...')
-        auth_test = self.bot.auth_test()
-        self.bot_id = auth_test['bot_id']
-        self.user_id = auth_test['user_id']
+        self.base_url = base_url
+        client_kwargs = {} if base_url is None else {'base_url': base_url}
+        with startup_phase('SlackMethods.clients'):
+            self.user = WebClient(self.xoxp_token, **client_kwargs)
+            self.bot = WebClient(self.xoxb_token, **client_kwargs)
+            # Record call counts, latencies, payload sizes and errors for every Web API call made by either client
+            self.api_metrics = api_metrics if api_metrics is not None else ApiMetricsRegistry()
+            instrument_web_client(self.user, registry=self.api_metrics, client_name='user')
+            instrument_web_client(self.bot, registry=self.api_metrics, client_name='bot')
+        # The bot's identity is looked up (auth.test) on first use of bot_id/user_id, unless it's given
+        self._identity = None  # type: Optional[BotIdentity]
+        if bot_id is not None and user_id is not None:
+            self._identity = BotIdentity(bot_id=bot_id, user_id=user_id)
+        self.identity_cache = IdentityCache(identity_cache_path, ttl=identity_cache_ttl) \
+            if identity_cache_path is not None else None  # type: Optional[IdentityCache]
+        self._identity_lock = threading.Lock()
+        # Channels are loaded on first lookup, then kept current through channel & member events
+        self.channels = ChannelDirectory(self.bot)
+        # Makes the sends queued in the background (e.g., follow-up parts of split messages).
+        #   A single worker keeps them in order
+        self._split_executor = None  # type: Optional[ThreadPoolExecutor]
+        self._pending_sends = []  # type: List[ConcurrentFuture]
 
         self.session = self.d_cookie = self.xoxc_token = None
         if is_use_session:
@@ -57,11 +124,57 @@ class SlackMethods:
             if all([x in props.keys() for x in ['d-cookie', 'xoxc-token']]):
                 self.d_cookie = props['d-cookie']
                 self.xoxc_token = props['xoxc-token']
-                self.session = SlackSession(self.team, d_cookie=self.d_cookie, xoxc_token=self.xoxc_token)
+                # The session works off the workspace url, which sits above the api path
+                session_url = base_url.rstrip('/').removesuffix('/api') if base_url is not None else None
+                with startup_phase('SlackMethods.session'):
+                    self.session = SlackSession(self.team, d_cookie=self.d_cookie, xoxc_token=self.xoxc_token,
+                                                api_metrics=self.api_metrics, base_url=session_url)
             else:
                 logger.warning('Session was prevented from instantiating - either d_cookie or xoxc_token '
                                'attributes weren\'t found in the cred entry.')
 
+    @property
+    def identity(self) -> BotIdentity:
+        """The bot's identity - from the cache if it's there, otherwise from an authentication test"""
+        if self._identity is None:
+            with self._identity_lock:
+                if self._identity is None:
+                    self._identity = self._resolve_identity()
+        return self._identity
+
+    @property
+    def bot_id(self) -> str:
+        return self.identity.bot_id
+
+    @property
+    def user_id(self) -> str:
+        return self.identity.user_id
+
+    @property
+    def is_identity_resolved(self) -> bool:
+        return self._identity is not None
+
+    def _resolve_identity(self) -> BotIdentity:
+        if self.identity_cache is not None:
+            identity = self.identity_cache.get(self.xoxb_token)
+            if identity is not None:
+                return identity
+        logger.debug('Retrieving bot id with an authentication test...')
+        try:
+            with startup_phase('SlackMethods.auth_test'):
+                identity = BotIdentity.from_auth_test(self.bot.auth_test())
+        except Exception as e:
+            # An identity doesn't change, so one that's out of date is still better than none
+            stale = self.identity_cache.get(self.xoxb_token, is_allow_expired=True) \
+                if self.identity_cache is not None else None
+            if stale is None:
+                raise
+            logger.warning(f'Authentication test failed ({e}) - using the expired cached identity')
+            return stale
+        if self.identity_cache is not None:
+            self.identity_cache.set(self.xoxb_token, identity)
+        return identity
+
     @staticmethod
     def _check_for_exception(response: Union[Future, SlackResponse], is_raise: bool = False):
         """Checks API response for exception info.
@@ -87,16 +200,26 @@ class SlackMethods:
             humans_only: bool, if True, will only return non-bots in the channel
         """
         logger.debug(f'Getting channel members for channel {channel}.')
-        resp = self.bot.conversations_members(channel=channel)
-        channel_members = ConversationMembers(resp.data)
-
-        user_ids = channel_members.members
+        user_ids = sorted(self.channels.get_members(channel))
         users = []
         for user in self.get_users_info(user_ids):
             users.append(user)
 
         return [user for user in users if not user.is_bot] if humans_only else users
 
+    def get_channel_id(self, channel_name: str) -> Optional[str]:
+        """Resolves a channel name (e.g., '#general' or 'general') to its id through the channel directory"""
+        return self.channels.get_channel_id(channel_name)
+
+    def get_channel_info(self, channel_id: str) -> Optional[ChannelInfo]:
+        """Retrieves a channel's info through the channel directory"""
+        return self.channels.get_channel(channel_id)
+
+    def handle_channel_event(self, event_dict: Dict) -> bool:
+        """Feeds a channel or member event (e.g., channel_rename, member_joined_channel) to the channel directory
+        to keep it current. Returns True if the event was consumed."""
+        return self.channels.handle_event(event_dict)
+
     def get_users_info(self, user_id_list: List[str], throw_exception: bool = True) -> List[UserInfo]:
         """Collects info from a list of user ids"""
         logger.debug('Collecting users\' info.')
@@ -126,20 +249,28 @@ class SlackMethods:
         # Check response for exception
         self._check_for_exception(resp, is_raise=True)
 
-    def update_home_tab(self, user_id: str, blocks: List[Dict]):
+    def update_home_tab(self, user_id: str, blocks: BlocksType):
         """Updates the app's home tab with info"""
+        plan = plan_message(blocks, max_blocks=MAX_BLOCKS_VIEW)
+        validate_before_send([x for part in plan.parts for x in part], max_blocks=MAX_BLOCKS_VIEW)
+        if plan.is_split:
+            # Views can't be spread over multiple posts
+            raise ExceededMaxLengthException(f'Home tab exceeded the max blocks allowed: '
+                                             f'{plan.n_blocks} / {MAX_BLOCKS_VIEW}')
+        # views.publish takes a JSON body with the view in it - a pre-encoded view would only be encoded again
         self.bot.views_publish(user_id=user_id, view={
             'type': 'home',
-            'blocks': blocks
+            'blocks': plan.parts[0] if plan.n_parts > 0 else []
         })
 
     def private_channel_message(self, user_id: str, channel: str, message: str, ret_ts: bool = False,
-                                blocks: BlocksType = None, **kwargs) -> Optional[str]:
+                                blocks: Union[BlocksType, str] = None, **kwargs) -> Optional[str]:
         """Send a message to a user on the channel"""
         logger.debug(f'Sending private channel message: {channel} to {user_id}.')
 
         if blocks is not None:
-            blocks = self._dictify_blocks(blocks)
+            validate_before_send(blocks)
+            blocks = self._encode_blocks(blocks)
 
         resp = self.bot.chat_postEphemeral(channel=channel, user=user_id, text=message, blocks=blocks, **kwargs)
         # Check response for exception
@@ -148,8 +279,8 @@ class SlackMethods:
             # Return the timestamp from the message
             return resp['message_ts']
 
-    def private_message(self, user_id: str, message: str, ret_ts: bool = False, blocks: BlocksType = None,
-                        **kwargs) -> Optional[Tuple[str, str]]:
+    def private_message(self, user_id: str, message: str, ret_ts: bool = False,
+                        blocks: Union[BlocksType, str] = None, **kwargs) -> Optional[Tuple[str, str]]:
         """Send private message to user"""
         logger.debug(f'Sending private message to {user_id}.')
         # Grab the DM "channel" associated with the user
@@ -158,9 +289,6 @@ class SlackMethods:
         # Check response for exception
         self._check_for_exception(resp, is_raise=True)
 
-        if blocks is not None:
-            blocks = self._dictify_blocks(blocks)
-
         # DM the user
         ts = self.send_message(channel=dm_chan, message=message, ret_ts=ret_ts, blocks=blocks, **kwargs)
         if ret_ts:
@@ -177,26 +305,125 @@ class SlackMethods:
                 new_blocks.append(block)
         return new_blocks
 
+    @staticmethod
+    def _encode_blocks(blocks: Union[BlocksType, str]) -> str:
+        """Encodes blocks to a JSON string with the library's codec, without building the intermediate dicts.
+        The SDK still JSON-encodes its request body, but the blocks are then a single string to it,
+        which is cheaper to encode than the nested dicts"""
+        if isinstance(blocks, str):
+            return blocks
+        return encode_blocks(blocks).decode('utf-8')
+
     def send_message(self, channel: str, message: str = 'boop', ret_ts: bool = False, ret_all: bool = False,
-                     blocks: BlocksType = None, **kwargs) -> Optional[Union[str, SlackResponse]]:
-        """Sends a message to the specific channel"""
+                     blocks: Union[BlocksType, str] = None, split_mode: str = SPLIT_SEQUENTIAL,
+                     is_background_split: bool = True, **kwargs) -> Optional[Union[str, SlackResponse]]:
+        """Sends a message to the specific channel
+
+        Blocks that exceed Slack's per-message limits are split into multiple messages (see `plan_message`).
+            The first part is posted right away; the rest follow in order, either as separate messages
+            or as replies in the first part's thread. When splitting, ret_ts/ret_all refer to the first part.
+
+        Args:
+            split_mode: str, how the parts after the first are posted. One of SPLIT_MODES
+            is_background_split: bool, if True, the parts after the first are posted from a background thread,
+                so this returns once the first part is up. See `wait_for_pending_sends`
+        """
         logger.debug(f'Sending channel message in {channel}.')
-        if blocks is not None:
-            blocks = self._dictify_blocks(blocks)
+        if blocks is not None and not isinstance(blocks, str):
+            plan = plan_message(blocks)
+            # The block count is already taken care of by the split
+            validate_before_send([x for part in plan.parts for x in part], max_blocks=None)
+            if plan.is_split:
+                resp = self._send_plan(channel, message=message, plan=plan, split_mode=split_mode,
+                                       is_background=is_background_split, **kwargs)
+                return self._get_send_result(resp, ret_ts=ret_ts, ret_all=ret_all)
+            blocks = plan.parts[0] if plan.n_parts > 0 else []
+
+        resp = self._post_message(channel, message=message, blocks=blocks, **kwargs)
+        return self._get_send_result(resp, ret_ts=ret_ts, ret_all=ret_all)
 
-        resp = self.bot.chat_postMessage(channel=channel, text=message, blocks=blocks, **kwargs)
-        self._check_for_exception(resp, is_raise=True)
+    @staticmethod
+    def _get_send_result(resp: SlackResponse, ret_ts: bool, ret_all: bool) -> Optional[Union[str, SlackResponse]]:
         if ret_ts:
             # Return the timestamp from the message
             return resp['ts']
         if ret_all:
             return resp
 
-    def update_message(self, channel: str, ts: str, message: str = None, blocks: BlocksType = None):
+    def _post_message(self, channel: str, message: str, blocks: Union[BlocksType, str] = None,
+                      **kwargs) -> SlackResponse:
+        if blocks is not None:
+            blocks = self._encode_blocks(blocks)
+        resp = self.bot.chat_postMessage(channel=channel, text=message, blocks=blocks, **kwargs)
+        self._check_for_exception(resp, is_raise=True)
+        return resp
+
+    def _send_plan(self, channel: str, message: str, plan: MessagePlan, split_mode: str = SPLIT_SEQUENTIAL,
+                   is_background: bool = True, **kwargs) -> SlackResponse:
+        """Posts the parts of a split message, returning the response for the first part"""
+        if split_mode not in SPLIT_MODES:
+            raise ValueError(f'Unknown split mode: {split_mode}. Options: {", ".join(SPLIT_MODES)}')
+        logger.debug(f'Message split into {plan.n_parts} parts ({plan.n_blocks} blocks).')
+        resp = self._post_message(channel, message=message, blocks=plan.parts[0], **kwargs)
+        if split_mode == SPLIT_THREAD and kwargs.get('thread_ts') is None:
+            kwargs['thread_ts'] = resp['ts']
+        if is_background:
+            self._submit_background_send(self._post_parts, channel, message, plan.parts[1:], **kwargs)
+        else:
+            self._post_parts(channel, message, plan.parts[1:], **kwargs)
+        return resp
+
+    def _submit_background_send(self, func: Callable, *args, **kwargs) -> ConcurrentFuture:
+        """Queues a send on the background worker. Sends are made in the order they're queued"""
+        if self._split_executor is None:
+            self._split_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='slack-split')
+        # Failed sends are kept until wait_for_pending_sends reports them
+        self._pending_sends = [x for x in self._pending_sends if not x.done() or x.exception() is not None]
+        # Run in a copy of the caller's context, so the send is still attributed to the command that made it
+        future = self._split_executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
+        self._pending_sends.append(future)
+        return future
+
+    def _post_parts(self, channel: str, message: str, parts: List[List[Dict]], **kwargs):
+        """Posts the parts after the first of a split message. Each gets the message's fallback text
+        (for notifications & screen readers), marked with where the part falls"""
+        for i, part in enumerate(parts):
+            part_message = f'{message} (continued {i + 2}/{len(parts) + 1})'.strip()
+            try:
+                self._post_message(channel, message=part_message, blocks=part, **kwargs)
+            except Exception as err:
+                # Later parts wouldn't make sense without this one
+                logger.error(f'Failed to post part {i + 2} of a split message in {channel}, '
+                             f'dropping the remaining {len(parts) - i - 1}: {err}')
+                raise
+
+    def wait_for_pending_sends(self, timeout: float = None, is_raise: bool = True) -> bool:
+        """Waits for the sends queued in the background (e.g., follow-up parts of split messages) to be made.
+        Returns True if they were all made (successfully or not) within the timeout
+
+        Args:
+            timeout: float, max seconds to wait. None to wait until they're all made
+            is_raise: bool, if True, raises the error of the first send that failed (e.g., leaving a split
+                message cut short). Otherwise, the failures are only logged
+
+        Raises:
+            the exception of the first failed send, when is_raise
+        """
+        done, not_done = wait(self._pending_sends, timeout=timeout)
+        self._pending_sends = list(not_done)
+        errors = [x.exception() for x in done if x.exception() is not None]
+        if len(errors) > 0:
+            logger.error(f'{len(errors)} background sends failed: {", ".join([str(x) for x in errors])}')
+            if is_raise:
+                raise errors[0]
+        return len(not_done) == 0
+
+    def update_message(self, channel: str, ts: str, message: str = None, blocks: Union[BlocksType, str] = None):
         """Updates a message"""
         logger.debug(f'Updating message in {channel}.')
         if blocks is not None:
-            blocks = self._dictify_blocks(blocks)
+            validate_before_send(blocks)
+            blocks = self._encode_blocks(blocks)
         resp = self.bot.chat_update(channel=channel, ts=ts, text=message, blocks=blocks)
         self._check_for_exception(resp, is_raise=True)
 
@@ -333,6 +560,31 @@ class SlackMethods:
         )
         self._check_for_exception(resp, is_raise=True)
 
+    def upload_file_content(self, channel: str, content: Union[str, bytes], filename: str, title: str = None,
+                            txt: str = '', thread_ts: str = None, snippet_type: str = None) -> SlackResponse:
+        """Uploads content from memory as a file to the given channel
+
+        Args:
+            content: str or bytes, the file's contents
+            filename: str, the name of the file, e.g., 'report.csv'
+            title: str, the file's title. Defaults to the filename
+            txt: str, a message to post along with the file
+            thread_ts: str, the thread to upload the file to, if any
+            snippet_type: str, for text content, the syntax type to show it as a snippet with (e.g., 'text')
+        """
+        logger.debug(f'Uploading {filename} ({len(content)} chars/bytes) to {channel}.')
+        upload_kwargs = {'thread_ts': thread_ts, 'snippet_type': snippet_type}
+        resp = self.bot.files_upload_v2(
+            channel=channel,
+            content=content,
+            filename=filename,
+            title=title if title is not None else filename,
+            initial_comment=txt,
+            **{k: v for k, v in upload_kwargs.items() if v is not None}
+        )
+        self._check_for_exception(resp, is_raise=True)
+        return resp
+
     def get_emojis(self) -> Dict[str, str]:
         """Returns a dict of emojis for a given workspace"""
         resp = self.bot.emoji_list()
@@ -8,6 +8,11 @@ from urllib.parse import urlparse
 from loguru import logger
 import requests
 
+from slacktools.metrics import (
+    ApiMetricsRegistry,
+    instrument_session,
+)
+
 
 class SlackSessionNotInitException(Exception):
     pass
@@ -19,13 +24,16 @@ class ParseError(Exception):
 
 class SlackSession:
 
-    def __init__(self, team: str, d_cookie: str, xoxc_token: str):
+    def __init__(self, team: str, d_cookie: str, xoxc_token: str, api_metrics: ApiMetricsRegistry = None,
+                 base_url: str = None):
         self.team = team
+        self.api_metrics = api_metrics
         self.d_cookie = d_cookie
         self.xoxc_token = xoxc_token
         logger.debug(f'Cookie is {len(self.d_cookie)} chars and begins with "{self.d_cookie[:10]}".')
 
-        base_url = f'https://{self.team}.slack.com'
+        if base_url is None:
+            base_url = f'https://{self.team}.slack.com'
         self.url_customize = f'{base_url}/customize/emoji'
         self.url_add = f'{base_url}/api/emoji.add'
         self.url_list = f'{base_url}/api/emoji.adminList'
@@ -41,6 +49,8 @@ class SlackSession:
         session.url_add = self.url_add
         session.url_list = self.url_list
         session.api_token = self.xoxc_token
+        if self.api_metrics is not None:
+            instrument_session(session, registry=self.api_metrics, client_name='session')
 
         return session
 
@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+from collections import Counter
 from datetime import (
     datetime,
     timedelta,
 )
-from random import choice
+from random import (
+    choice,
+    randint,
+)
 import re
 import traceback
 from typing import (
@@ -18,8 +22,8 @@ from typing import (
 
 from dateutil import relativedelta
 from loguru import logger
-import numpy as np
 
+from slacktools import codec
 from slacktools.api.actions import (
     Action,
     ActionForm,
@@ -39,18 +43,32 @@ from slacktools.block_kit.blocks import (
 )
 from slacktools.block_kit.elements.input import ButtonElement
 from slacktools.command_processing import CommandItem
+from slacktools.event_router import EventRouter
+from slacktools.metrics import (
+    UNMATCHED_COMMAND,
+    CommandContext,
+    command_scope,
+)
+from slacktools.option_source import (
+    MAX_SUGGESTED_OPTIONS,
+    SUGGESTION_DEADLINE_S,
+    OptionsInputType,
+    OptionSource,
+)
 from slacktools.slack_input_parser import (
     SlackInputParser,
     block_text_converter,
 )
+from slacktools.startup_profiler import timed_startup_phase
 from slacktools.tools import SlackTools
 
 
 class SlackBotBase(SlackTools):
     """The base class for an interactive bot in Slack"""
+    @timed_startup_phase('SlackBotBase.__init__')
     def __init__(self, props: Dict, triggers: List[str], main_channel: str, admins: List[str],
                  is_post_exceptions: bool = False, is_debug: bool = False, is_use_session: bool = False,
-                 is_rand_response: bool = False):
+                 is_rand_response: bool = False, **kwargs):
         """
         Args:
 
@@ -72,39 +90,82 @@ class SlackBotBase(SlackTools):
             is_debug: bool, if True, will provide additional info into exceptions
             is_use_session: bool, if True, will set up a session, namely for doing things like uploading emojis
             is_rand_response: bool, if True, will do a random response when a command is not matched
+            kwargs: passed through to SlackMethods (e.g., api_metrics, or bot_id & user_id to skip looking them up)
         """
-        super().__init__(props=props, main_channel=main_channel, is_use_session=is_use_session)
+        super().__init__(props=props, main_channel=main_channel, is_use_session=is_use_session, **kwargs)
         self.is_post_exceptions = is_post_exceptions
         self.is_debug = is_debug
         self.is_rand_response = is_rand_response
         self.rand_response_methods = []
         # Enforce lowercase triggers (regex will be indifferent to case anyway
-        if triggers is not None:
-            triggers = list(map(str.lower, triggers))
-
-        # Set triggers to @bot and any custom text
-        trigger_formatted = '|{}'.format('|'.join(triggers)) if triggers is not None else ''
-        self.MENTION_REGEX = r'^(<@({})>{})([.\s\S ]*)'.format(self.user_id, trigger_formatted)
+        self.custom_triggers = list(map(str.lower, triggers)) if triggers is not None else []
+        # The mention regex & triggers include the bot's user id, so they're built on first use (see _build_triggers)
+        self._mention_regex = None  # type: Optional[str]
+        self._triggers = None  # type: Optional[List[str]]
+        self._triggers_txt = None  # type: Optional[List[str]]
         self.main_channel = main_channel
         self.admins = admins
 
         self.commands = []  # type: List[CommandItem]
 
-        self.triggers = [f'{self.user_id}']
-        # User ids are formatted in a different way, so just
-        #   break this out into a variable for displaying in help text
-        self.triggers_txt = [f'<@{self.user_id}>']
-        if triggers is not None:
-            # Add in custom text triggers, if any
-            self.triggers += triggers
-            self.triggers_txt += triggers
-
         # This is a data store of handled past message hashes to help enforce only one action per command issued
         #   This was mainly built as a response to occasional duplicate responses
         #   due to delay in Slack receiving a response. I've yet to figure out how to improve response time
         self.message_events = []
         self.forms = {}  # type: Dict[str, ActionForm]
-
+        # Routes incoming events to their handlers. Additional handlers can be added through
+        #   self.event_router.add_handler / self.event_router.on
+        self.event_router = EventRouter()
+        self.channels.register_handlers(self.event_router)
+        self.event_router.add_handler(Message.type, self._process_message)
+        # action_id of an external select -> where its options come from
+        self.option_sources = {}  # type: Dict[str, OptionSource]
+
+    def _build_triggers(self):
+        """Sets triggers to @bot and any custom text, once the bot's identity is known.
+        Any of them that were assigned (e.g., by a subclass) are kept"""
+        if self._triggers is None:
+            self._triggers = [f'{self.user_id}'] + self.custom_triggers
+        if self._triggers_txt is None:
+            # User ids are formatted in a different way, so just
+            #   break this out into a variable for displaying in help text
+            self._triggers_txt = [f'<@{self.user_id}>'] + self.custom_triggers
+        if self._mention_regex is None:
+            trigger_formatted = ''.join([f'|{x}' for x in self.custom_triggers])
+            self._mention_regex = r'^(<@({})>{})([.\s\S ]*)'.format(self.user_id, trigger_formatted)
+
+    @property
+    def MENTION_REGEX(self) -> str:
+        if self._mention_regex is None:
+            self._build_triggers()
+        return self._mention_regex
+
+    @MENTION_REGEX.setter
+    def MENTION_REGEX(self, value: Optional[str]):
+        """Overrides the built regex. None to build it again on next use"""
+        self._mention_regex = value
+
+    @property
+    def triggers(self) -> List[str]:
+        if self._triggers is None:
+            self._build_triggers()
+        return self._triggers
+
+    @triggers.setter
+    def triggers(self, value: Optional[List[str]]):
+        self._triggers = value
+
+    @property
+    def triggers_txt(self) -> List[str]:
+        if self._triggers_txt is None:
+            self._build_triggers()
+        return self._triggers_txt
+
+    @triggers_txt.setter
+    def triggers_txt(self, value: Optional[List[str]]):
+        self._triggers_txt = value
+
+    @timed_startup_phase('SlackBotBase.update_commands')
     def update_commands(self, commands: List[CommandItem]):
         """Updates the dictionary of commands"""
         self.commands = commands
@@ -157,21 +218,23 @@ class SlackBotBase(SlackTools):
             main_cmd_blocks += self.build_command_blocks(cmd_item)
 
         # Then build out a list of the groups
-        groups = [c.group for c in self.commands]
-        unique_groups = sorted(list(set(groups)))
+        group_counts = Counter(c.group for c in self.commands)
+        unique_groups = sorted(group_counts.keys())
+        group_count_txts = self.tiny_text_batch([f'{group_counts[x]}' for x in unique_groups])
         group_btns = [
-            ButtonElement(f'{x} {self.tiny_text_gen(f"{groups.count(x)}")}', action_id=f'shelpg-{x}')
-            for x in unique_groups
+            ButtonElement(f'{x} {count_txt}', action_id=f'shelpg-{x}')
+            for x, count_txt in zip(unique_groups, group_count_txts)
         ]
         # Then build out a list of the tags
-        tags = []
+        tag_counts = Counter()
         for cmd in self.commands:
             if cmd.tags is not None:
-                tags += cmd.tags
-        unique_tags = sorted(list(set(tags)))
+                tag_counts.update(cmd.tags)
+        unique_tags = sorted(tag_counts.keys())
+        tag_count_txts = self.tiny_text_batch([f'{tag_counts[x]}' for x in unique_tags])
         tag_btns = [
-            ButtonElement(f'{x} {self.tiny_text_gen(f"{tags.count(x)}")}', action_id=f'shelpt-{x}')
-            for x in unique_tags
+            ButtonElement(f'{x} {count_txt}', action_id=f'shelpt-{x}')
+            for x, count_txt in zip(unique_tags, tag_count_txts)
         ]
 
         blocks = [
@@ -238,16 +301,33 @@ class SlackBotBase(SlackTools):
             return trigger, message_txt, raw_message
         return None, None, None
 
-    def parse_message_event(self, resp_dict: Dict, users_dict: Dict = None):
+    def handle_event(self, resp_dict: Union[Dict, bytes, str], users_dict: Dict = None, **kwargs) -> int:
+        """Sends an Events API payload (or bare event) through the event router.
+
+        Args:
+            resp_dict: dict, the event payload. Raw JSON bytes (e.g., Flask's request.get_data()) are decoded
+                with the library's codec
+            users_dict: dict, passed to the handlers, used for checking a user's bot timeout status
+            kwargs: any other context to pass to the handlers
+
+        Returns:
+            int, the number of handlers called
+        """
+        return self.event_router.dispatch(resp_dict, users_dict=users_dict, **kwargs)
+
+    def parse_message_event(self, resp_dict: Union[Dict, bytes, str], users_dict: Dict = None):
         """Takes in an Events API message-triggered event dict and determines
          if a command was issued to the bot"""
+        if isinstance(resp_dict, (bytes, str)):
+            resp_dict = codec.loads(resp_dict)
         event_dict = resp_dict['event']
         event_type = event_dict['type']
         if event_type != 'message':
             return
-        message_obj = Message(event_dict)
-        # event_data = MessageEvent(event_dict=event_dict)
+        self._process_message(Message(event_dict), users_dict=users_dict)
 
+    def _process_message(self, message_obj: Message, users_dict: Dict = None, **kwargs):
+        """Determines if a command was issued to the bot in the message and handles it"""
         # Determine whether to process this message as a command
         is_handle = False
         if message_obj.subtype is None or message_obj.subtype == 'message_replied':
@@ -298,6 +378,51 @@ class SlackBotBase(SlackTools):
             logger.warning(f'Unregistered action form: {action_id}. Cannot proceed')
             return False, None
 
+    def register_option_source(self, action_id: str, source: Union[Callable[[], OptionsInputType], OptionsInputType],
+                               ttl: Optional[float] = 300, is_preload: bool = True,
+                               retry_after: float = 30) -> OptionSource:
+        """Registers where the options of an external select come from
+
+        Args:
+            action_id: str, the action_id of the external select element
+            source: the (text, value) pairs or OptionObjects, or a callable returning them
+            ttl: float, seconds before the options are reloaded (in the background). None to never reload
+            is_preload: bool, if True, starts loading the options now (in the background), so that the first
+                suggestion request doesn't have to wait on it
+            retry_after: float, seconds to wait after a failed load before trying again. Suggestion requests in
+                the meantime are answered with the options already loaded, if any
+        """
+        option_source = OptionSource(source, ttl=ttl, retry_after=retry_after)
+        self.option_sources[action_id] = option_source
+        if is_preload:
+            option_source.refresh_in_background()
+        return option_source
+
+    def handle_block_suggestion(self, payload: Union[Dict, bytes, str], limit: int = MAX_SUGGESTED_OPTIONS,
+                                timeout: float = SUGGESTION_DEADLINE_S) -> Dict:
+        """Answers the typeahead request of an external select with the options matching what's been typed
+
+        Args:
+            payload: dict, the block_suggestion payload (or its raw JSON)
+            limit: int, max number of options to return
+            timeout: float, max seconds to wait on options that are still loading for the first time
+
+        Returns:
+            the response body for Slack, e.g., {'options': [{'text': {...}, 'value': '...'}, ...]}
+        """
+        if isinstance(payload, codec.JSON_INPUT_TYPES):
+            payload = codec.loads(payload)
+        action_id = payload.get('action_id')
+        option_source = self.option_sources.get(action_id)
+        if option_source is None:
+            logger.warning(f'No option source registered for action: {action_id}')
+            return {'options': []}
+        index = option_source.get_index(timeout=timeout)
+        if index is None:
+            logger.warning(f'Options for action {action_id} not loaded in time.')
+            return {'options': []}
+        return {'options': index.build_options(payload.get('value') or '', limit=limit)}
+
     @staticmethod
     def check_user_for_bot_timeout(users_dict: Dict, uid: str) -> bool:
         logger.debug('Begin permissions check...')
@@ -311,6 +436,19 @@ class SlackBotBase(SlackTools):
 
     def handle_command(self, obj: Union[Message, SlashCommandEvent], users_dict: Dict = None):
         """Handles a bot command if it's known"""
+        # API calls made while handling the command get attributed to its pattern once matched
+        cmd_ctx = None  # type: Optional[CommandContext]
+        try:
+            with command_scope(UNMATCHED_COMMAND) as cmd_ctx:
+                self._handle_command(obj, users_dict=users_dict, cmd_ctx=cmd_ctx)
+        finally:
+            # Commands that raise are counted too
+            if cmd_ctx is not None:
+                self.api_metrics.record_command(cmd_ctx.name, cmd_ctx.elapsed, db_time=cmd_ctx.db_time,
+                                                db_queries=cmd_ctx.db_queries)
+
+    def _handle_command(self, obj: Union[Message, SlashCommandEvent], cmd_ctx: CommandContext,
+                        users_dict: Dict = None):
         response = None
         is_slash = isinstance(obj, SlashCommandEvent)
         logger.debug(f'Incoming message: {obj.cleaned_message}')
@@ -325,11 +463,12 @@ class SlackBotBase(SlackTools):
             match = re.match(cmd_item.pattern, obj.cleaned_message)
             if match is not None:
                 logger.debug(f'Matched on pattern: {cmd_item.pattern}')
+                cmd_ctx.name = cmd_item.pattern
                 group = cmd_item.group
                 if group == 'admin':
                     if uid not in self.admins:
                         logger.info(f'Blocked user {uid} from using command.')
-                        response = ':ah-ah-ah:' * np.random.randint(1, 50)
+                        response = ':ah-ah-ah:' * randint(1, 49)
                         break
                 # We've matched on a command
                 resp = cmd_item.response
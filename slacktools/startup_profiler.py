@@ -0,0 +1,231 @@
+"""Opt-in timing of startup - the lazy imports and the init phases of SlackMethods, SlackBotBase,
+SecretStore & DBClient
+
+Nothing is recorded unless SLACKTOOLS_STARTUP_PROFILE is set (or `enable_startup_profiler` is called).
+    Phases are timed from when profiling was enabled, nest (e.g., SlackMethods' auth test within SlackBotBase's init)
+    and also count the modules they loaded. Startup is over when `finish_startup_profile` is called (or the
+    process exits), which logs the report and, if set up to, writes it as JSON & dumps a cProfile of the startup.
+
+Usage:
+    $ SLACKTOOLS_STARTUP_PROFILE=1 SLACKTOOLS_STARTUP_REPORT=startup.json python -m mybot
+    >>> bot = MyBot(...)
+    >>> finish_startup_profile()
+
+    # Just the import times
+    $ SLACKTOOLS_STARTUP_PROFILE=1 python -c "from slacktools import SlackBotBase"
+"""
+import atexit
+from contextlib import (
+    contextmanager,
+    nullcontext,
+)
+from datetime import datetime
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+)
+
+ENV_ENABLE = 'SLACKTOOLS_STARTUP_PROFILE'
+# Where to write the JSON report
+ENV_REPORT_PATH = 'SLACKTOOLS_STARTUP_REPORT'
+# Where to dump the cProfile stats (for pstats/snakeviz). Setting this also enables profiling
+ENV_CPROFILE_PATH = 'SLACKTOOLS_STARTUP_CPROFILE'
+_FALSY = ['', '0', 'false', 'no', 'off']
+IMPORT_PHASE_PREFIX = 'import '
+
+
+class StartupPhase:
+    """A timed part of startup. Times are in seconds from when profiling was enabled"""
+
+    def __init__(self, name: str, start: float, depth: int, thread: str, attrs: Dict[str, Any] = None):
+        self.name = name
+        self.start = start
+        self.end = None  # type: Optional[float]
+        self.depth = depth
+        self.thread = thread
+        self.modules_loaded = 0
+        self.attrs = attrs if attrs is not None else {}
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start if self.end is not None else 0.0
+
+    def asdict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'start': self.start,
+            'duration': self.duration,
+            'depth': self.depth,
+            'thread': self.thread,
+            'modules_loaded': self.modules_loaded,
+            **self.attrs,
+        }
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}(name={self.name}, duration={self.duration:.4f})>'
+
+
+class StartupProfiler:
+    """Collects the startup phases of the process"""
+
+    def __init__(self, report_path: str = None, cprofile_path: str = None):
+        """
+        Args:
+            report_path: str, where to write the JSON report on finish. Only logged when None
+            cprofile_path: str, where to dump the cProfile stats on finish. No profiling when None.
+                Only the thread that enabled the profiler is profiled
+        """
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self.report_path = report_path
+        self.cprofile_path = cprofile_path
+        self.phases = []  # type: List[StartupPhase]
+        self.is_finished = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profile = None
+        if cprofile_path is not None:
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    @classmethod
+    def from_env(cls) -> Optional['StartupProfiler']:
+        """A profiler set up by the environment variables, or None if profiling's not enabled"""
+        cprofile_path = os.environ.get(ENV_CPROFILE_PATH) or None
+        if os.environ.get(ENV_ENABLE, '').strip().lower() in _FALSY and cprofile_path is None:
+            return None
+        return cls(report_path=os.environ.get(ENV_REPORT_PATH) or None, cprofile_path=cprofile_path)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    @contextmanager
+    def phase(self, name: str, **attrs) -> Iterator[StartupPhase]:
+        """Times the code within as a phase of startup. Any attrs are added to the phase in the report"""
+        stack = self._local.__dict__.setdefault('stack', [])  # type: List[StartupPhase]
+        n_modules = len(sys.modules)
+        timed_phase = StartupPhase(name, start=self.elapsed(), depth=len(stack),
+                                   thread=threading.current_thread().name, attrs=attrs)
+        stack.append(timed_phase)
+        try:
+            yield timed_phase
+        finally:
+            timed_phase.end = self.elapsed()
+            timed_phase.modules_loaded = len(sys.modules) - n_modules
+            stack.pop()
+            with self._lock:
+                self.phases.append(timed_phase)
+
+    def report(self) -> Dict[str, Any]:
+        """The phases so far, in the order they started, along with totals"""
+        with self._lock:
+            phases = sorted(self.phases, key=lambda x: x.start)
+        totals = {}  # type: Dict[str, Dict[str, Any]]
+        for timed_phase in phases:
+            name_totals = totals.setdefault(timed_phase.name, {'count': 0, 'time': 0.0})
+            name_totals['count'] += 1
+            name_totals['time'] += timed_phase.duration
+        package = sys.modules.get('slacktools')
+        return {
+            'started_at': self.started_at.isoformat(),
+            'slacktools_version': getattr(package, '__version__', None),
+            'python_version': sys.version.split()[0],
+            'elapsed': self.elapsed(),
+            # Time spent in phases that aren't within another one
+            'phase_time': sum([x.duration for x in phases if x.depth == 0]),
+            'modules': len(sys.modules),
+            'imports': {x.name[len(IMPORT_PHASE_PREFIX):]: x.duration for x in phases
+                        if x.name.startswith(IMPORT_PHASE_PREFIX)},
+            'totals': totals,
+            'phases': [x.asdict() for x in phases],
+            'cprofile_path': self.cprofile_path,
+        }
+
+    def finish(self) -> Dict[str, Any]:
+        """Ends startup: stops the cProfile (dumping its stats), then logs the report & writes it, if set up to.
+        Phases after this aren't recorded"""
+        from loguru import logger
+
+        if self.is_finished:
+            return self.report()
+        self.is_finished = True
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self.cprofile_path)
+        report = self.report()
+        if self.report_path is not None:
+            with open(self.report_path, 'w') as f:
+                json.dump(report, f, indent=2)
+        slowest = ', '.join([f'{x["name"]}={x["duration"]:.3f}s' for x in
+                             sorted(report['phases'], key=lambda x: x['duration'], reverse=True)[:5]])
+        logger.info(f'Startup took {report["elapsed"]:.3f}s ({len(report["phases"])} phases, '
+                    f'{report["modules"]} modules). Slowest: {slowest}')
+        return report
+
+
+def _finish_at_exit():
+    if _profiler is not None and not _profiler.is_finished:
+        _profiler.finish()
+
+
+def _register_exit_hook():
+    # Exit hooks run last-in first-out & loguru's removes its handlers, so it's imported first
+    #   to have the report logged ahead of that
+    import loguru  # noqa: F401
+    atexit.unregister(_finish_at_exit)
+    atexit.register(_finish_at_exit)
+
+
+_profiler = StartupProfiler.from_env()  # type: Optional[StartupProfiler]
+if _profiler is not None:
+    _register_exit_hook()
+
+
+def get_startup_profiler() -> Optional[StartupProfiler]:
+    return _profiler
+
+
+def enable_startup_profiler(report_path: str = None, cprofile_path: str = None) -> StartupProfiler:
+    """Starts profiling, if it isn't already (e.g., through the environment). See StartupProfiler for the args"""
+    global _profiler
+    if _profiler is None or _profiler.is_finished:
+        _profiler = StartupProfiler(report_path=report_path, cprofile_path=cprofile_path)
+        _register_exit_hook()
+    return _profiler
+
+
+def startup_phase(name: str, **attrs) -> ContextManager[Optional[StartupPhase]]:
+    """Times the code within as a phase of startup - does nothing when profiling's off or startup's over"""
+    if _profiler is None or _profiler.is_finished:
+        return nullcontext()
+    return _profiler.phase(name, **attrs)
+
+
+def timed_startup_phase(name: str) -> Callable:
+    """Decorator version of startup_phase"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with startup_phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def finish_startup_profile() -> Optional[Dict[str, Any]]:
+    """Ends startup and returns its report (see StartupProfiler.finish). None when profiling's off"""
+    if _profiler is None:
+        return None
+    return _profiler.finish()
@@ -0,0 +1,168 @@
+"""DataFrame -> Slack table rendering
+
+Columns are formatted a whole column at a time and their widths worked out once. Every rendered line is then
+    the same width, so the size of a table (and where to cut it into message-sized chunks) is known before any
+    row is built. That lets `SlackTools.send_table` decide between posting the table in messages and uploading
+    it as a file without rendering it first.
+
+pandas & numpy are imported on first use, so the constants here can be used without loading them.
+"""
+from io import BytesIO
+from typing import (
+    TYPE_CHECKING,
+    List,
+    Tuple,
+)
+
+from slacktools.block_kit.limits import DEFAULT_TEXT_LIMIT
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+CODE_FENCE = '```'
+# Chunks are sent as section text - leave room for the code fences around them (and a title on the first)
+MAX_TABLE_CHUNK_CHARS = DEFAULT_TEXT_LIMIT - 100
+# Tables larger than this go out as a file rather than a run of messages
+DEFAULT_UPLOAD_THRESHOLD_CHARS = 40000
+UPLOAD_AS_CSV = 'csv'
+UPLOAD_AS_SNIPPET = 'snippet'
+UPLOAD_TYPES = (UPLOAD_AS_CSV, UPLOAD_AS_SNIPPET)
+
+
+def _to_text(col: 'pd.Series', missing: 'pd.Series') -> 'pd.Series':
+    if missing.any():
+        col = col.astype(object).where(~missing, '')
+    return col.astype(str)
+
+
+def _align_decimals(text: 'pd.Series') -> 'pd.Series':
+    """Pads float strings so their decimal points line up"""
+    if len(text) == 0:
+        return text
+    parts = text.str.partition('.')
+    whole, dot, frac = parts[0], parts[1], parts[2]
+    frac_width = int(frac.str.len().max())
+    if frac_width == 0:
+        return text
+    whole_width = int(whole.str.len().max())
+    dot = dot.where(dot != '', ' ')
+    return whole.str.rjust(whole_width) + dot + frac.str.ljust(frac_width)
+
+
+def format_column(col: 'pd.Series') -> Tuple['pd.Series', bool]:
+    """Formats a column's values as strings.
+
+    Returns:
+        the formatted values (missing values are blank) and whether the column is right-aligned (i.e., numeric)
+    """
+    import numpy as np
+    import pandas as pd
+    from pandas.api.types import (
+        is_bool_dtype,
+        is_float_dtype,
+        is_integer_dtype,
+    )
+
+    missing = col.isna()
+    if is_bool_dtype(col.dtype):
+        return _to_text(col, missing), False
+    if is_integer_dtype(col.dtype):
+        return _to_text(col, missing), True
+    if is_float_dtype(col.dtype):
+        values = col.to_numpy(dtype=float, na_value=np.nan)
+        text = pd.Series(np.char.mod('%g', values), index=col.index).where(~missing, '')
+        return _align_decimals(text), True
+    # Anything else is shown as text. Line breaks would break the row apart
+    return _to_text(col, missing).str.replace('\n', ' ', regex=False), False
+
+
+class TableLayout:
+    """A DataFrame's columns formatted & measured, ready to render as a github-style table
+
+    Example:
+        >>> layout = TableLayout(df)
+        >>> layout.n_chars       # known before rendering
+        >>> layout.render_chunks(max_chars=2900)
+    """
+
+    def __init__(self, df: 'pd.DataFrame'):
+        self.n_rows = len(df)
+        self.headers = [str(x).replace('\n', ' ') for x in df.columns]
+        self.columns = []  # type: List['pd.Series']
+        self.is_right = []  # type: List[bool]
+        self.widths = []  # type: List[int]
+        for i, header in enumerate(self.headers):
+            text, is_right = format_column(df.iloc[:, i])
+            width = len(header)
+            if self.n_rows > 0:
+                width = max(width, int(text.str.len().max()))
+            self.columns.append(text)
+            self.is_right.append(is_right)
+            self.widths.append(width)
+
+    @property
+    def line_width(self) -> int:
+        """Characters in each line of the table (excluding the newline)"""
+        if len(self.widths) == 0:
+            return 0
+        return sum(self.widths) + 3 * len(self.widths) + 1
+
+    @property
+    def n_chars(self) -> int:
+        """Characters in the whole rendered table"""
+        if len(self.widths) == 0:
+            return 0
+        return (self.line_width + 1) * (self.n_rows + 2) - 1
+
+    def _pad(self, text: str, i: int) -> str:
+        return text.rjust(self.widths[i]) if self.is_right[i] else text.ljust(self.widths[i])
+
+    def render_header(self) -> List[str]:
+        """The header and separator lines"""
+        if len(self.widths) == 0:
+            return []
+        return [
+            '| ' + ' | '.join([self._pad(x, i) for i, x in enumerate(self.headers)]) + ' |',
+            '|' + '|'.join(['-' * (x + 2) for x in self.widths]) + '|',
+        ]
+
+    def render_rows(self, start: int = 0, stop: int = None) -> List[str]:
+        if len(self.widths) == 0:
+            return []
+        padded = []
+        for text, is_right, width in zip(self.columns, self.is_right, self.widths):
+            text = text.iloc[start:stop]
+            padded.append(text.str.rjust(width) if is_right else text.str.ljust(width))
+        body = padded[0].str.cat(padded[1:], sep=' | ') if len(padded) > 1 else padded[0]
+        return ('| ' + body + ' |').tolist()
+
+    def render_lines(self) -> List[str]:
+        return self.render_header() + self.render_rows()
+
+    def rows_per_chunk(self, max_chars: int = MAX_TABLE_CHUNK_CHARS) -> int:
+        """How many rows fit in a chunk of max_chars along with the header. 0 when not even one does"""
+        header_chars = 2 * (self.line_width + 1)
+        return max(0, (max_chars - header_chars + 1) // (self.line_width + 1))
+
+    def render_chunks(self, max_chars: int = MAX_TABLE_CHUNK_CHARS) -> List[str]:
+        """Renders the table in pieces of up to max_chars, each starting with the header
+
+        Raises:
+            ValueError when a single row (along with the header) is longer than max_chars
+        """
+        if len(self.widths) == 0:
+            return []
+        header = self.render_header()
+        if self.n_rows == 0:
+            return ['\n'.join(header)]
+        n_rows = self.rows_per_chunk(max_chars)
+        if n_rows == 0:
+            raise ValueError(f'Table rows are too wide to fit in {max_chars} chars: {self.line_width}')
+        rows = self.render_rows()
+        return ['\n'.join(header + rows[i:i + n_rows]) for i in range(0, self.n_rows, n_rows)]
+
+
+def df_to_csv_bytes(df: 'pd.DataFrame') -> bytes:
+    buffer = BytesIO()
+    df.to_csv(buffer, index=False)
+    return buffer.getvalue()
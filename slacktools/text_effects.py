@@ -0,0 +1,124 @@
+"""Text effects - tiny text and emoji-lettered phrases
+
+The translation tables and emoji letter pools are built once, rather than on every conversion.
+    Emoji pools can be narrowed to the emojis a workspace actually has, so phrases don't end up with
+    `:names:` that render as plain text.
+"""
+from random import Random
+import string
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
+TINY_TEXT_SOURCE = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890-+=()?!'
+TINY_TEXT_TARGETS = {
+    'subscript': 'ₐᵦ𝒸𝒹ₑ𝒻𝓰ₕᵢⱼₖₗₘₙₒₚᵩᵣₛₜᵤᵥ𝓌ₓᵧ𝓏ₐBCDₑFGₕᵢⱼₖₗₘₙₒₚQᵣₛₜᵤᵥWₓYZ₁₂₃₄₅₆₇₈₉₀₋₊₌₍₎?!',
+    'supscript': 'ᵃᵇᶜᵈᵉᶠᵍʰᶦʲᵏˡᵐⁿᵒᵖᵠʳˢᵗᵘᵛʷˣʸᶻᴬᴮᶜᴰᴱᶠᴳᴴᴵᴶᴷᴸᴹᴺᴼᴾᵠᴿˢᵀᵁⱽᵂˣʸᶻ¹²³⁴⁵⁶⁷⁸⁹⁰⁻⁺⁼⁽⁾ˀᵎ',
+    'smallcaps': 'ᴀʙᴄᴅᴇғɢʜɪᴊᴋʟᴍɴᴏᴘǫʀsᴛᴜᴠᴡxʏᴢABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890-+=()?!'
+}
+DEFAULT_TINY_TEXT_TYPE = 'supscript'
+TINY_TEXT_TABLES = {k: str.maketrans(TINY_TEXT_SOURCE, v) for k, v in TINY_TEXT_TARGETS.items()}
+
+# Prefixes of the custom emoji alphabets, each followed by the letter (e.g., 'scrabble-q')
+EMOJI_LETTER_GROUPS = [
+    'regional_indicator_',
+    'letter-',
+    'alphabet-yellow-',
+    'alphabet-white-',
+    'scrabble-',
+]
+# Additional, irregular entries
+EXTRA_EMOJI_LETTERS = {
+    'a': ['amazon', 'a', 'slayer_a', 'a_'],
+    'b': ['b'],
+    'e': ['slayer_e'],
+    'l': ['slayer_l'],
+    'm': ['m'],
+    'o': ['o'],
+    'r': ['slayer_r'],
+    's': ['s', 'slayer_s'],
+    'x': ['x'],
+    'y': ['slayer_y'],
+    'z': ['zabbix'],
+    '.': ['black_circle', 'period'],
+    '!': ['exclamation', 'heavy_heart_exclamation_mark_ornament', 'grey_exclamation'] +
+         [f'alphabet-{x}-exclamation' for x in ['yellow', 'white']],
+    '?': ['question', 'grey_question', 'questionman', 'question_block'] +
+         [f'alphabet-{x}-question' for x in ['yellow', 'white']],
+    '"': ['airquotes-start', 'airquotes-end'],
+    "'": ['airquotes-start', 'airquotes-end'],
+    "@": [f'alphabet-{x}-at' for x in ['yellow', 'white']],
+    "#": [f'alphabet-{x}-hash' for x in ['yellow', 'white']]
+}
+# Used in place of spaces
+BLANK_EMOJI = 'blank'
+# Emojis that come with Slack, so they're never in a workspace's (custom) emoji catalog
+STANDARD_EMOJIS = frozenset(
+    [f'regional_indicator_{x}' for x in string.ascii_lowercase] +
+    ['a', 'b', 'm', 'o', 'x', 'black_circle', 'exclamation', 'grey_exclamation',
+     'heavy_heart_exclamation_mark_ornament', 'question', 'grey_question']
+)
+
+
+def tiny_text(msg: str, text_type: str = DEFAULT_TINY_TEXT_TYPE) -> str:
+    """Converts what characters it can into one of superscript (supscript), subscript or smallcaps"""
+    return msg.translate(TINY_TEXT_TABLES.get(text_type, TINY_TEXT_TABLES[DEFAULT_TINY_TEXT_TYPE]))
+
+
+def tiny_text_batch(msgs: Iterable[str], text_type: str = DEFAULT_TINY_TEXT_TYPE) -> List[str]:
+    table = TINY_TEXT_TABLES.get(text_type, TINY_TEXT_TABLES[DEFAULT_TINY_TEXT_TYPE])
+    return [x.translate(table) for x in msgs]
+
+
+def build_emoji_letter_pools() -> Dict[str, List[str]]:
+    """Builds the emoji names that can stand in for each character"""
+    letter_dict = {}  # type: Dict[str, List[str]]
+    for ltr in string.ascii_lowercase:
+        letter_dict[ltr] = [f'{grp}{ltr}' for grp in EMOJI_LETTER_GROUPS]
+    # Add in consistent numbers
+    for i in range(10):
+        letter_dict[f'{i}'] = [f'mana{i}']
+    for k, v in EXTRA_EMOJI_LETTERS.items():
+        letter_dict[k] = letter_dict.get(k, []) + v
+    return letter_dict
+
+
+class EmojiPhraseBuilder:
+    """Spells out phrases in emoji letters, picking a random emoji for each character"""
+
+    def __init__(self, emoji_catalog: Optional[Iterable[str]] = None, pools: Dict[str, List[str]] = None,
+                 rand: Random = None):
+        """
+        Args:
+            emoji_catalog: the names of the workspace's custom emojis (e.g., the keys from `get_emojis`).
+                When provided, only emojis in it (or that come with Slack) are used
+            pools: character -> emoji names that can stand in for it. Defaults to `build_emoji_letter_pools`
+            rand: Random, the source of the random picks
+        """
+        if pools is None:
+            pools = build_emoji_letter_pools()
+        pools = {**pools, ' ': [BLANK_EMOJI]}
+        catalog = None if emoji_catalog is None else STANDARD_EMOJIS.union(emoji_catalog)
+        # Characters without any emoji left over just come through as they are
+        self.pools = {}  # type: Dict[str, Tuple[str, ...]]
+        for char, names in pools.items():
+            available = tuple(f':{x}:' for x in names if catalog is None or x in catalog)
+            if len(available) > 0:
+                self.pools[char] = available
+        self._rand = rand if rand is not None else Random()
+
+    def build(self, phrase: str) -> str:
+        """Build your awesome phrase"""
+        pools = self.pools
+        choice = self._rand.choice
+        return ''.join([choice(pools[x]) if x in pools else x for x in phrase])
+
+    def build_batch(self, phrases: Iterable[str]) -> List[str]:
+        return [self.build(x) for x in phrases]
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}(chars={len(self.pools)})>'
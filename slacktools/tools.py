@@ -1,19 +1,41 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-from random import randint
+from concurrent.futures import Future as ConcurrentFuture
 import re
-import string
 from typing import (
+    TYPE_CHECKING,
     Dict,
     List,
+    Optional,
+    Union,
 )
 
 from loguru import logger
-import pandas as pd
-from tabulate import tabulate
+from slack_sdk.web.slack_response import SlackResponse
 
+from slacktools.block_kit.blocks import MarkdownSectionBlock
 from slacktools.slack_input_parser import SlackInputParser
 from slacktools.slack_methods import SlackMethods
+from slacktools.tables import (
+    CODE_FENCE,
+    DEFAULT_UPLOAD_THRESHOLD_CHARS,
+    MAX_TABLE_CHUNK_CHARS,
+    UPLOAD_AS_CSV,
+    UPLOAD_AS_SNIPPET,
+    UPLOAD_TYPES,
+    TableLayout,
+    df_to_csv_bytes,
+)
+from slacktools.text_effects import (
+    DEFAULT_TINY_TEXT_TYPE,
+    EmojiPhraseBuilder,
+    build_emoji_letter_pools,
+    tiny_text,
+    tiny_text_batch,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 LOG = logger
 
@@ -21,7 +43,7 @@ LOG = logger
 class SlackTools(SlackInputParser, SlackMethods):
     """Tools to make working with Slack API better"""
 
-    def __init__(self, props: Dict, main_channel: str, is_use_session: bool = False):
+    def __init__(self, props: Dict, main_channel: str, is_use_session: bool = False, **kwargs):
         """
         Args:
             props: dict, contains tokens & other secrets for connecting &
@@ -34,17 +56,72 @@ class SlackTools(SlackInputParser, SlackMethods):
                     cookie: str, cookie used for special processes outside
                         the realm of common API calls e.g., emoji uploads
             is_use_session: enable when looking to do things like upload new emojis
+            kwargs: passed through to SlackMethods (e.g., api_metrics)
         """
-        super().__init__(props=props, main_channel=main_channel, is_use_session=is_use_session)
+        super().__init__(props=props, main_channel=main_channel, is_use_session=is_use_session, **kwargs)
+        # Built on first use of build_phrase - see get_phrase_builder
+        self._phrase_builder = None  # type: Optional[EmojiPhraseBuilder]
 
     def refresh_xoxc_token(self, new_token: str):
         if self.session is not None:
             self.session.refresh_xoxc_token_and_cookie(new_token=new_token, new_d_cookie=self.d_cookie)
 
     @staticmethod
-    def df_to_slack_table(df: pd.DataFrame) -> str:
+    def df_to_slack_table(df: 'pd.DataFrame') -> str:
         """Takes in a dataframe, outputs a string formatted for Slack"""
-        return tabulate(df, headers='keys', tablefmt='github', showindex='never')
+        return '\n'.join(TableLayout(df).render_lines())
+
+    def send_table(self, channel: str, df: 'pd.DataFrame', title: str = None, filename: str = 'table',
+                   max_chunk_chars: int = MAX_TABLE_CHUNK_CHARS,
+                   upload_threshold_chars: int = DEFAULT_UPLOAD_THRESHOLD_CHARS, upload_as: str = UPLOAD_AS_CSV,
+                   is_background: bool = True, **kwargs) -> Optional[Union[str, SlackResponse, ConcurrentFuture]]:
+        """Sends a dataframe to the channel as a table
+
+        Tables up to upload_threshold_chars are posted as code blocks of up to max_chunk_chars each (each with
+            the header), split over as many messages as needed. Larger tables - or those with rows too wide for
+            a chunk - are uploaded as a file instead.
+
+        Args:
+            title: str, shown above the table / as the upload's comment
+            filename: str, the name of the uploaded file, without the extension
+            upload_as: str, the kind of file large tables are uploaded as. One of UPLOAD_TYPES
+            is_background: bool, if True, uploads (and the messages after the first) are made from a background
+                thread so this returns without waiting on them. The dataframe shouldn't be changed in the meantime.
+                See `wait_for_pending_sends`
+            kwargs: passed on to send_message (e.g., thread_ts)
+
+        Returns:
+            the result of send_message when posted as messages; the upload's response - or when in the
+                background, its future - when uploaded
+        """
+        if upload_as not in UPLOAD_TYPES:
+            raise ValueError(f'upload_as must be one of {UPLOAD_TYPES}: {upload_as}')
+        layout = TableLayout(df)
+        if layout.n_chars <= upload_threshold_chars and layout.rows_per_chunk(max_chunk_chars) > 0:
+            blocks = [] if title is None else [MarkdownSectionBlock(title)]
+            blocks += [MarkdownSectionBlock(f'{CODE_FENCE}\n{x}\n{CODE_FENCE}')
+                       for x in layout.render_chunks(max_chars=max_chunk_chars)]
+            return self.send_message(channel, message=title if title is not None else filename, blocks=blocks,
+                                     is_background_split=is_background, **kwargs)
+
+        LOG.debug(f'Table of {layout.n_chars} chars is over the threshold ({upload_threshold_chars}). '
+                  f'Uploading as {upload_as}.')
+        upload_args = (channel, df, layout, title, filename, upload_as, kwargs.get('thread_ts'))
+        if is_background:
+            return self._submit_background_send(self._upload_table, *upload_args)
+        return self._upload_table(*upload_args)
+
+    def _upload_table(self, channel: str, df: 'pd.DataFrame', layout: TableLayout, title: Optional[str],
+                      filename: str, upload_as: str, thread_ts: Optional[str]) -> SlackResponse:
+        if upload_as == UPLOAD_AS_SNIPPET:
+            content = '\n'.join(layout.render_lines())
+            filename, snippet_type = f'{filename}.txt', 'text'
+        else:
+            content = df_to_csv_bytes(df)
+            filename, snippet_type = f'{filename}.csv', None
+        return self.upload_file_content(channel, content=content, filename=filename, title=title,
+                                        txt=title if title is not None else '', thread_ts=thread_ts,
+                                        snippet_type=snippet_type)
 
     @staticmethod
     def _exact_match_emojis(emoji_dict: dict, exact_match_list: List[str]) -> dict:
@@ -83,101 +160,39 @@ class SlackTools(SlackInputParser, SlackMethods):
     @staticmethod
     def _build_emoji_char_dict() -> dict:
         """Sets up use of replacing words with slack emojis"""
-        a2z = string.ascii_lowercase
-        letter_grp = [
-            'regional_indicator_',
-            'letter-',
-            'alphabet-yellow-',
-            'alphabet-white-',
-            'scrabble-',
-        ]
-
-        grp = [['{}{}'.format(y, x) for x in a2z] for y in letter_grp]
-        letter_dict: Dict[str, List[str]]
-        letter_dict = {}
-
-        for i, ltr in enumerate(list(a2z)):
-            ltr_list = []
-            for g in grp:
-                ltr_list.append(g[i])
-            letter_dict[ltr] = ltr_list
-
-        # Add in consistent numbers
-        for i in range(10):
-            letter_dict[f'{i}'] = [f'mana{i}']
-
-        # Additional, irregular entries
-        addl = {
-            'a': ['amazon', 'a', 'slayer_a', 'a_'],
-            'b': ['b'],
-            'e': ['slayer_e'],
-            'l': ['slayer_l'],
-            'm': ['m'],
-            'o': ['o'],
-            'r': ['slayer_r'],
-            's': ['s', 'slayer_s'],
-            'x': ['x'],
-            'y': ['slayer_y'],
-            'z': ['zabbix'],
-            '.': ['black_circle', 'period'],
-            '!': ['exclamation', 'heavy_heart_exclamation_mark_ornament', 'grey_exclamation'] +
-                 [f'alphabet-{x}-exclamation' for x in ['yellow', 'white']],
-            '?': ['question', 'grey_question', 'questionman', 'question_block'] +
-                 [f'alphabet-{x}-question' for x in ['yellow', 'white']],
-            '"': ['airquotes-start', 'airquotes-end'],
-            "'": ['airquotes-start', 'airquotes-end'],
-            "@": [f'alphabet-{x}-at' for x in ['yellow', 'white']],
-            "#": [f'alphabet-{x}-hash' for x in ['yellow', 'white']]
-        }
-
-        for k, v in addl.items():
-            if k in letter_dict.keys():
-                letter_dict[k] = letter_dict[k] + v
-            else:
-                letter_dict[k] = v
-        return letter_dict
+        return build_emoji_letter_pools()
+
+    def get_phrase_builder(self, is_refresh: bool = False) -> EmojiPhraseBuilder:
+        """Gets the builder behind build_phrase, set up once with the emojis available in the workspace
+
+        Args:
+            is_refresh: bool, if True, reloads the workspace's emojis (e.g., after uploading new ones)
+        """
+        if self._phrase_builder is None or is_refresh:
+            try:
+                emoji_catalog = self.get_emojis()
+            except Exception as err:
+                logger.warning(f'Couldn\'t load the emoji catalog, using all emoji letters: {err}')
+                emoji_catalog = None
+            self._phrase_builder = EmojiPhraseBuilder(
+                emoji_catalog=emoji_catalog.keys() if isinstance(emoji_catalog, dict) else None
+            )
+        return self._phrase_builder
 
     def build_phrase(self, phrase: str) -> str:
         """Build your awesome phrase"""
+        return self.get_phrase_builder().build(phrase)
 
-        letter_dict = self._build_emoji_char_dict()
-        built_phrase = []
-        for letter in list(phrase):
-            # Lookup letter
-            if letter in letter_dict.keys():
-                vals = letter_dict[letter]
-                rand_l = vals[randint(0, len(vals) - 1)]
-                built_phrase.append(':{}:'.format(rand_l))
-            elif letter == ' ':
-                built_phrase.append(':blank:')
-            else:
-                built_phrase.append(letter)
-
-        done_phrase = ''.join(built_phrase)
-        return done_phrase
+    def build_phrases(self, phrases: List[str]) -> List[str]:
+        """Builds many phrases in one go"""
+        return self.get_phrase_builder().build_batch(phrases)
 
     @staticmethod
-    def tiny_text_gen(msg: str, text_type: str = 'supscript') -> str:
+    def tiny_text_gen(msg: str, text_type: str = DEFAULT_TINY_TEXT_TYPE) -> str:
         """Takes a message and converts what characters it can into
         one of superscript, subscript or small_caps"""
-        alphanum_mapper = {
-            'normal': 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890-+=()?!',
-            'subscript': 'ₐᵦ𝒸𝒹ₑ𝒻𝓰ₕᵢⱼₖₗₘₙₒₚᵩᵣₛₜᵤᵥ𝓌ₓᵧ𝓏ₐBCDₑFGₕᵢⱼₖₗₘₙₒₚQᵣₛₜᵤᵥWₓYZ₁₂₃₄₅₆₇₈₉₀₋₊₌₍₎?!',
-            'supscript': 'ᵃᵇᶜᵈᵉᶠᵍʰᶦʲᵏˡᵐⁿᵒᵖᵠʳˢᵗᵘᵛʷˣʸᶻᴬᴮᶜᴰᴱᶠᴳᴴᴵᴶᴷᴸᴹᴺᴼᴾᵠᴿˢᵀᵁⱽᵂˣʸᶻ¹²³⁴⁵⁶⁷⁸⁹⁰⁻⁺⁼⁽⁾ˀᵎ',
-            'smallcaps': 'ᴀʙᴄᴅᴇғɢʜɪᴊᴋʟᴍɴᴏᴘǫʀsᴛᴜᴠᴡxʏᴢABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890-+=()?!'
-        }
-        if text_type not in alphanum_mapper.keys():
-            text_type = 'supscript'
-
-        new_msg = []
-        source = alphanum_mapper.get('normal')
-        target = alphanum_mapper.get(text_type)
-        for char in list(msg):
-
-            src_idx = source.find(char)
-            if src_idx < 0:
-                new_char = char
-            else:
-                new_char = target[src_idx]
-            new_msg.append(new_char)
-        return ''.join(new_msg)
+        return tiny_text(msg, text_type=text_type)
+
+    @staticmethod
+    def tiny_text_batch(msgs: List[str], text_type: str = DEFAULT_TINY_TEXT_TYPE) -> List[str]:
+        return tiny_text_batch(msgs, text_type=text_type)
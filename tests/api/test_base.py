@@ -0,0 +1,87 @@
+import unittest
+
+from slacktools.api.base import BaseApiObject
+from slacktools.api.events.message import Message
+from slacktools.api.web.conversations import ConversationHistory
+from tests.common import get_test_logger
+from tests.mocks.api.message import build_mock_message_event
+
+
+def build_mock_history(n_messages: int = 3) -> dict:
+    msgs = []
+    for i in range(n_messages):
+        msg = build_mock_message_event(text=f'message {i}', ts=f'1700000000.00000{i}')
+        msg['reactions'] = [{'name': 'thumbsup', 'users': ['U1', 'U2'], 'count': 2}]
+        msgs.append(msg)
+    return {
+        'ok': True,
+        'messages': msgs,
+        'has_more': False,
+        'response_metadata': {'next_cursor': ''},
+    }
+
+
+class TestBaseApiObject(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._log = get_test_logger()
+
+    def tearDown(self) -> None:
+        BaseApiObject.set_lazy_mode(False)
+
+    def test_lazy_matches_eager(self):
+        history_dict = build_mock_history()
+        eager = ConversationHistory(history_dict)
+        BaseApiObject.set_lazy_mode(True)
+        lazy = ConversationHistory(history_dict)
+
+        # Nothing is wrapped until it's accessed
+        self.assertEqual({}, lazy._wrapped)
+        self.assertEqual(eager.messages[1].reactions[0].users, lazy.messages[1].reactions[0].users)
+        self.assertEqual(eager.response_metadata.next_cursor, lazy.response_metadata.next_cursor)
+        self.assertIsNone(lazy.not_a_field)
+        self.assertIsNone(lazy.messages[0].reactions[0].not_a_field)
+        # Access is cached
+        self.assertIs(lazy.messages, lazy.messages)
+        # asdict hands back the original payload
+        self.assertIs(history_dict, lazy.asdict())
+        self.assertEqual(eager.asdict(), lazy.asdict())
+
+    def test_lazy_message(self):
+        scenarios = {
+            'plain': build_mock_message_event(text='hello'),
+            'thread': build_mock_message_event(text='hello', is_thread=True),
+            'with_subtype': {**build_mock_message_event(text='hello'), 'subtype': 'channel_join',
+                             'blocks': [{'type': 'section'}]},
+        }
+        for scen, event_dict in scenarios.items():
+            self._log.debug(f'Working on scenario: {scen}')
+            BaseApiObject.set_lazy_mode(False)
+            eager = Message(event_dict)
+            BaseApiObject.set_lazy_mode(True)
+            lazy = Message(event_dict)
+            # Class defaults and values set before init shouldn't mask the payload
+            for attr in ['type', 'subtype', 'thread_ts', 'is_in_thread', 'message_hash', 'raw_text']:
+                self.assertEqual(getattr(eager, attr), getattr(lazy, attr))
+            self.assertEqual(eager.asdict(), lazy.asdict())
+
+            # Attributes set after init are merged into asdict
+            lazy.take_processed_message(clean_msg='cleaned', raw_message='raw')
+            lazy.text = 'changed'
+            lazy_dict = lazy.asdict()
+            self.assertEqual('cleaned', lazy_dict['cleaned_message'])
+            self.assertEqual('changed', lazy_dict['text'])
+            self.assertEqual('hello', event_dict['text'])
+
+    def test_subclass_mode(self):
+        Message.set_lazy_mode(True)
+        self.assertIn('_data', vars(Message(build_mock_message_event())))
+        self.assertNotIn('_data', vars(ConversationHistory(build_mock_history())))
+        Message.set_lazy_mode(False)
+        self.assertNotIn('_data', vars(Message(build_mock_message_event())))
+        # Fall back to following the base class again
+        del Message._is_lazy
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import pickle
+import unittest
+
+from slacktools.api.compact import (
+    CompactMessage,
+    CompactPin,
+    CompactUserInfo,
+    CompactUserProfile,
+    compact_model,
+)
+from slacktools.api.events.message import Message as MessageEvent
+from slacktools.api.web.users import UserInfo
+from tests.common import get_test_logger
+from tests.mocks.api.message import build_mock_message_event
+
+
+def build_mock_user_info(uid: str = 'UABCDEFG123') -> dict:
+    return {
+        'id': uid,
+        'team_id': 'T12345678',
+        'name': 'someone',
+        'deleted': False,
+        'real_name': 'Some One',
+        'tz_offset': -21600,
+        'profile': {
+            'real_name': 'Some One',
+            'display_name': 'someone',
+            'email': 'someone@example.com',
+            'team': 'T12345678',
+            'fields': {'Xf1': {'value': 'thing'}},
+        },
+        'is_bot': False,
+        'updated': 1700000000,
+        'who_can_share_contact_card': 'EVERYONE',
+    }
+
+
+class TestCompactModels(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._log = get_test_logger()
+
+    def test_user_info(self):
+        user_dict = build_mock_user_info()
+        user = CompactUserInfo(user_dict)
+        self.assertFalse(hasattr(user, '__dict__'))
+        self.assertIsInstance(user.profile, CompactUserProfile)
+        self.assertEqual('someone@example.com', user.profile.email)
+        # Unknown fields land in the overflow dict
+        self.assertEqual('EVERYONE', user.who_can_share_contact_card)
+        self.assertEqual({'who_can_share_contact_card': 'EVERYONE'}, user._extra)
+        self.assertIsNone(user.color)
+        self.assertIsNone(user.not_a_field)
+        self.assertEqual(user_dict, user.asdict())
+        self.assertEqual(UserInfo(user_dict).asdict(), user.asdict())
+        self.assertEqual(repr(UserInfo(user_dict)).replace('UserInfo', 'CompactUserInfo'), repr(user))
+        self.assertEqual(user_dict, pickle.loads(pickle.dumps(user)).asdict())
+
+    def test_interning(self):
+        users = [CompactUserInfo(build_mock_user_info(uid=''.join(['U', 'ABC', '123']))) for _ in range(2)]
+        self.assertIs(users[0].id, users[1].id)
+        self.assertIs(users[0].team_id, users[1].profile.team)
+
+    def test_conversion(self):
+        scenarios = {
+            'str_int': ({'tz_offset': '-3600'}, 'tz_offset', -3600),
+            'str_bool': ({'is_bot': 'false'}, 'is_bot', False),
+            'int_bool': ({'deleted': 1}, 'deleted', True),
+            'bad_int': ({'updated': 'soon'}, 'updated', 'soon'),
+            'none': ({'updated': None}, 'updated', None),
+        }
+        for scen, (user_dict, attr, expected) in scenarios.items():
+            self._log.debug(f'Working on scenario: {scen}')
+            self.assertEqual(expected, getattr(CompactUserInfo(user_dict), attr))
+
+    def test_nested_lists(self):
+        msg_dict = {
+            'type': 'message',
+            'user': 'U123',
+            'text': 'hi',
+            'ts': '1700000000.000100',
+            'reactions': [{'name': 'wave', 'users': ['U1', 'U2'], 'count': 2}],
+        }
+        msg = CompactMessage(msg_dict)
+        self.assertEqual(['U1', 'U2'], msg.reactions[0].users)
+        self.assertEqual(msg_dict, msg.asdict())
+        pin = CompactPin({'channel': 'C1', 'created': 1, 'message': msg_dict})
+        self.assertEqual('hi', pin.message.text)
+
+    def test_defaults_and_setattr(self):
+        compact_event_cls = compact_model(MessageEvent)
+        self.assertIs(compact_event_cls, compact_model(MessageEvent))
+        event = compact_event_cls(build_mock_message_event(text='hello'))
+        self.assertFalse(event.is_in_thread)
+        event.text = 'changed'
+        event.something_else = 1
+        self.assertEqual('changed', event.asdict()['text'])
+        self.assertEqual(1, event.asdict()['something_else'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,17 @@
 from typing import Dict
 import unittest
 
+from slacktools.block_kit.base import BaseElement
 from slacktools.block_kit.blocks import (
+    ActionsBlock,
+    ButtonSectionBlock,
     DividerBlock,
     HeaderBlock,
+    MarkdownContextBlock,
+    MultiStaticSelectSectionBlock,
+    MultiUserSelectSectionBlock,
+    SectionBlock,
+    StaticSelectSectionBlock,
 )
 from slacktools.block_kit.elements.display import (
     ImageElement,
@@ -11,6 +19,7 @@ from slacktools.block_kit.elements.display import (
     PlainTextElement,
 )
 from slacktools.block_kit.elements.formatters import TextFormatter
+from slacktools.block_kit.elements.input import ButtonElement
 
 from .common import (
     get_test_logger,
@@ -76,6 +85,54 @@ class TestBlockKit(unittest.TestCase):
         resp = TextFormatter.build_link(url=url, link_name=name)
         self.assertEqual(f'<{url}|{name}>', resp)
 
+    def test_asdict(self):
+        def reflective_asdict(elem: BaseElement) -> Dict:
+            # The generic rendering asdict's fast paths have to match
+            resp_dict = {}
+            for k, v in vars(elem).items():
+                if k.startswith('_'):
+                    continue
+                if isinstance(v, BaseElement):
+                    resp_dict[k] = reflective_asdict(v)
+                elif isinstance(v, list):
+                    resp_dict[k] = [reflective_asdict(x) if isinstance(x, BaseElement) else x for x in v]
+                else:
+                    resp_dict[k] = v
+            return resp_dict
+
+        odd_section = SectionBlock(fields=[PlainTextElement('a'), MarkdownTextElement('b')])
+        # Values that don't match their annotations are rendered all the same
+        odd_section.accessory = [ButtonElement('c'), 'd']
+        odd_text = PlainTextElement('e')
+        odd_text.text = MarkdownTextElement('f')
+        scenarios = {
+            'button_section': ButtonSectionBlock('text', button_text='btn', value='val'),
+            'static_select': StaticSelectSectionBlock('pick', option_pairs=[('a', '1'), ('b', '2')],
+                                                      placeholder='choose', initial_option_pair=('a', '1')),
+            'multi_static_select': MultiStaticSelectSectionBlock('pick', option_pairs=[('a', '1')], max_selected=1),
+            'multi_user_select': MultiUserSelectSectionBlock('users', initial_users=['U1', 'U2']),
+            'context': MarkdownContextBlock(['one', 'two']),
+            'actions': ActionsBlock([ButtonElement('x', action_id='x'), ButtonElement('y', value='y')]),
+            'odd_section': odd_section,
+            'odd_text': odd_text,
+        }
+        for scen, elem in scenarios.items():
+            self._log.debug(f'Running scenario: {scen}')
+            exp = reflective_asdict(elem)
+            resp = elem.asdict()
+            self.assertDictEqual(exp, resp)
+            self.assertEqual(list(exp.keys()), list(resp.keys()))
+
+    def test_freeze(self):
+        block = ButtonSectionBlock('text', button_text='btn', value='val')
+        exp = block.asdict()
+        self.assertFalse(block.is_frozen)
+        self.assertIs(block, block.freeze())
+        self.assertTrue(block.is_frozen)
+        self.assertDictEqual(exp, block.asdict())
+        self.assertIs(block.asdict(), block.asdict())
+        self.assertNotIn('_frozen_dict', block.asdict())
+
 
 if __name__ == '__main__':
     unittest.main()
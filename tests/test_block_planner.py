@@ -0,0 +1,182 @@
+import json
+import unittest
+from unittest.mock import MagicMock
+
+from slacktools.block_kit.base import ExceededMaxLengthException
+from slacktools.block_kit.blocks import (
+    ActionsBlock,
+    DividerBlock,
+    HeaderBlock,
+    MarkdownContextBlock,
+    MarkdownSectionBlock,
+)
+from slacktools.block_kit.elements.display import PlainTextElement
+from slacktools.block_kit.elements.input import ButtonElement
+from slacktools.block_kit.planner import (
+    SPLIT_THREAD,
+    plan_message,
+    split_text,
+)
+from slacktools.slack_methods import SlackMethods
+
+from .common import (
+    get_test_logger,
+    make_patcher,
+    random_string,
+)
+
+
+def _build_entry(title: str):
+    """Builds blocks like a help entry, with a row of buttons under it"""
+    return [
+        HeaderBlock(PlainTextElement(title)),
+        MarkdownSectionBlock(f'_{random_string()}_'),
+        MarkdownContextBlock([random_string()]),
+        ActionsBlock([ButtonElement('Run', value=title)]),
+        DividerBlock(),
+    ]
+
+
+class TestMessagePlanner(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._log = get_test_logger()
+
+    def test_plan_message(self):
+        scenarios = {
+            'fits': (5, 1),
+            'at the limit': (10, 1),
+            'over': (11, 2),
+            'way over': (45, 5),
+        }
+        for name, (n_entries, n_parts) in scenarios.items():
+            self._log.debug(f'Running scenario: {name}')
+            blocks = []
+            for i in range(n_entries):
+                blocks += _build_entry(f'entry {i}')
+            plan = plan_message(blocks)
+            self.assertEqual(n_parts, plan.n_parts)
+            for part in plan.parts:
+                self.assertLessEqual(len(part), 50)
+            if plan.is_split:
+                # Every cut came after a divider, so follow-up parts open with a header
+                for part in plan.parts[1:]:
+                    self.assertEqual('header', part[0]['type'])
+                self.assertEqual(len(blocks), plan.n_blocks)
+            else:
+                self.assertEqual([x.asdict() for x in blocks], plan.parts[0])
+
+    def test_plan_keeps_actions_with_block(self):
+        self._log.debug('Running scenario: no dividers to cut at')
+        blocks = [MarkdownSectionBlock(random_string()) for _ in range(50)]
+        blocks += [ActionsBlock([ButtonElement('Go')])]
+        blocks += [MarkdownSectionBlock(random_string()) for _ in range(10)]
+        plan = plan_message(blocks)
+        self.assertEqual(2, plan.n_parts)
+        self.assertEqual(49, len(plan.parts[0]))
+        self.assertEqual(['section', 'actions'], [x['type'] for x in plan.parts[1][:2]])
+
+    def test_plan_long_text(self):
+        # Elements check their own text, but blocks built as dicts don't get that
+        lines = [random_string(99) for _ in range(100)]
+        plan = plan_message([{'type': 'section', 'text': {'type': 'mrkdwn', 'text': '\n'.join(lines)}}])
+        self.assertEqual(1, plan.n_parts)
+        self.assertGreater(len(plan.parts[0]), 1)
+        texts = [x['text']['text'] for x in plan.parts[0]]
+        for text in texts:
+            self.assertLessEqual(len(text), 3000)
+        self.assertEqual('\n'.join(lines), '\n'.join(texts))
+
+        self._log.debug('Running scenario: no line breaks')
+        self.assertEqual(['aaa', 'aaa', 'a'], split_text('a' * 7, 3))
+
+        self._log.debug('Running scenario: context text over the limit')
+        with self.assertRaises(ExceededMaxLengthException):
+            plan_message([{'type': 'context', 'elements': [{'type': 'mrkdwn', 'text': 'a' * 3001}]}])
+
+
+class TestSendSplitMessage(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._log = get_test_logger()
+
+    def setUp(self) -> None:
+        self.mock_webclient = make_patcher(self, 'slacktools.slack_methods.WebClient')
+        self.mock_bot_webclient = MagicMock(name='bot')
+        self.mock_bot_webclient.auth_test.return_value = {'bot_id': 'B123', 'user_id': 'U123'}
+        self.mock_bot_webclient.chat_postMessage.side_effect = \
+            lambda **kwargs: {'ok': True, 'ts': f'{self.mock_bot_webclient.chat_postMessage.call_count}.0'}
+        self.mock_webclient.side_effect = [MagicMock(name='user'), self.mock_bot_webclient]
+        self.smethod = SlackMethods(props={'team': 'test', 'xoxp-token': 'xoxp', 'xoxb-token': 'xoxb'},
+                                    main_channel='C123')
+
+    def test_send_message_split(self):
+        blocks = []
+        for i in range(25):
+            blocks += _build_entry(f'entry {i}')
+
+        scenarios = {
+            'sequential': ({}, [None, None, None]),
+            'thread': ({'split_mode': SPLIT_THREAD}, [None, '1.0', '1.0']),
+            'background': ({'is_background_split': True}, [None, None, None]),
+        }
+        for name, (kwargs, thread_tss) in scenarios.items():
+            self._log.debug(f'Running scenario: {name}')
+            self.mock_bot_webclient.chat_postMessage.reset_mock()
+            kwargs = {'is_background_split': False, **kwargs}
+            ts = self.smethod.send_message('C123', message='help', blocks=blocks, ret_ts=True, **kwargs)
+            self.assertTrue(self.smethod.wait_for_pending_sends(timeout=5))
+            self.assertEqual('1.0', ts)
+            calls = self.mock_bot_webclient.chat_postMessage.call_args_list
+            self.assertEqual(3, len(calls))
+            self.assertEqual(['help', 'help (continued 2/3)', 'help (continued 3/3)'],
+                             [x.kwargs['text'] for x in calls])
+            self.assertEqual(thread_tss, [x.kwargs.get('thread_ts') for x in calls])
+            n_blocks = [len(json.loads(x.kwargs['blocks'])) for x in calls]
+            self.assertEqual(125, sum(n_blocks))
+
+        self._log.debug('Running scenario: unknown split mode')
+        with self.assertRaises(ValueError):
+            self.smethod.send_message('C123', blocks=blocks, split_mode='sideways')
+
+    def test_send_message_split_failure(self):
+        blocks = []
+        for i in range(25):
+            blocks += _build_entry(f'entry {i}')
+
+        def _post(**kwargs):
+            if self.mock_bot_webclient.chat_postMessage.call_count == 2:
+                raise ConnectionError('slack down')
+            return {'ok': True, 'ts': '1.0'}
+
+        self.mock_bot_webclient.chat_postMessage.side_effect = _post
+        scenarios = {
+            'raised': True,
+            'logged': False,
+        }
+        for name, is_raise in scenarios.items():
+            self._log.debug(f'Running scenario: {name}')
+            self.mock_bot_webclient.chat_postMessage.reset_mock()
+            self.smethod.send_message('C123', message='help', blocks=blocks)
+            if is_raise:
+                # The caller finds out the message was cut short
+                with self.assertRaises(ConnectionError):
+                    self.smethod.wait_for_pending_sends(timeout=5)
+            else:
+                self.assertTrue(self.smethod.wait_for_pending_sends(timeout=5, is_raise=False))
+            # The part after the failed one isn't posted
+            self.assertEqual(2, self.mock_bot_webclient.chat_postMessage.call_count)
+        self.assertTrue(self.smethod.wait_for_pending_sends(timeout=5))
+
+    def test_update_home_tab(self):
+        blocks = [MarkdownSectionBlock(random_string()) for _ in range(100)]
+        self.smethod.update_home_tab('U123', blocks=blocks)
+        view = self.mock_bot_webclient.views_publish.call_args.kwargs['view']
+        self.assertEqual('home', view['type'])
+        self.assertEqual(100, len(view['blocks']))
+        with self.assertRaises(ExceededMaxLengthException):
+            self.smethod.update_home_tab('U123', blocks=blocks + [DividerBlock()])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import json
+import unittest
+
+from slacktools.block_kit.base import ExceededMaxLengthException
+from slacktools.block_kit.blocks import (
+    ActionsBlock,
+    DividerBlock,
+    HeaderBlock,
+    MarkdownContextBlock,
+    MarkdownSectionBlock,
+)
+from slacktools.block_kit.elements.display import PlainTextElement
+from slacktools.block_kit.elements.input import ButtonElement
+from slacktools.block_kit.template import (
+    BlockTemplate,
+    escape_text,
+)
+
+from .common import (
+    get_test_logger,
+    random_string,
+)
+
+
+class TestBlockTemplate(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._log = get_test_logger()
+
+    def test_render(self):
+        slot = BlockTemplate.slot
+        tmpl = BlockTemplate([
+            HeaderBlock(PlainTextElement(slot('title'))),
+            MarkdownSectionBlock([f'*{slot("title")}*', f'_{slot("desc")}_']),
+            MarkdownContextBlock([slot('mention', is_escape=False)]),
+            ActionsBlock([ButtonElement('Details', value=slot('item_id'))]),
+            DividerBlock(),
+        ])
+        self.assertEqual({'title', 'desc', 'mention', 'item_id'}, tmpl.slots)
+
+        scenarios = {
+            'plain': {'title': 'Hello', 'desc': random_string(), 'mention': '<@U123>', 'item_id': 123},
+            'json special chars': {'title': 'a "quoted"\\ title', 'desc': 'line\nbreak\ttab', 'mention': 'é',
+                                   'item_id': '{}'},
+            'slack special chars': {'title': 'Q&A', 'desc': '<b> & </b>', 'mention': '<!here>', 'item_id': '<1>'},
+        }
+        for name, values in scenarios.items():
+            self._log.debug(f'Running scenario: {name}')
+            expected = [
+                HeaderBlock(PlainTextElement(escape_text(values['title']))),
+                MarkdownSectionBlock([f'*{escape_text(values["title"])}*',
+                                      f'_{escape_text(values["desc"])}_']),
+                MarkdownContextBlock([values['mention']]),
+                # Values outside of text objects aren't escaped, so they come back in actions as they were
+                ActionsBlock([ButtonElement('Details', value=str(values['item_id']))]),
+                DividerBlock(),
+            ]
+            rendered = tmpl.render(**values)
+            self.assertEqual([x.asdict() for x in expected], json.loads(rendered))
+            self.assertEqual(json.loads(rendered), tmpl.render_blocks(**values))
+            self.assertEqual(rendered.encode('utf-8'), tmpl.render_bytes(**values))
+
+    def test_render_errors(self):
+        slot = BlockTemplate.slot
+        tmpl = BlockTemplate([
+            HeaderBlock(PlainTextElement(f'Score: {slot("score")}')),
+            ActionsBlock([ButtonElement(slot('label'), value=slot('value'))]),
+        ])
+        ok_values = {'score': 10, 'label': 'Go', 'value': 'x'}
+        tmpl.render(**ok_values)
+
+        self._log.debug('Running scenario: missing slot')
+        with self.assertRaises(ValueError):
+            tmpl.render(score=10, label='Go')
+
+        scenarios = {
+            # 'Score: ' counts towards the header's 150 char limit
+            'header text': {'score': 'x' * 144},
+            'button text': {'label': 'x' * 76},
+            # Escaped length is what's checked
+            'escaped header text': {'score': '&' * 30},
+            'button value': {'value': '&' * 2001},
+        }
+        for name, values in scenarios.items():
+            self._log.debug(f'Running scenario: {name}')
+            with self.assertRaises(ExceededMaxLengthException):
+                tmpl.render(**{**ok_values, **values})
+        # Right at the limit passes
+        tmpl.render(**{**ok_values, 'score': 'x' * 143})
+        tmpl.render(**{**ok_values, 'value': '&' * 2000})
+
+        self._log.debug('Running scenario: invalid slot name')
+        with self.assertRaises(ValueError):
+            slot(f'bad{BlockTemplate.slot("name")}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import unittest
+from unittest.mock import MagicMock
+
+from slacktools.block_kit.base import (
+    VALIDATE_DEBUG,
+    VALIDATE_DEFERRED,
+    VALIDATE_EAGER,
+    VALIDATE_OFF,
+    BaseElement,
+    ExceededMaxLengthException,
+)
+from slacktools.block_kit.blocks import (
+    ActionsBlock,
+    DividerBlock,
+    MarkdownContextBlock,
+    MarkdownSectionBlock,
+    StaticSelectSectionBlock,
+)
+from slacktools.block_kit.elements.input import ButtonElement
+from slacktools.block_kit.validator import (
+    BlockValidationError,
+    BlockViolation,
+    validate_blocks,
+)
+from slacktools.slack_methods import SlackMethods
+
+from .common import (
+    get_test_logger,
+    make_patcher,
+)
+
+
+class TestBlockValidator(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._log = get_test_logger()
+
+    def tearDown(self) -> None:
+        BaseElement.set_validation_mode(VALIDATE_EAGER)
+
+    def test_validate_blocks(self):
+        scenarios = {
+            'valid': (
+                [MarkdownSectionBlock('hi'), DividerBlock(), ActionsBlock([ButtonElement('Go')])],
+                []
+            ),
+            'text': (
+                [{'type': 'section', 'text': {'type': 'mrkdwn', 'text': 'a' * 3001}}],
+                [BlockViolation('blocks[0].text.text', 'exceeded the max length allowed: 3001 / 3000')]
+            ),
+            'button text & value': (
+                [{'type': 'actions', 'elements': [
+                    {'type': 'button', 'text': {'type': 'plain_text', 'text': 'a' * 76}, 'value': 'v' * 2001}
+                ]}],
+                [
+                    BlockViolation('blocks[0].elements[0].text.text', 'exceeded the max length allowed: 76 / 75'),
+                    BlockViolation('blocks[0].elements[0].value', 'exceeded the max length allowed: 2001 / 2000'),
+                ]
+            ),
+            'option text & count': (
+                [{'type': 'section', 'text': {'type': 'mrkdwn', 'text': 'pick'}, 'accessory': {
+                    'type': 'static_select', 'action_id': 'a',
+                    'options': [{'text': {'type': 'plain_text', 'text': 'o' * 76}, 'value': f'{i}'}
+                                for i in range(101)]
+                }}],
+                [BlockViolation('blocks[0].accessory.options', 'exceeded the max length allowed: 101 / 100')] +
+                [BlockViolation(f'blocks[0].accessory.options[{i}].text.text',
+                                'exceeded the max length allowed: 76 / 75') for i in range(101)]
+            ),
+            'duplicate ids': (
+                [
+                    {'type': 'divider', 'block_id': 'b1'},
+                    {'type': 'divider', 'block_id': 'b1'},
+                    {'type': 'actions', 'elements': [{'type': 'button', 'action_id': 'x'},
+                                                     {'type': 'button', 'action_id': 'x'}]},
+                    # Repeating an action_id in another block is fine
+                    {'type': 'actions', 'elements': [{'type': 'button', 'action_id': 'x'}]},
+                ],
+                [
+                    BlockViolation('blocks[1].block_id', 'duplicate block_id: b1'),
+                    BlockViolation('blocks[2].elements[1].action_id', 'duplicate action_id in block: x'),
+                ]
+            ),
+            'too many blocks': (
+                [DividerBlock() for _ in range(51)],
+                [BlockViolation('blocks', 'exceeded the max blocks allowed: 51 / 50')]
+            ),
+        }
+        for name, (blocks, expected) in scenarios.items():
+            self._log.debug(f'Running scenario: {name}')
+            self.assertEqual(expected, validate_blocks(blocks))
+
+    def test_validation_modes(self):
+        long_text = 'a' * 3001
+        BaseElement.set_validation_mode(VALIDATE_EAGER)
+        with self.assertRaises(ExceededMaxLengthException):
+            MarkdownSectionBlock(long_text)
+
+        for mode in [VALIDATE_DEFERRED, VALIDATE_DEBUG, VALIDATE_OFF]:
+            self._log.debug(f'Running scenario: {mode}')
+            BaseElement.set_validation_mode(mode)
+            # Nothing checked at construction
+            blocks = [
+                MarkdownSectionBlock(long_text),
+                MarkdownContextBlock([str(x) for x in range(11)]),
+                StaticSelectSectionBlock('pick', option_pairs=[(str(x), str(x)) for x in range(101)]),
+            ]
+            self.assertEqual(3, len(validate_blocks(blocks)))
+
+        with self.assertRaises(ValueError):
+            BaseElement.set_validation_mode('sometimes')
+
+    def test_validate_before_send(self):
+        mock_webclient = make_patcher(self, 'slacktools.slack_methods.WebClient')
+        mock_bot_webclient = MagicMock(name='bot')
+        mock_bot_webclient.auth_test.return_value = {'bot_id': 'B123', 'user_id': 'U123'}
+        mock_bot_webclient.chat_postMessage.return_value = {'ok': True, 'ts': '1.0'}
+        mock_webclient.side_effect = [MagicMock(name='user'), mock_bot_webclient]
+        smethod = SlackMethods(props={'team': 'test', 'xoxp-token': 'xoxp', 'xoxb-token': 'xoxb'},
+                               main_channel='C123')
+
+        scenarios = {
+            VALIDATE_DEFERRED: True,
+            VALIDATE_DEBUG: __debug__,
+            VALIDATE_OFF: False,
+        }
+        for mode, is_raised in scenarios.items():
+            self._log.debug(f'Running scenario: {mode}')
+            BaseElement.set_validation_mode(mode)
+            mock_bot_webclient.chat_postMessage.reset_mock()
+            blocks = [MarkdownContextBlock([str(x) for x in range(11)]), ActionsBlock([ButtonElement('a' * 76)])]
+            if is_raised:
+                with self.assertRaises(BlockValidationError) as ctx:
+                    smethod.send_message('C123', blocks=blocks)
+                # Every violation gets reported at once
+                self.assertEqual(2, len(ctx.exception.violations))
+                mock_bot_webclient.chat_postMessage.assert_not_called()
+            else:
+                smethod.send_message('C123', blocks=blocks)
+                mock_bot_webclient.chat_postMessage.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
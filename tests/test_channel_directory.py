@@ -0,0 +1,205 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from slacktools.channel_directory import ChannelDirectory
+from slacktools.event_router import EventRouter
+from slacktools.slackbot import SlackBotBase
+
+from .common import (
+    get_test_logger,
+    make_patcher,
+)
+
+
+def _build_resp(data):
+    resp = MagicMock(name='SlackResponse')
+    resp.data = data
+    return resp
+
+
+class TestChannelDirectory(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._log = get_test_logger()
+
+    def setUp(self) -> None:
+        self.mock_bot = MagicMock(name='WebClient(Bot)')
+        self.mock_bot.conversations_list.side_effect = [
+            _build_resp({
+                'channels': [
+                    {'id': 'C1', 'name': 'general', 'is_archived': False},
+                    {'id': 'C2', 'name': 'random', 'is_archived': False},
+                ],
+                'response_metadata': {'next_cursor': 'page2'}
+            }),
+            _build_resp({
+                'channels': [
+                    {'id': 'C3', 'name': 'old-stuff', 'is_archived': True},
+                ],
+                'response_metadata': {'next_cursor': ''}
+            }),
+        ]
+        self.mock_bot.conversations_members.side_effect = [
+            _build_resp({'members': ['U1', 'U2'], 'response_metadata': {'next_cursor': 'next'}}),
+            _build_resp({'members': ['U3'], 'response_metadata': {'next_cursor': ''}}),
+        ]
+        self.directory = ChannelDirectory(self.mock_bot)
+
+    def test_load(self):
+        self.mock_bot.conversations_list.assert_not_called()
+        self.assertEqual('C2', self.directory.get_channel_id('#random'))
+        self.assertEqual('general', self.directory.get_channel('C1').name)
+        self.assertEqual(2, len(self.directory.get_channels()))
+        self.assertEqual(3, len(self.directory.get_channels(is_include_archived=True)))
+        # Subsequent lookups shouldn't hit the API
+        self.directory.get_channel_id('general')
+        self.assertEqual(2, self.mock_bot.conversations_list.call_count)
+
+    def test_members(self):
+        self.assertSetEqual({'U1', 'U2', 'U3'}, self.directory.get_members('C1'))
+        self.assertTrue(self.directory.is_member('C1', 'U3'))
+        self.assertEqual(2, self.mock_bot.conversations_members.call_count)
+
+        self.directory.handle_event({'event': {'type': 'member_joined_channel', 'user': 'U4', 'channel': 'C1'}})
+        self.directory.handle_event({'type': 'member_left_channel', 'user': 'U1', 'channel': 'C1'})
+        self.assertSetEqual({'U2', 'U3', 'U4'}, self.directory.get_members('C1'))
+        self.assertEqual(2, self.mock_bot.conversations_members.call_count)
+
+    def test_channel_events(self):
+        self.directory.load()
+        scenarios = {
+            'created': {
+                'event': {'type': 'channel_created',
+                          'channel': {'id': 'C4', 'name': 'fresh', 'created': 1360782804, 'creator': 'U1'}},
+                'check': lambda: self.assertEqual('C4', self.directory.get_channel_id('fresh'))
+            },
+            'rename': {
+                'event': {'type': 'channel_rename', 'channel': {'id': 'C2', 'name': 'not-random', 'created': 1}},
+                'check': lambda: (self.assertIsNone(self.directory.get_channel_id('random')),
+                                  self.assertEqual('C2', self.directory.get_channel_id('not-random')))
+            },
+            'archive': {
+                'event': {'type': 'channel_archive', 'channel': 'C1', 'user': 'U1'},
+                'check': lambda: self.assertTrue(self.directory.get_channel('C1').is_archived)
+            },
+            'unarchive': {
+                'event': {'type': 'channel_unarchive', 'channel': 'C3', 'user': 'U1'},
+                'check': lambda: self.assertFalse(self.directory.get_channel('C3').is_archived)
+            },
+            'deleted': {
+                'event': {'type': 'channel_deleted', 'channel': 'C3'},
+                'check': lambda: self.assertIsNone(self.directory.get_channel('C3'))
+            },
+        }
+        for name, scen_dict in scenarios.items():
+            self._log.debug(f'Running scenario: {name}')
+            self.assertTrue(self.directory.handle_event(scen_dict['event']))
+            scen_dict['check']()
+        self.assertSetEqual({'U1'}, self.directory.get_members('C4'))
+        self.assertFalse(self.directory.handle_event({'type': 'reaction_added'}))
+        self.assertEqual(2, self.mock_bot.conversations_list.call_count)
+
+    def test_max_age(self):
+        mock_time = make_patcher(self, 'slacktools.channel_directory.time')
+        mock_time.monotonic.return_value = 1000.0
+        members_resp = _build_resp({'members': ['U1'], 'response_metadata': {'next_cursor': ''}})
+        self.mock_bot.conversations_members.side_effect = None
+        self.mock_bot.conversations_members.return_value = members_resp
+        self.directory.get_members('C1')
+        self.directory.load()
+
+        scenarios = {
+            # (seconds later, whether it's reloaded)
+            'fresh': (ChannelDirectory.DEFAULT_MAX_AGE, False),
+            'expired': (ChannelDirectory.DEFAULT_MAX_AGE + 1, True),
+        }
+        for name, (seconds, is_reloaded) in scenarios.items():
+            self._log.debug(f'Running scenario: {name}')
+            self.mock_bot.conversations_list.side_effect = None
+            self.mock_bot.conversations_list.return_value = _build_resp({'channels': [{'id': 'C9', 'name': 'new'}]})
+            self.mock_bot.conversations_members.reset_mock()
+            self.mock_bot.conversations_list.reset_mock()
+            mock_time.monotonic.return_value = 1000.0 + seconds
+            self.directory.get_members('C1')
+            self.directory.get_channel('C9')
+            self.assertEqual(is_reloaded, self.mock_bot.conversations_members.called)
+            self.assertEqual(is_reloaded, self.mock_bot.conversations_list.called)
+
+        # Registering with a router alone doesn't stop the reloads - only opting into trusting the events does
+        scenarios = {
+            'registered': ({}, True),
+            'trusting events': ({'max_age': None}, False),
+        }
+        for name, (kwargs, is_reloaded) in scenarios.items():
+            self._log.debug(f'Running scenario: {name}')
+            self.directory.register_handlers(EventRouter(), **kwargs)
+            self.mock_bot.conversations_members.reset_mock()
+            mock_time.monotonic.return_value += 1e6
+            self.directory.get_members('C1')
+            self.assertEqual(is_reloaded, self.mock_bot.conversations_members.called)
+
+    def test_bot_refreshes_members(self):
+        mock_webclient = make_patcher(self, 'slacktools.slack_methods.WebClient')
+        mock_time = make_patcher(self, 'slacktools.channel_directory.time')
+        mock_time.monotonic.return_value = 1000.0
+        self.mock_bot.conversations_members.side_effect = [
+            _build_resp({'members': ['U1'], 'response_metadata': {'next_cursor': ''}}),
+            _build_resp({'members': ['U1', 'U2'], 'response_metadata': {'next_cursor': ''}}),
+        ]
+        mock_webclient.side_effect = [MagicMock(name='WebClient(User)'), self.mock_bot]
+        props = {'team': 'test-team', 'xoxp-token': 'xoxp...', 'xoxb-token': 'xoxb...'}
+        bot = SlackBotBase(props=props, triggers=['hello'], main_channel='main', admins=[])
+        self.assertEqual(ChannelDirectory.DEFAULT_MAX_AGE, bot.channels.max_age)
+        # No member events are routed to the bot, so the memberships are reloaded once they expire
+        self.assertSetEqual({'U1'}, bot.channels.get_members('C1'))
+        mock_time.monotonic.return_value += ChannelDirectory.DEFAULT_MAX_AGE + 1
+        self.assertSetEqual({'U1', 'U2'}, bot.channels.get_members('C1'))
+        self.assertEqual(2, self.mock_bot.conversations_members.call_count)
+
+    def test_fetch_outside_lock(self):
+        self.directory.load()
+        handled = []
+
+        def _handle_from_other_thread():
+            handled.append(self.directory.handle_event({'type': 'channel_archive', 'channel': 'C1'}))
+
+        def _members(**kwargs):
+            # Another thread's event isn't held up by the fetch
+            thread = threading.Thread(target=_handle_from_other_thread)
+            thread.start()
+            thread.join(timeout=2)
+            return _build_resp({'members': ['U1'], 'response_metadata': {'next_cursor': ''}})
+
+        self.mock_bot.conversations_members.side_effect = _members
+        self.assertSetEqual({'U1'}, self.directory.get_members('C1'))
+        self.assertEqual([True], handled)
+        self.assertTrue(self.directory.get_channel('C1').is_archived)
+
+    def test_member_event_during_fetch(self):
+        fetched = []
+
+        def _members(**kwargs):
+            # The fetch may or may not include a member who joins while it's running
+            fetched.append(['U1'] if len(fetched) == 0 else ['U1', 'U9'])
+            if len(fetched) <= n_events:
+                self.directory.handle_event({'type': 'member_joined_channel', 'user': 'U9', 'channel': 'C1'})
+            return _build_resp({'members': fetched[-1], 'response_metadata': {'next_cursor': ''}})
+
+        self.mock_bot.conversations_members.side_effect = _members
+        scenarios = {
+            # (events during fetches, fetches made, whether the members are kept)
+            'changed once': (1, 2, True),
+            'kept changing': (ChannelDirectory.MAX_MEMBER_FETCHES, ChannelDirectory.MAX_MEMBER_FETCHES, False),
+        }
+        for name, (n_events, n_fetches, is_kept) in scenarios.items():
+            self._log.debug(f'Running scenario: {name}')
+            fetched.clear()
+            self.directory.invalidate_members()
+            self.assertSetEqual({'U1', 'U9'}, self.directory.get_members('C1'))
+            self.assertEqual(n_fetches, len(fetched))
+            self.assertEqual(is_kept, 'C1' in self.directory._members)
+
+
+if __name__ == '__main__':
+    unittest.main()
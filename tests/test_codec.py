@@ -0,0 +1,91 @@
+import json
+import unittest
+from unittest.mock import MagicMock
+
+from slacktools import codec
+from slacktools.api.events.message import Message
+from slacktools.block_kit.base import encode_blocks
+from slacktools.block_kit.blocks import (
+    ActionsBlock,
+    DividerBlock,
+    MarkdownContextBlock,
+    MarkdownSectionBlock,
+)
+from slacktools.block_kit.elements.input import ButtonElement
+from slacktools.event_router import EventRouter
+from slacktools.slack_methods import SlackMethods
+
+from .common import (
+    get_test_logger,
+    make_patcher,
+)
+from .mocks.api.message import build_mock_message_event
+
+
+def build_blocks():
+    return [
+        MarkdownSectionBlock(['*Hello* there', 'ünïcode :tada:']),
+        DividerBlock(),
+        MarkdownContextBlock('some context'),
+        ActionsBlock([ButtonElement('Click', action_id='click'), ButtonElement('Close', action_id='close')]),
+        {'type': 'divider'},
+    ]
+
+
+class TestCodec(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._log = get_test_logger()
+
+    def tearDown(self) -> None:
+        codec.set_codec(codec.OrjsonCodec() if codec.orjson is not None else codec.StdlibCodec())
+
+    def test_codecs(self):
+        payload = {'a': [1, 2.5, None, True], 'b': {'c': 'ünïcode'}}
+        for name in codec.CODECS.keys():
+            self._log.debug(f'Running scenario: {name}')
+            codec.set_codec(name)
+            self.assertEqual(name, codec.get_codec().name)
+            for encoded in [codec.dumps(payload), codec.dumpb(payload), memoryview(codec.dumpb(payload))]:
+                self.assertEqual(payload, codec.loads(encoded))
+            self.assertEqual(json.dumps(payload, separators=(',', ':'), ensure_ascii=False), codec.dumps(payload))
+        with self.assertRaises(ValueError):
+            codec.set_codec('not-a-codec')
+
+    def test_encode_blocks(self):
+        blocks = build_blocks()
+        expected = [x.asdict() if not isinstance(x, dict) else x for x in blocks]
+        for name in codec.CODECS.keys():
+            self._log.debug(f'Running scenario: {name}')
+            codec.set_codec(name)
+            self.assertEqual(expected, json.loads(encode_blocks(blocks)))
+        with self.assertRaises(TypeError):
+            encode_blocks([object()])
+
+    def test_decoding_events(self):
+        event_dict = build_mock_message_event(text='hello')
+        raw = codec.dumpb({'event': event_dict})
+        msg = Message.from_json(codec.dumpb(event_dict))
+        self.assertEqual('hello', msg.text)
+        self.assertEqual(event_dict['ts'], EventRouter().parse(raw).ts)
+        self.assertEqual(event_dict['ts'], EventRouter().parse(raw.decode('utf-8')).ts)
+
+    def test_send_message(self):
+        mock_webclient = make_patcher(self, 'slacktools.slack_methods.WebClient')
+        mock_bot = MagicMock(name='bot')
+        mock_bot.auth_test.return_value = {'bot_id': 'B1', 'user_id': 'U1'}
+        mock_webclient.side_effect = [MagicMock(name='user'), mock_bot]
+        st = SlackMethods({'team': 'team', 'xoxp-token': 'xoxp', 'xoxb-token': 'xoxb'}, main_channel='C1')
+
+        blocks = build_blocks()
+        st.send_message('C1', message='hi', blocks=blocks)
+        sent_blocks = mock_bot.chat_postMessage.call_args.kwargs['blocks']
+        self.assertIsInstance(sent_blocks, str)
+        self.assertEqual(SlackMethods._dictify_blocks(blocks), json.loads(sent_blocks))
+        # Pre-encoded blocks pass straight through
+        st.update_message('C1', ts='123', blocks=sent_blocks)
+        self.assertIs(sent_blocks, mock_bot.chat_update.call_args.kwargs['blocks'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,38 @@
+from contextlib import contextmanager
+import os
+import tempfile
+import threading
+from typing import Optional
 from unittest import (
     TestCase,
     main,
 )
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import (
+    Integer,
+    String,
+    select,
+    text,
+)
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import (
+    DeclarativeBase,
+    Mapped,
+    mapped_column,
+)
 
 from slacktools.db_engine import (
+    DEFAULT_POOL_SETTINGS,
+    SQLITE_PERFORMANCE_PRAGMAS,
+    ErrorLogWriter,
     PSQLClient,
     SQLiteClient,
 )
+from slacktools.metrics import command_scope
 
 from .common import (
     get_test_logger,
@@ -43,6 +69,18 @@ class TestPSQLClient(TestCase):
         self.mock_url.create.assert_called()
         self.mock_sessionmacher.assert_called()
 
+    def test_pool_settings(self):
+        _, ps_kwargs = self.mock_create_engine.call_args_list[0]
+        self.assertEqual(DEFAULT_POOL_SETTINGS, ps_kwargs)
+        PSQLClient(props={'usr': 'u', 'pwd': 'p', 'host': 'h', 'database': 'd', 'port': 1}, pool_size=2,
+                   pool_pre_ping=False)
+        _, ps_kwargs = self.mock_create_engine.call_args
+        self.assertEqual({**DEFAULT_POOL_SETTINGS, 'pool_size': 2, 'pool_pre_ping': False}, ps_kwargs)
+        # In-memory sqlite doesn't take the size settings, and its connection can't be recycled without losing the db
+        SQLiteClient(props={'database': ':memory:'})
+        _, sl_kwargs = self.mock_create_engine.call_args
+        self.assertEqual({'pool_pre_ping'}, set(sl_kwargs.keys()))
+
     def test_session_mgr(self):
         for eng in [self.ps_eng, self.sl_eng]:
             # Normal ops
@@ -59,5 +97,276 @@ class TestPSQLClient(TestCase):
             self.mock_sessionmacher.reset_mock()
 
 
+class Base(DeclarativeBase):
+    pass
+
+
+class TableErrorLog(Base):
+    __tablename__ = 'error_log'
+
+    error_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    error_type: Mapped[str] = mapped_column(String)
+    error_class: Mapped[str] = mapped_column(String)
+    error_text: Mapped[str] = mapped_column(String)
+    error_traceback: Mapped[str] = mapped_column(String)
+    command: Mapped[str] = mapped_column(String, nullable=True)
+    n_occurrences: Mapped[int] = mapped_column(Integer, default=1)
+
+
+class TableUser(Base):
+    __tablename__ = 'user'
+
+    user_id: Mapped[str] = mapped_column(String, primary_key=True)
+    name: Mapped[Optional[str]] = mapped_column(String)
+    n_msgs: Mapped[Optional[int]] = mapped_column(Integer)
+
+
+def _raise(msg: str):
+    try:
+        raise ValueError(msg)
+    except ValueError as err:
+        return err
+
+
+class TestDBClientSessions(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.log = get_test_logger()
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.eng = SQLiteClient(props={'database': os.path.join(self.tmpdir.name, 'test.db')}, pool_size=1,
+                                max_overflow=0, pool_timeout=0.05)
+        with self.eng.session_mgr() as session:
+            session.execute(text('CREATE TABLE t (x INTEGER)'))
+
+    def tearDown(self) -> None:
+        self.eng.engine.dispose()
+        self.tmpdir.cleanup()
+
+    def _count_rows(self) -> int:
+        with self.eng.session_mgr() as session:
+            return session.execute(text('SELECT COUNT(*) FROM t')).scalar()
+
+    def test_thread_scoped_sessions(self):
+        sessions = []
+
+        def _insert():
+            for _ in range(2):
+                with self.eng.session_mgr(is_thread_scoped=True) as session:
+                    session.execute(text('INSERT INTO t VALUES (1)'))
+                    sessions.append(session)
+            self.eng.remove_thread_session()
+
+        _insert()
+        thread = threading.Thread(target=_insert)
+        thread.start()
+        thread.join()
+        # Reused within each thread, separate across them
+        self.assertIs(sessions[0], sessions[1])
+        self.assertIs(sessions[2], sessions[3])
+        self.assertIsNot(sessions[0], sessions[2])
+        self.assertEqual(4, self._count_rows())
+        # The connection went back to the pool after each commit
+        self.assertEqual(0, self.eng.get_pool_stats()['checked_out'])
+
+    def test_session_scope(self):
+        with self.eng.session_scope() as outer:
+            outer.execute(text('INSERT INTO t VALUES (1)'))
+            with self.eng.session_scope() as inner:
+                self.assertIs(outer, inner)
+                inner.execute(text('INSERT INTO t VALUES (2)'))
+            # Nested scopes don't commit
+            self.assertTrue(outer.in_transaction())
+        self.assertEqual(2, self._count_rows())
+
+        with self.assertRaises(ValueError):
+            with self.eng.session_scope() as outer:
+                outer.execute(text('INSERT INTO t VALUES (3)'))
+                with self.eng.session_scope():
+                    raise ValueError('rollback')
+        self.assertEqual(2, self._count_rows())
+
+    def test_pool_stats(self):
+        self.eng.pool_stats.reset()
+        self.assertEqual(0, self._count_rows())
+        stats = self.eng.get_pool_stats()
+        self.assertEqual((1, 1, 0), (stats['checkout'], stats['checkin'], stats['timeout']))
+        self.assertEqual(1, stats['wait']['count'])
+
+        # With the only connection checked out, the next checkout times out
+        with self.eng.engine.connect():
+            with self.assertRaises(PoolTimeoutError):
+                self.eng.engine.connect()
+        stats = self.eng.get_pool_stats()
+        self.assertEqual((2, 1), (stats['checkout'], stats['timeout']))
+        self.assertGreaterEqual(stats['wait']['max'], 0.05)
+
+        # The pool that replaces a disposed one is timed too
+        self.eng.engine.dispose()
+        self.assertEqual(0, self._count_rows())
+        with self.eng.engine.connect():
+            with self.assertRaises(PoolTimeoutError):
+                self.eng.engine.connect()
+        stats = self.eng.get_pool_stats()
+        self.assertEqual((4, 2), (stats['checkout'], stats['timeout']))
+        self.assertEqual(6, stats['wait']['count'])
+
+    def test_query_metrics(self):
+        self.eng.query_metrics.reset()
+        self.eng.query_metrics.slow_threshold = 0.0
+        with command_scope('^sync') as cmd_ctx:
+            with self.eng.session_mgr() as session:
+                session.execute(text('INSERT INTO t VALUES (:x)'), [{'x': 1}, {'x': 2}, {'x': 3}])
+                session.execute(text('SELECT x FROM t WHERE x > :x'), {'x': 0}).all()
+                with self.assertRaises(OperationalError):
+                    session.execute(text('SELECT nope FROM t'))
+        self.assertEqual(3, cmd_ctx.db_queries)
+        self.assertGreater(cmd_ctx.db_time, 0)
+        session_totals = self.eng.get_session_query_totals(session).asdict()
+        self.assertEqual((3, 1, 3), (session_totals['queries'], session_totals['errors'], session_totals['rows']))
+
+        stats = self.eng.get_query_stats()
+        self.assertEqual({'INSERT', 'SELECT'}, set(stats['kinds'].keys()))
+        self.assertEqual((1, 2), (stats['kinds']['INSERT']['queries'], stats['kinds']['SELECT']['queries']))
+        self.assertEqual(3, stats['commands']['^sync']['queries'])
+        # Everything's over a 0s threshold. Parameter values are left out (sqlite gets them positionally)
+        self.assertEqual(3, stats['slow'])
+        self.assertEqual(['3 x (int)', '(int)', '()'], [x['params'] for x in stats['slow_queries']])
+        self.assertEqual({'^sync'}, {x['command'] for x in stats['slow_queries']})
+
+    def test_error_writer(self):
+        Base.metadata.create_all(self.eng.engine)
+        scenarios = {
+            'count field': ('n_occurrences', [('down', 30), ('other', 1)]),
+            'noted in text': (None, [('down [repeated 30 times]', 1), ('other', 1)]),
+        }
+        for name, (count_field, expected) in scenarios.items():
+            self.log.debug(f'Running scenario: {name}')
+            with self.eng.session_mgr() as session:
+                session.execute(text('DELETE FROM error_log'))
+            self.eng.error_writer = None
+            writer = self.eng.enable_error_writer(batch_size=100, flush_interval=0.05, count_field=count_field)
+            err = _raise('down')
+            for _ in range(30):
+                self.eng.log_error_to_db(err, TableErrorLog, 'api', command='hello')
+            self.eng.log_error_to_db(_raise('other'), TableErrorLog, 'api', command='hello')
+            self.assertTrue(writer.close(timeout=5))
+            with self.eng.session_mgr() as session:
+                rows = session.execute(select(TableErrorLog.error_text, TableErrorLog.n_occurrences,
+                                              TableErrorLog.command)).all()
+            self.assertEqual([(*x, 'hello') for x in expected], [tuple(x) for x in rows])
+            self.assertEqual({'queued': 31, 'dropped': 0, 'collapsed': 29, 'written': 31, 'failed': 0,
+                              'batches': 1, 'pending': 0}, writer.get_stats())
+
+    def test_bulk_upsert(self):
+        Base.metadata.create_all(self.eng.engine)
+        result = self.eng.bulk_upsert(TableUser, ({'user_id': f'U{i}', 'name': f'user {i}', 'n_msgs': i}
+                                                  for i in range(25)), chunk_size=10)
+        self.assertEqual((25, 3), (result.n_rows, result.n_chunks))
+        self.assertGreater(result.rows_per_sec, 0)
+
+        scenarios = {
+            'update every other column': (
+                pd.DataFrame({'user_id': ['U0', 'U99'], 'name': ['renamed', 'new'], 'n_msgs': [np.nan, 5]}),
+                None,
+                {'U0': ('renamed', None), 'U1': ('user 1', 1), 'U99': ('new', 5)}
+            ),
+            'update only some': (
+                [{'user_id': 'U1', 'name': 'renamed', 'n_msgs': 100}],
+                ['n_msgs'],
+                {'U1': ('user 1', 100)}
+            ),
+            'update nothing': (
+                [{'user_id': 'U2', 'name': 'renamed'}, {'user_id': 'U100', 'name': None}],
+                [],
+                {'U2': ('user 2', 2), 'U100': (None, None)}
+            ),
+        }
+        for name, (rows, update_cols, expected) in scenarios.items():
+            self.log.debug(f'Running scenario: {name}')
+            self.eng.bulk_upsert(TableUser, rows, update_cols=update_cols)
+            with self.eng.session_mgr() as session:
+                found = {x.user_id: (x.name, x.n_msgs) for x in session.execute(select(TableUser)).scalars()}
+            self.assertEqual(expected, {k: found[k] for k in expected})
+
+        result = self.eng.bulk_insert(TableUser, [{'user_id': f'A{i}', 'name': 'a'} for i in range(5)])
+        self.assertEqual(5, result.n_rows)
+        with self.eng.session_mgr() as session:
+            self.assertEqual(32, session.execute(text('SELECT COUNT(*) FROM user')).scalar())
+
+
+class TestSQLiteClient(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.log = get_test_logger()
+
+    def test_pragmas(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            eng = SQLiteClient(props={'database': os.path.join(tmpdir, 'test.db')},
+                               pragmas={**SQLITE_PERFORMANCE_PRAGMAS, 'busy_timeout': 1234})
+            self.assertEqual({'journal_mode': 'wal', 'synchronous': 1, 'mmap_size': 256 * 1024 * 1024,
+                              'cache_size': -64000, 'busy_timeout': 1234, 'temp_store': 2}, eng.get_pragmas())
+            eng.engine.dispose()
+
+        for pragmas in [{'journal_mode': 'WAL; DROP TABLE t'}, {'x=1; --': 1}]:
+            with self.assertRaises(ValueError):
+                SQLiteClient(props={'database': ':memory:'}, pragmas=pragmas)
+
+    def test_shared_memory(self):
+        eng = SQLiteClient(props={'database': 'test-cache'}, is_shared_memory=True)
+        with eng.session_mgr() as session:
+            session.execute(text('CREATE TABLE t (x INTEGER)'))
+            session.execute(text('INSERT INTO t VALUES (1)'))
+        # Even with every pooled connection closed, the db stays around
+        eng.engine.dispose()
+
+        counts = []
+
+        def _count():
+            with eng.session_mgr() as sess:
+                counts.append(sess.execute(text('SELECT COUNT(*) FROM t')).scalar())
+
+        thread = threading.Thread(target=_count)
+        thread.start()
+        thread.join()
+        other = SQLiteClient(props={'database': 'test-cache'}, is_shared_memory=True)
+        with other.session_mgr() as session:
+            counts.append(session.execute(text('SELECT COUNT(*) FROM t')).scalar())
+        self.assertEqual([1, 1], counts)
+
+
+class TestErrorLogWriter(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.log = get_test_logger()
+
+    def test_drops_and_failures(self):
+        release = threading.Event()
+        session = MagicMock(name='session')
+
+        @contextmanager
+        def _blocking_session_mgr():
+            release.wait(5)
+            yield session
+            raise RuntimeError('db is down')
+
+        writer = ErrorLogWriter(_blocking_session_mgr, max_queue=2, batch_size=1, flush_interval=0.01)
+        err_tbl = MagicMock(name='err_tbl')
+        results = [writer.put(_raise(str(i)), err_tbl, 'api') for i in range(10)]
+        # The writer holds one record while blocked on the db, the queue holds 2 more
+        self.assertLessEqual(sum(results), 3)
+        self.assertEqual(10, writer.get_stats()['queued'] + writer.get_stats()['dropped'])
+        release.set()
+        self.assertTrue(writer.close(timeout=5))
+        stats = writer.get_stats()
+        self.assertEqual((stats['queued'], 0), (stats['failed'], stats['written']))
+        # Closed writers drop whatever comes in
+        self.assertFalse(writer.put(_raise('late'), err_tbl, 'api'))
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import MagicMock
+
+from slacktools.api.base import BaseApiObject
+from slacktools.api.events.emoji import (
+    EmojiAdded,
+    EmojiRemoved,
+)
+from slacktools.api.events.message import Message
+from slacktools.api.events.reaction import ReactionAdded
+from slacktools.event_router import EventRouter
+from slacktools.slackbot import SlackBotBase
+
+from .common import (
+    get_test_logger,
+    make_patcher,
+)
+from .mocks.api.message import build_mock_message_event
+
+
+class TestEventRouter(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._log = get_test_logger()
+
+    def setUp(self) -> None:
+        self.router = EventRouter()
+
+    def test_models(self):
+        scenarios = {
+            'reaction': ({'type': 'reaction_added', 'reaction': 'wave'}, ReactionAdded),
+            'emoji_subtype': ({'type': 'emoji_changed', 'subtype': 'add', 'name': 'x'}, EmojiAdded),
+            'emoji_other_subtype': ({'type': 'emoji_changed', 'subtype': 'remove', 'names': ['x']}, EmojiRemoved),
+            'message_unknown_subtype': ({'type': 'message', 'subtype': 'channel_join', 'text': 'hi'}, Message),
+            'envelope': ({'type': 'event_callback', 'event': {'type': 'reaction_added'}}, ReactionAdded),
+            'unknown': ({'type': 'something_new'}, BaseApiObject),
+        }
+        for scen, (event_dict, expected_cls) in scenarios.items():
+            self._log.debug(f'Running scenario: {scen}')
+            self.assertIs(expected_cls, type(self.router.parse(event_dict)))
+
+    def test_dispatch(self):
+        calls = []
+        event = {'type': 'reaction_added', 'reaction': 'wave', 'user': 'U1'}
+        self.router.add_handler('reaction_added', lambda e, **kwargs: calls.append(('low', e, kwargs)), priority=-1)
+        self.router.add_handler('reaction_added', lambda e, **kwargs: calls.append(('high', e, kwargs)), priority=5)
+        self.router.add_handler('reaction_added', lambda e, **kwargs: calls.append(('mid', e, kwargs)))
+        self.router.add_handler('reaction_added', lambda e, **kwargs: calls.append(('filtered', e, kwargs)),
+                                predicate=lambda x: x['user'] == 'U2')
+
+        self.assertEqual(3, self.router.dispatch({'event': event}, extra='context'))
+        self.assertEqual(['high', 'mid', 'low'], [x[0] for x in calls])
+        # The model is built once and shared across handlers
+        self.assertEqual(1, len({id(x[1]) for x in calls}))
+        self.assertIsInstance(calls[0][1], ReactionAdded)
+        self.assertEqual({'extra': 'context'}, calls[0][2])
+        self.assertEqual(0, self.router.dispatch({'type': 'pin_added'}))
+
+    def test_subtypes_and_predicates(self):
+        model_cls = MagicMock(name='Model')
+        router = EventRouter(models=[])
+        router.register_model(model_cls, event_type='message', subtype=None)
+        all_handler = MagicMock(name='all')
+        plain_handler = MagicMock(name='plain')
+        router.add_handler('message', all_handler)
+        router.add_handler('message', plain_handler, subtype=None)
+
+        self.assertEqual(1, router.dispatch({'type': 'message', 'subtype': 'channel_join'}))
+        self.assertEqual(2, router.dispatch({'type': 'message'}))
+        self.assertEqual(3, all_handler.call_count + plain_handler.call_count)
+        self.assertEqual(2, model_cls.call_count)
+
+        # No model is built when every predicate rejects the event
+        model_cls.reset_mock()
+        router = EventRouter(models=[])
+        router.register_model(model_cls, event_type='message', subtype=None)
+        handler = router.add_handler('message', MagicMock(name='handler'), predicate=lambda x: False)
+        self.assertEqual(0, router.dispatch({'type': 'message'}))
+        model_cls.assert_not_called()
+        router.remove_handler(handler)
+        self.assertEqual([], router.get_handlers('message'))
+
+    def test_handler_exceptions(self):
+        after = MagicMock(name='after')
+        self.router.add_handler('pin_added', MagicMock(side_effect=ValueError('oops')), priority=1)
+        self.router.add_handler('pin_added', after)
+        self.assertEqual(2, self.router.dispatch({'type': 'pin_added'}))
+        after.assert_called_once()
+
+        self.router.is_raise = True
+        with self.assertRaises(ValueError):
+            self.router.dispatch({'type': 'pin_added'})
+
+    def test_bot_routing(self):
+        mock_webclient = make_patcher(self, 'slacktools.slack_methods.WebClient')
+        mock_bot = MagicMock(name='WebClient(Bot)')
+        mock_bot.auth_test.return_value = {'bot_id': 'B123', 'user_id': 'U123'}
+        mock_webclient.side_effect = [MagicMock(name='WebClient(User)'), mock_bot]
+        props = {'team': 'test-team', 'xoxp-token': 'xoxp...', 'xoxb-token': 'xoxb...'}
+        sbb = SlackBotBase(props=props, triggers=['hello'], main_channel='main', admins=[])
+        sbb.handle_command = MagicMock(name='handle_command')
+
+        # Channel events keep the directory current
+        sbb.channels.is_loaded = True
+        sbb.handle_event({'event': {'type': 'channel_created', 'channel': {'id': 'C9', 'name': 'new'}}})
+        self.assertEqual('C9', sbb.channels.get_channel_id('#new'))
+
+        # Messages make it to command handling
+        sbb.handle_event({'event': build_mock_message_event(text='hello there')}, users_dict={})
+        sbb.handle_command.assert_called_once()
+        self.assertEqual('there', sbb.handle_command.call_args.args[0].cleaned_message)
+        sbb.handle_event({'event': build_mock_message_event(text='just chatting')})
+        sbb.handle_command.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
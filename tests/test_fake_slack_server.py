@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+
+from slack_sdk.errors import SlackApiError
+
+from slacktools.fake_slack_server import FakeSlackServer
+from slacktools.slack_methods import SlackMethods
+
+from .common import get_test_logger
+
+
+class TestFakeSlackServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._log = get_test_logger()
+
+    def setUp(self) -> None:
+        self.server = FakeSlackServer(seed=123).start()
+        self.addCleanup(self.server.stop)
+        self.server.seed_workspace(n_users=5, n_channels=3, n_messages=4, n_emojis=2)
+        self.channel_id = next(iter(self.server.workspace.channels.keys()))
+        self.props = {
+            'team': 'fake-team',
+            'xoxp-token': 'xoxp-fake',
+            'xoxb-token': 'xoxb-fake',
+            'd-cookie': 'cookie',
+            'xoxc-token': 'xoxc-fake',
+        }
+        self.st = SlackMethods(self.props, main_channel=self.channel_id, is_use_session=True,
+                               base_url=self.server.base_url)
+
+    def test_identity(self):
+        self.assertEqual(self.server.workspace.bot_id, self.st.bot_id)
+        self.assertEqual(self.server.workspace.bot_user_id, self.st.user_id)
+
+    def test_messages(self):
+        ts = self.st.send_message(self.channel_id, message='hello there', ret_ts=True)
+        self.st.send_message(self.channel_id, message='a reply', thread_ts=ts)
+        self.st.update_message(self.channel_id, ts=ts, message='hello again')
+        history = self.st.get_channel_history(self.channel_id, limit=2)
+        self.assertEqual('hello again', history.messages[0].text)
+        replies = self.st.get_thread_history(self.channel_id, ts=ts)
+        self.assertEqual(2, len(replies.messages))
+        self.st.delete_message(channel=self.channel_id, ts=ts)
+        self.assertIsNone(self.server.workspace.find_message(self.channel_id, ts))
+
+        user_id = list(self.server.workspace.users.keys())[-1]
+        dm_chan, dm_ts = self.st.private_message(user_id, message='psst', ret_ts=True)
+        self.assertTrue(dm_chan.startswith('D'))
+
+        matches = self.st.search_messages_by_date(channel='channel-1', max_results=10)
+        self.assertEqual(4, len(matches))
+
+    def test_channels_and_users(self):
+        self.assertEqual(self.channel_id, self.st.get_channel_id('#channel-0'))
+        members = self.st.get_channel_members(self.channel_id, humans_only=True)
+        self.assertEqual(5, len(members))
+        self.assertEqual(2, len(self.st.get_emojis()))
+
+    def test_uploads(self):
+        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as f:
+            f.write(b'not really a png')
+        self.addCleanup(os.remove, f.name)
+        self.st.upload_file(self.channel_id, filepath=f.name, filename='thing.png')
+        self.assertTrue(self.st.session.upload_emoji(f.name))
+        self.assertIn(os.path.splitext(os.path.basename(f.name))[0], self.st.get_emojis())
+
+    def test_fault_injection(self):
+        self.server.fail_next('chat.postMessage', error='ratelimited')
+        self.server.fail_next('chat.postMessage', error='channel_not_found')
+        for expected_error in ['ratelimited', 'channel_not_found']:
+            with self.assertRaises(SlackApiError) as ctx:
+                self.st.send_message(self.channel_id, message='hello')
+            self.assertEqual(expected_error, ctx.exception.response['error'])
+        self.st.send_message(self.channel_id, message='hello')
+
+        stats = self.st.api_metrics.snapshot()['methods']['bot:chat.postMessage']
+        self.assertEqual(3, stats['calls'])
+        self.assertEqual(1, stats['rate_limited'])
+        self.assertEqual(3, self.server.call_counts['chat.postMessage'])
+
+
+if __name__ == '__main__':
+    unittest.main()
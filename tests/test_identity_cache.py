@@ -0,0 +1,170 @@
+import json
+from pathlib import Path
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from slacktools.identity_cache import (
+    BotIdentity,
+    IdentityCache,
+)
+from slacktools.slack_methods import SlackMethods
+from slacktools.slackbot import SlackBotBase
+
+from .common import (
+    get_test_logger,
+    make_patcher,
+)
+
+
+class TestIdentityCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._log = get_test_logger()
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = Path(self.tmp_dir.name).joinpath('cache', 'identity.json')
+        self.cache = IdentityCache(str(self.path), ttl=60)
+
+    def test_get_set(self):
+        self.assertIsNone(self.cache.get('xoxb-1'))
+        self.cache.set('xoxb-1', BotIdentity(bot_id='B1', user_id='U1', team_id='T1'))
+        identity = IdentityCache(str(self.path)).get('xoxb-1')
+        self.assertEqual(('B1', 'U1', 'T1'), (identity.bot_id, identity.user_id, identity.team_id))
+        self.assertIsNone(self.cache.get('xoxb-2'))
+        # Only the token's hash is written
+        self.assertNotIn('xoxb-1', self.path.read_text())
+
+    def test_expiry(self):
+        self.cache.set('xoxb-1', BotIdentity(bot_id='B1', user_id='U1', cached_at=time.time() - 120))
+        self.assertIsNone(self.cache.get('xoxb-1'))
+        self.assertEqual('B1', self.cache.get('xoxb-1', is_allow_expired=True).bot_id)
+        # Expired entries are dropped on the next write
+        self.cache.set('xoxb-2', BotIdentity(bot_id='B2', user_id='U2'))
+        with self.path.open() as f:
+            self.assertEqual([IdentityCache.get_token_key('xoxb-2')], list(json.load(f).keys()))
+
+    def test_unreadable(self):
+        scenarios = {
+            'not json': 'abc',
+            'not a dict': '[1, 2]',
+            'bad entry': json.dumps({IdentityCache.get_token_key('xoxb-1'): {'x': 1}}),
+        }
+        self.path.parent.mkdir(parents=True)
+        for name, content in scenarios.items():
+            self._log.debug(f'Running scenario: {name}')
+            self.path.write_text(content)
+            self.assertIsNone(self.cache.get('xoxb-1'))
+
+    def test_invalidate(self):
+        for token in ['xoxb-1', 'xoxb-2']:
+            self.cache.set(token, BotIdentity(bot_id='B', user_id='U'))
+        self.cache.invalidate('xoxb-1')
+        self.assertIsNone(self.cache.get('xoxb-1'))
+        self.assertIsNotNone(self.cache.get('xoxb-2'))
+        self.cache.invalidate()
+        self.assertIsNone(self.cache.get('xoxb-2'))
+
+
+class TestLazyIdentity(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._log = get_test_logger()
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.cache_path = str(Path(self.tmp_dir.name).joinpath('identity.json'))
+        self.mock_webclient = make_patcher(self, 'slacktools.slack_methods.WebClient')
+        self.props = {'team': 'team', 'xoxp-token': 'xoxp-123', 'xoxb-token': 'xoxb-123'}
+
+    def _build_bot_client(self) -> MagicMock:
+        mock_bot = MagicMock(name='bot')
+        mock_bot.auth_test.return_value = {'bot_id': 'B123', 'user_id': 'U123', 'team_id': 'T123'}
+        self.mock_webclient.side_effect = [MagicMock(name='user'), mock_bot]
+        return mock_bot
+
+    def test_lazy(self):
+        mock_bot = self._build_bot_client()
+        sm = SlackMethods(props=self.props, main_channel='C123')
+        mock_bot.auth_test.assert_not_called()
+        self.assertFalse(sm.is_identity_resolved)
+        self.assertEqual(('B123', 'U123'), (sm.bot_id, sm.user_id))
+        self.assertEqual('T123', sm.identity.team_id)
+        mock_bot.auth_test.assert_called_once()
+
+    def test_given(self):
+        mock_bot = self._build_bot_client()
+        sm = SlackMethods(props=self.props, main_channel='C123', bot_id='B9', user_id='U9')
+        self.assertEqual(('B9', 'U9'), (sm.bot_id, sm.user_id))
+        mock_bot.auth_test.assert_not_called()
+
+    def test_cached(self):
+        mock_bot = self._build_bot_client()
+        sm = SlackMethods(props=self.props, main_channel='C123', identity_cache_path=self.cache_path)
+        self.assertEqual('U123', sm.user_id)
+        # Another process with the same token reads it from the cache
+        mock_bot = self._build_bot_client()
+        sm = SlackMethods(props=self.props, main_channel='C123', identity_cache_path=self.cache_path)
+        self.assertEqual('U123', sm.user_id)
+        mock_bot.auth_test.assert_not_called()
+
+    def test_expired_fallback(self):
+        scenarios = {
+            'refreshed': (None, 'U123'),
+            'slack down': (TimeoutError('slow'), 'U1'),
+        }
+        for name, (side_effect, expected) in scenarios.items():
+            self._log.debug(f'Running scenario: {name}')
+            IdentityCache(self.cache_path).set('xoxb-123', BotIdentity(bot_id='B1', user_id='U1', cached_at=0))
+            mock_bot = self._build_bot_client()
+            mock_bot.auth_test.side_effect = side_effect
+            sm = SlackMethods(props=self.props, main_channel='C123', identity_cache_path=self.cache_path,
+                              identity_cache_ttl=60)
+            self.assertEqual(expected, sm.user_id)
+        # Without a cached identity to fall back on, the error is raised
+        mock_bot = self._build_bot_client()
+        mock_bot.auth_test.side_effect = TimeoutError('slow')
+        sm = SlackMethods(props=self.props, main_channel='C123')
+        with self.assertRaises(TimeoutError):
+            sm.user_id
+
+    def test_bot_triggers(self):
+        mock_bot = self._build_bot_client()
+        bot = SlackBotBase(props=self.props, triggers=['Hey'], main_channel='C123', admins=[])
+        mock_bot.auth_test.assert_not_called()
+        self.assertEqual(['U123', 'hey'], bot.triggers)
+        self.assertEqual(['<@U123>', 'hey'], bot.triggers_txt)
+        self.assertEqual(('U123', 'do a thing', 'do a thing'), bot.parse_direct_mention('<@U123> do a thing'))
+        self.assertEqual(('hey', 'help', 'help'), bot.parse_direct_mention('hey help'))
+        self.assertEqual((None, None, None), bot.parse_direct_mention('hello there'))
+        mock_bot.auth_test.assert_called_once()
+
+    def test_assigned_triggers(self):
+        class _Bot(SlackBotBase):
+            def __init__(self, **kwargs):
+                super().__init__(**kwargs)
+                self.triggers = ['hey', 'yo']
+                self.triggers_txt = ['hey', 'yo']
+
+        mock_bot = self._build_bot_client()
+        bot = _Bot(props=self.props, triggers=['hey', 'yo'], main_channel='C123', admins=[])
+        mock_bot.auth_test.assert_not_called()
+        self.assertEqual(['hey', 'yo'], bot.triggers)
+        self.assertEqual(['hey', 'yo'], bot.triggers_txt)
+        # What's not assigned is still built from the bot's identity, without touching the assigned ones
+        self.assertEqual(('yo', 'help', 'help'), bot.parse_direct_mention('yo help'))
+        self.assertEqual(['hey', 'yo'], bot.triggers)
+        bot.MENTION_REGEX = r'^(hi)([.\s\S ]*)'
+        self.assertEqual(r'^(hi)([.\s\S ]*)', bot.MENTION_REGEX)
+        # Assigning None builds it again
+        bot.triggers = None
+        self.assertEqual(['U123', 'hey', 'yo'], bot.triggers)
+        mock_bot.auth_test.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import json
+import subprocess
+import sys
+import unittest
+
+import slacktools
+
+from .common import get_test_logger
+
+HEAVY_MODULES = ['pandas', 'numpy', 'sqlalchemy', 'pygsheets', 'pykeepass', 'tabulate']
+
+
+def _modules_after_import(statement: str) -> list:
+    """Runs the import in a fresh interpreter and returns the heavy modules it loaded"""
+    code = f'import json, sys\n{statement}\nprint(json.dumps([x for x in {HEAVY_MODULES!r} if x in sys.modules]))'
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().split('\n')[-1])
+
+
+class TestLazyImports(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._log = get_test_logger()
+
+    def test_heavy_modules_not_loaded(self):
+        scenarios = {
+            'package': ('import slacktools', []),
+            'methods': ('from slacktools import SlackMethods', []),
+            'bot': ('from slacktools import SlackBotBase, SlackTools', []),
+            'secret store': ('from slacktools import SecretStore', []),
+            'sheets': ('from slacktools import GSheetAgent', []),
+            'db': ('from slacktools import PSQLClient', ['sqlalchemy']),
+        }
+        for name, (statement, expected) in scenarios.items():
+            self._log.debug(f'Running scenario: {name}')
+            self.assertEqual(expected, _modules_after_import(statement))
+
+    def test_public_names(self):
+        for name in slacktools.__all__:
+            self.assertIs(getattr(slacktools, name), getattr(getattr(slacktools, slacktools._LAZY_ATTRS[name]), name))
+            self.assertIn(name, dir(slacktools))
+        with self.assertRaises(AttributeError):
+            slacktools.NotAThing
+
+
+if __name__ == '__main__':
+    unittest.main()
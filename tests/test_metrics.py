@@ -0,0 +1,127 @@
+import json
+import unittest
+from unittest.mock import MagicMock
+
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web import WebClient
+
+from slacktools.metrics import (
+    UNMATCHED_COMMAND,
+    ApiMetricsRegistry,
+    Histogram,
+    command_scope,
+    get_current_command,
+    instrument_web_client,
+)
+from slacktools.slackbot import SlackBotBase
+
+from .common import (
+    get_test_logger,
+    make_patcher,
+)
+
+
+class TestApiMetrics(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._log = get_test_logger()
+
+    def setUp(self) -> None:
+        self.registry = ApiMetricsRegistry()
+        self.client = WebClient('xoxb-test')
+        self.mock_http = MagicMock(name='_perform_urllib_http_request')
+        self.client._perform_urllib_http_request = self.mock_http
+        instrument_web_client(self.client, registry=self.registry, client_name='bot')
+
+    def _set_response(self, body: dict, status: int = 200):
+        self.mock_http.return_value = {'status': status, 'headers': {}, 'body': json.dumps(body)}
+
+    def test_record_calls(self):
+        self._set_response({'ok': True, 'ts': '123.456'})
+        with command_scope('^help') as ctx:
+            self.assertEqual('^help', get_current_command())
+            self.client.chat_postMessage(channel='C123', text='hello')
+            self.client.chat_postMessage(channel='C123', text='hello again')
+        self.assertIsNone(get_current_command())
+        self.registry.record_command(ctx.name, ctx.elapsed)
+
+        snap = self.registry.snapshot()
+        stats = snap['methods']['bot:chat.postMessage']
+        self.assertEqual(2, stats['calls'])
+        self.assertEqual(2, stats['latency']['count'])
+        self.assertGreater(stats['request_bytes'], 0)
+        self.assertGreater(stats['response_bytes'], 0)
+        self.assertDictEqual({'chat.postMessage': 2}, snap['commands']['^help']['api_calls'])
+        self.assertEqual(1, snap['commands']['^help']['calls'])
+
+        # Db time gets split out from the command's wall time
+        self.registry.record_command('^sync', 2.0, db_time=0.5, db_queries=4)
+        snap = self.registry.snapshot()
+        self.assertEqual((0.5, 1.5, 4), tuple(snap['commands']['^sync'][x]
+                                              for x in ['db_time', 'non_db_time', 'db_queries']))
+
+    def test_errors_and_rate_limits(self):
+        scenarios = {
+            'error': {
+                'body': {'ok': False, 'error': 'channel_not_found'},
+                'status': 200,
+            },
+            'ratelimited': {
+                'body': {'ok': False, 'error': 'ratelimited'},
+                'status': 429,
+            },
+        }
+        for name, scen_dict in scenarios.items():
+            self._log.debug(f'Running scenario: {name}')
+            self._set_response(scen_dict['body'], status=scen_dict['status'])
+            with self.assertRaises(SlackApiError):
+                self.client.chat_postMessage(channel='C123', text='hello')
+
+        stats = self.registry.snapshot()['methods']['bot:chat.postMessage']
+        self.assertDictEqual({'channel_not_found': 1, 'ratelimited': 1}, stats['errors'])
+        self.assertEqual(1, stats['rate_limited'])
+
+    def test_sampling(self):
+        self.registry.sample_rate = 0
+        self._set_response({'ok': True})
+        for i in range(5):
+            self.client.auth_test()
+        stats = self.registry.snapshot()['methods']['bot:auth.test']
+        self.assertEqual(5, stats['calls'])
+        self.assertEqual(0, stats['sampled'])
+
+    def test_histogram(self):
+        hist = Histogram(bounds=(0.1, 1.0))
+        for val in [0.05, 0.5, 0.5, 5.0]:
+            hist.observe(val)
+        self.assertListEqual([1, 2, 1], hist.buckets)
+        self.assertEqual(1.0, hist.percentile(50))
+        self.assertEqual(5.0, hist.percentile(100))
+
+
+class TestCommandAttribution(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._log = get_test_logger()
+
+    def setUp(self) -> None:
+        mock_webclient = make_patcher(self, 'slacktools.slack_methods.WebClient')
+        mock_webclient.side_effect = [MagicMock(name='user'), MagicMock(name='bot')]
+        self.bot = SlackBotBase(props={'team': 'team', 'xoxp-token': 'xoxp-123', 'xoxb-token': 'xoxb-123'},
+                                triggers=['hey'], main_channel='C123', admins=[], bot_id='B123', user_id='U123')
+        self.addCleanup(self.bot.wait_for_pending_sends)
+
+    def test_failed_command_recorded(self):
+        make_patcher(self, 'slacktools.slackbot.SlackBotBase._handle_command').side_effect = ValueError('oops')
+        with self.assertRaises(ValueError):
+            self.bot.handle_command(MagicMock(name='message'))
+        self.assertEqual(1, self.bot.api_metrics.snapshot()['commands'][UNMATCHED_COMMAND]['calls'])
+
+    def test_background_send_attributed(self):
+        with command_scope('^report'):
+            future = self.bot._submit_background_send(get_current_command)
+        self.assertEqual('^report', future.result(timeout=5))
+
+
+if __name__ == '__main__':
+    unittest.main()
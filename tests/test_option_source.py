@@ -0,0 +1,154 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from slacktools.block_kit.blocks import ExternalSelectSectionBlock
+from slacktools.block_kit.elements.display import PlainTextElement
+from slacktools.block_kit.elements.input import (
+    MultiExternalSelectElement,
+    OptionObject,
+)
+from slacktools.option_source import (
+    OptionIndex,
+    OptionSource,
+)
+from slacktools.slackbot import SlackBotBase
+
+from .common import (
+    get_test_logger,
+    make_patcher,
+)
+
+
+class TestOptionSource(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._log = get_test_logger()
+
+    def test_external_select(self):
+        block = ExternalSelectSectionBlock('Pick an emoji', action_id='emoji-select', placeholder='Type to search',
+                                           min_query_length=2)
+        self.assertEqual({
+            'type': 'external_select',
+            'action_id': 'emoji-select',
+            'min_query_length': 2,
+            'placeholder': {'type': 'plain_text', 'text': 'Type to search', 'emoji': True},
+            'focus_on_load': False,
+        }, block.asdict()['accessory'])
+        self.assertEqual('multi_external_select', MultiExternalSelectElement(max_selected_items=3).asdict()['type'])
+
+    def test_option_index_search(self):
+        index = OptionIndex([
+            ('New York', 'nyc'),
+            ('York', 'york'),
+            ('Newark', 'ewr'),
+            ('Old New Town', 'old'),
+            ('Yorkshire Terrier', 'dog'),
+            OptionObject(PlainTextElement('Nowhere'), value='nowhere'),
+        ])
+        scenarios = {
+            'full text prefix, then word prefix': ('new', ['nyc', 'ewr', 'old']),
+            'case & whitespace': ('  NEW Y', ['nyc']),
+            'word prefix': ('york', ['york', 'dog', 'nyc']),
+            'substring': ('ewa', ['ewr']),
+            'short, no prefix match': ('wh', []),
+            'no match': ('zzz', []),
+            'empty': ('', ['nyc', 'york', 'ewr', 'old', 'dog', 'nowhere']),
+        }
+        for name, (query, expected) in scenarios.items():
+            self._log.debug(f'Running scenario: {name}')
+            self.assertEqual(expected, [v for _, v in index.search(query)])
+            # Repeated queries come from the cache
+            self.assertEqual(expected, [v for _, v in index.search(query)])
+        self.assertEqual(['nyc'], [v for _, v in index.search('new', limit=1)])
+
+        # Texts are cut to Slack's option limit in the response
+        index = OptionIndex([('x' * 100, 'long')])
+        self.assertEqual([{'text': {'type': 'plain_text', 'text': 'x' * 75}, 'value': 'long'}],
+                         index.build_options('x'))
+
+    def test_option_source_refresh(self):
+        loader = MagicMock(name='loader', return_value=[('a', '1')])
+        source = OptionSource(loader, ttl=300)
+        self.assertEqual([('a', '1')], source.get_index(timeout=5).search(''))
+        loader.assert_called_once()
+
+        # Stale indexes are still served while the reload happens in the background
+        loader.return_value = [('b', '2')]
+        source.ttl = 0
+        release = threading.Event()
+        loader.side_effect = lambda: release.wait(5) and [('b', '2')]
+        self.assertEqual([('a', '1')], source.get_index().search(''))
+        release.set()
+        for _ in range(100):
+            if source.get_index().search('') == [('b', '2')]:
+                break
+            threading.Event().wait(0.01)
+        self.assertEqual([('b', '2')], source.get_index().search(''))
+
+    def test_option_source_failed_load(self):
+        loader = MagicMock(name='loader', side_effect=ValueError('db down'))
+        source = OptionSource(loader, ttl=300, retry_after=60)
+        self.assertIsNone(source.get_index(timeout=5))
+        loader.assert_called_once()
+        self.assertTrue(source.is_backing_off)
+
+        # Until the retry's due, lookups don't wait or trigger another load
+        started = time.monotonic()
+        for _ in range(10):
+            self.assertIsNone(source.get_index(timeout=5))
+        self.assertLess(time.monotonic() - started, 1)
+        loader.assert_called_once()
+
+        # Once it is, the next lookup waits on the retry
+        source._failed_at -= 60
+        loader.side_effect = None
+        loader.return_value = [('a', '1')]
+        self.assertEqual([('a', '1')], source.get_index(timeout=5).search(''))
+        self.assertFalse(source.is_backing_off)
+        self.assertEqual(2, loader.call_count)
+
+        # A failed reload keeps serving the old index without retrying on every lookup
+        source.ttl = 0
+        loader.side_effect = ValueError('db down')
+        source.get_index()
+        for _ in range(100):
+            if source.is_backing_off:
+                break
+            threading.Event().wait(0.01)
+        self.assertEqual([('a', '1')], source.get_index().search(''))
+        self.assertEqual(3, loader.call_count)
+
+    def test_handle_block_suggestion(self):
+        mock_webclient = make_patcher(self, 'slacktools.slack_methods.WebClient')
+        mock_bot = MagicMock(name='WebClient(Bot)')
+        mock_bot.auth_test.return_value = {'bot_id': 'B123', 'user_id': 'U123'}
+        mock_webclient.side_effect = [MagicMock(name='WebClient(User)'), mock_bot]
+        props = {'team': 'test-team', 'xoxp-token': 'xoxp...', 'xoxb-token': 'xoxb...'}
+        sbb = SlackBotBase(props=props, triggers=['hello'], main_channel='main', admins=[])
+
+        sbb.register_option_source('emoji-select', lambda: [(f':{x}: {x}', x) for x in ['wave', 'water', 'fire']])
+        scenarios = {
+            'dict': ({'type': 'block_suggestion', 'action_id': 'emoji-select', 'value': 'wa'}, ['wave', 'water']),
+            'raw json': (b'{"type":"block_suggestion","action_id":"emoji-select","value":"fir"}', ['fire']),
+            'no value': ({'type': 'block_suggestion', 'action_id': 'emoji-select'}, ['wave', 'water', 'fire']),
+            'unregistered': ({'type': 'block_suggestion', 'action_id': 'other', 'value': 'wa'}, []),
+        }
+        for name, (payload, expected) in scenarios.items():
+            self._log.debug(f'Running scenario: {name}')
+            resp = sbb.handle_block_suggestion(payload)
+            self.assertEqual(expected, [x['value'] for x in resp['options']])
+
+        self._log.debug('Running scenario: still loading past the deadline')
+        release = threading.Event()
+        sbb.register_option_source('slow-select', lambda: release.wait(5) and [('a', 'a')])
+        self.assertEqual({'options': []},
+                         sbb.handle_block_suggestion({'action_id': 'slow-select', 'value': 'a'}, timeout=0.01))
+        release.set()
+        self.assertEqual(['a'], [x['value'] for x in sbb.handle_block_suggestion({'action_id': 'slow-select',
+                                                                                  'value': 'a'})['options']])
+
+
+if __name__ == '__main__':
+    unittest.main()
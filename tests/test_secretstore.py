@@ -0,0 +1,98 @@
+import os
+from pathlib import Path
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from pykeepass import (
+    PyKeePass,
+    create_database,
+)
+
+from slacktools.secretstore import (
+    SecretStore,
+    clear_database_cache,
+)
+
+from .common import get_test_logger
+
+
+class TestSecretStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._log = get_test_logger()
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.key_dir = Path(cls.tmpdir.name)
+        kp = create_database(str(cls.key_dir.joinpath('test.kdbx')), password='pw')
+        entry = kp.add_entry(kp.root_group, 'slack', 'bot', 'secret')
+        entry.set_custom_property('team', 'test-team')
+        entry.add_attachment(kp.add_binary(b'{"xoxb-token": "xoxb..."}'), 'tokens.json')
+        kp.add_entry(kp.root_group, 'gsheet', None, None).add_attachment(kp.add_binary(b'not json'), 'key.txt')
+        kp.save()
+        with open(cls.key_dir.joinpath('PW'), 'w') as f:
+            f.write('pw\n')
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmpdir.cleanup()
+
+    def setUp(self) -> None:
+        clear_database_cache()
+        key_dir_patcher = patch.object(SecretStore, 'KEY_DIR', self.key_dir)
+        key_dir_patcher.start()
+        self.addCleanup(key_dir_patcher.stop)
+        opener_patcher = patch('pykeepass.PyKeePass', wraps=PyKeePass)
+        self.mock_opener = opener_patcher.start()
+        self.addCleanup(opener_patcher.stop)
+
+    def test_database_cache(self):
+        stores = [SecretStore('test.kdbx', password_fname='PW'), SecretStore('test.kdbx', password='pw')]
+        # Opened only once for both
+        self.mock_opener.assert_called_once()
+        self.assertIs(stores[0].db, stores[1].db)
+
+        # A different file version is opened again
+        os.utime(self.key_dir.joinpath('test.kdbx'), ns=(1, 1))
+        SecretStore('test.kdbx', password='pw')
+        self.assertEqual(2, self.mock_opener.call_count)
+
+    def test_get_key(self):
+        store = SecretStore('test.kdbx', password='pw')
+        expected = {
+            'slack': {'un': 'bot', 'pw': 'secret', 'xoxb-token': 'xoxb...', 'team': 'test-team'},
+            'gsheet': {'key.txt': 'not json'},
+            'missing': {},
+        }
+        with patch.object(store.db, 'find_entries', wraps=store.db.find_entries) as mock_find:
+            for name, resp in expected.items():
+                self._log.debug(f'Running scenario: {name}')
+                self.assertEqual(resp, store.get_key(name))
+                self.assertEqual(resp, store.get_key(name))
+            # Each only looked up once
+            self.assertEqual(3, mock_find.call_count)
+
+            # Changes to what's returned don't make it into the memo
+            store.get_key('slack')['un'] = 'someone'
+            self.assertEqual('bot', store.get_key('slack')['un'])
+
+            store.invalidate('slack')
+            store.get_key('slack')
+            self.assertEqual(4, mock_find.call_count)
+        self.assertEqual('xoxb...', store.get_key_and_make_ns('slack').xoxb_token)
+
+        store.invalidate(is_reload=True)
+        self.assertEqual(2, self.mock_opener.call_count)
+        self.assertEqual(expected['slack'], store.get_key('slack'))
+
+    def test_get_keys(self):
+        store = SecretStore('test.kdbx', password='pw')
+        store.get_key('gsheet')
+        self.assertEqual({
+            'slack': {'un': 'bot', 'pw': 'secret', 'xoxb-token': 'xoxb...', 'team': 'test-team'},
+            'gsheet': {'key.txt': 'not json'},
+            'missing': {},
+        }, store.get_keys(['slack', 'gsheet', 'missing', 'slack']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,11 @@
 import unittest
 
-from slacktools.slack_input_parser import SlackInputParser
+from slacktools.block_kit.blocks import MarkdownSectionBlock
+from slacktools.slack_input_parser import (
+    SlackInputParser,
+    TextMemo,
+    block_text_converter,
+)
 
 
 class TestSlackInputParser(unittest.TestCase):
@@ -29,6 +34,64 @@ class TestSlackInputParser(unittest.TestCase):
         self.assertEqual(flag1_val, resp_dict[flag1_name])
         self.assertEqual(flag2_val, resp_dict[flag2_name])
 
+    def test_block_text_converter(self):
+        def _build_blocks():
+            return [
+                {'type': 'section', 'text': {'type': 'mrkdwn', 'text': 'hello'}},
+                {'type': 'context', 'elements': [{'type': 'mrkdwn', 'text': 'hello'},
+                                                 {'type': 'mrkdwn', 'text': 'bye'}]},
+                {'type': 'actions', 'elements': [{'type': 'button', 'text': {'type': 'plain_text', 'text': 'go'},
+                                                  'value': 'go'}]},
+            ]
+
+        expected = _build_blocks()
+        expected[0]['text']['text'] = 'HELLO'
+        expected[1]['elements'][0]['text'] = 'HELLO'
+        expected[1]['elements'][1]['text'] = 'BYE'
+        expected[2]['elements'][0]['text']['text'] = 'GO'
+
+        calls = []
+
+        def _upper(txt: str, suffix: str = '') -> str:
+            calls.append(txt)
+            return txt.upper() + suffix
+
+        memo = TextMemo()
+        blocks = _build_blocks()
+        self.assertIs(blocks, block_text_converter(blocks, callable_list=[_upper, 'text'], memo=memo))
+        self.assertEqual(expected, blocks)
+        # Each unique text is converted once
+        self.assertEqual(['hello', 'bye', 'go'], calls)
+
+        # The memo carries over to the next call
+        blocks = block_text_converter(_build_blocks(), callable_list=[_upper, 'text'], memo=memo)
+        self.assertEqual(expected, blocks)
+        self.assertEqual(3, len(calls))
+        # ...but not between different arguments
+        blocks = block_text_converter(_build_blocks(), callable_list=[_upper, 'text', '!'], memo=memo)
+        self.assertEqual('HELLO!', blocks[0]['text']['text'])
+        self.assertEqual(6, len(calls))
+
+        # Nothing's remembered without a memo
+        block_text_converter(_build_blocks(), callable_list=[_upper, 'text'])
+        block_text_converter(_build_blocks(), callable_list=[_upper, 'text'])
+        self.assertEqual(12, len(calls))
+
+        # Thread pool & batch callables
+        blocks = block_text_converter(_build_blocks(), callable_list=[str.upper, 'text'], n_workers=4)
+        self.assertEqual(expected, blocks)
+        blocks = block_text_converter(_build_blocks(), batch_callable=lambda x: [y.upper() for y in x])
+        self.assertEqual(expected, blocks)
+
+        # Callables that don't take the text are called for every field
+        counter = iter(range(10))
+        blocks = block_text_converter(_build_blocks(), callable_list=[lambda: str(next(counter))])
+        self.assertEqual(4, next(counter))
+
+        # Elements are rendered to dicts
+        blocks = block_text_converter([MarkdownSectionBlock('hello')], callable_list=[str.upper, 'text'])
+        self.assertEqual('HELLO', blocks[0]['text']['text'])
+
 
 if __name__ == '__main__':
     unittest.main()
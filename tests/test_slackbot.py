@@ -38,7 +38,8 @@ class TestSlackBotBase(unittest.TestCase):
         }
 
         self.sbb = SlackBotBase(props=self.mock_props, triggers=['hello'], main_channel='main', admins=['asdl;k'])
-        self.mock_webclient_bot.auth_test.assert_called()
+        # The bot's identity is looked up on first use
+        self.mock_webclient_bot.auth_test.assert_not_called()
 
     def test_build_command_output(self):
         """Tests build_command_output"""
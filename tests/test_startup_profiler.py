@@ -0,0 +1,129 @@
+import json
+import os
+from pathlib import Path
+import pstats
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import (
+    MagicMock,
+    patch,
+)
+
+from slacktools import startup_profiler
+from slacktools.slack_methods import SlackMethods
+from slacktools.startup_profiler import (
+    ENV_ENABLE,
+    ENV_REPORT_PATH,
+    StartupProfiler,
+    enable_startup_profiler,
+    finish_startup_profile,
+    startup_phase,
+    timed_startup_phase,
+)
+
+from .common import (
+    get_test_logger,
+    make_patcher,
+)
+
+
+class TestStartupProfiler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._log = get_test_logger()
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        # Each test gets a fresh profiler, and profiling's left off for the other tests
+        self._orig_profiler = startup_profiler._profiler
+        startup_profiler._profiler = None
+        self.addCleanup(setattr, startup_profiler, '_profiler', self._orig_profiler)
+
+    def test_disabled(self):
+        with startup_phase('nothing') as phase:
+            self.assertIsNone(phase)
+        self.assertIsNone(finish_startup_profile())
+        scenarios = {
+            'unset': ({}, False),
+            'zero': ({ENV_ENABLE: '0'}, False),
+            'set': ({ENV_ENABLE: '1'}, True),
+            'cprofile only': ({'SLACKTOOLS_STARTUP_CPROFILE': os.path.join(self.tmp_dir.name, 'x.prof')}, True),
+        }
+        for name, (env, is_enabled) in scenarios.items():
+            self._log.debug(f'Running scenario: {name}')
+            with patch.dict(os.environ, env, clear=True):
+                profiler = StartupProfiler.from_env()
+            self.assertEqual(is_enabled, profiler is not None)
+            if profiler is not None and profiler._profile is not None:
+                profiler._profile.disable()
+
+    def test_phases(self):
+        report_path = os.path.join(self.tmp_dir.name, 'startup.json')
+        profiler = enable_startup_profiler(report_path=report_path)
+
+        @timed_startup_phase('outer')
+        def _outer():
+            with startup_phase('inner', source='test'):
+                pass
+            with startup_phase('inner'):
+                pass
+
+        _outer()
+        with startup_phase('import something'):
+            pass
+        report = finish_startup_profile()
+        self.assertTrue(profiler.is_finished)
+        self.assertEqual(['outer', 'inner', 'inner', 'import something'], [x['name'] for x in report['phases']])
+        self.assertEqual([0, 1, 1, 0], [x['depth'] for x in report['phases']])
+        self.assertEqual('test', report['phases'][1]['source'])
+        self.assertEqual(2, report['totals']['inner']['count'])
+        self.assertEqual(['something'], list(report['imports'].keys()))
+        self.assertGreaterEqual(report['elapsed'], report['phase_time'])
+        with open(report_path) as f:
+            self.assertEqual(report['phases'], json.load(f)['phases'])
+        # Startup's over - nothing else is recorded
+        with startup_phase('late') as phase:
+            self.assertIsNone(phase)
+        self.assertEqual(4, len(profiler.phases))
+
+    def test_cprofile(self):
+        cprofile_path = os.path.join(self.tmp_dir.name, 'startup.prof')
+        enable_startup_profiler(cprofile_path=cprofile_path)
+        with startup_phase('work'):
+            sum(range(1000))
+        report = finish_startup_profile()
+        self.assertEqual(cprofile_path, report['cprofile_path'])
+        self.assertGreater(pstats.Stats(cprofile_path).total_calls, 0)
+
+    def test_slack_methods_phases(self):
+        mock_webclient = make_patcher(self, 'slacktools.slack_methods.WebClient')
+        mock_bot = MagicMock(name='bot')
+        mock_bot.auth_test.return_value = {'bot_id': 'B123', 'user_id': 'U123'}
+        mock_webclient.side_effect = [MagicMock(name='user'), mock_bot]
+        enable_startup_profiler()
+        sm = SlackMethods(props={'team': 'team', 'xoxp-token': 'xoxp-123', 'xoxb-token': 'xoxb-123'},
+                          main_channel='C123')
+        # The auth test happens on first use of the bot's identity
+        sm.user_id
+        report = finish_startup_profile()
+        self.assertEqual(
+            [('SlackMethods.__init__', 0), ('SlackMethods.clients', 1), ('SlackMethods.auth_test', 0)],
+            [(x['name'], x['depth']) for x in report['phases']]
+        )
+
+    def test_lazy_import_phases(self):
+        report_path = Path(self.tmp_dir.name).joinpath('startup.json')
+        env = {**os.environ, ENV_ENABLE: '1', ENV_REPORT_PATH: str(report_path)}
+        subprocess.run([sys.executable, '-c', 'from slacktools import SlackMethods'], env=env, check=True,
+                       capture_output=True)
+        with report_path.open() as f:
+            report = json.load(f)
+        self.assertIn('slacktools.slack_methods', report['imports'])
+        self.assertGreater(report['phases'][0]['modules_loaded'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
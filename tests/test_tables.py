@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+
+from slacktools.tables import (
+    UPLOAD_AS_SNIPPET,
+    TableLayout,
+)
+from slacktools.tools import SlackTools
+
+from .common import (
+    get_test_logger,
+    make_patcher,
+)
+
+
+class TestTables(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._log = get_test_logger()
+
+    def setUp(self) -> None:
+        self.df = pd.DataFrame({
+            'user': ['ab', 'cde\nf', None],
+            'count': [1, 22, 3],
+            'score': [1.5, 22.25, np.nan],
+            'ok': [True, False, True],
+        })
+
+    def test_render_lines(self):
+        scenarios = {
+            'mixed types': (self.df, [
+                '| user  | count | score | ok    |',
+                '|-------|-------|-------|-------|',
+                '| ab    |     1 |  1.5  | True  |',
+                '| cde f |    22 | 22.25 | False |',
+                '|       |     3 |       | True  |',
+            ]),
+            'no rows': (pd.DataFrame({'a': [], 'b': pd.Series([], dtype=float)}), [
+                '| a | b |',
+                '|---|---|',
+            ]),
+            'nullable': (pd.DataFrame({'n': pd.array([10, None], dtype='Int64')}), [
+                '|  n |',
+                '|----|',
+                '| 10 |',
+                '|    |',
+            ]),
+            'no columns': (pd.DataFrame(), []),
+        }
+        for name, (df, expected) in scenarios.items():
+            self._log.debug(f'Running scenario: {name}')
+            layout = TableLayout(df)
+            self.assertEqual(expected, layout.render_lines())
+            # The size is known before rendering
+            self.assertEqual(len('\n'.join(expected)), layout.n_chars)
+
+    def test_render_chunks(self):
+        layout = TableLayout(self.df)
+        line_chars = layout.line_width + 1
+        scenarios = {
+            'all in one': (10000, [5]),
+            'exactly two rows each': (4 * line_chars - 1, [4, 3]),
+            'one row each': (3 * line_chars - 1, [3, 3, 3]),
+        }
+        for name, (max_chars, expected) in scenarios.items():
+            self._log.debug(f'Running scenario: {name}')
+            chunks = layout.render_chunks(max_chars=max_chars)
+            self.assertEqual(expected, [len(x.split('\n')) for x in chunks])
+            self.assertTrue(all(len(x) <= max_chars for x in chunks))
+            # Every chunk repeats the header
+            self.assertTrue(all(x.startswith(layout.render_header()[0]) for x in chunks))
+
+        with self.assertRaises(ValueError):
+            layout.render_chunks(max_chars=3 * line_chars - 2)
+
+    def test_send_table(self):
+        mock_webclient = make_patcher(self, 'slacktools.slack_methods.WebClient')
+        mock_bot = MagicMock(name='WebClient(Bot)')
+        mock_bot.auth_test.return_value = {'bot_id': 'B123', 'user_id': 'U123'}
+        mock_bot.chat_postMessage.return_value = {'ok': True, 'ts': '1.0'}
+        mock_bot.files_upload_v2.return_value = {'ok': True}
+        mock_webclient.side_effect = [MagicMock(name='WebClient(User)'), mock_bot]
+        props = {'team': 'test-team', 'xoxp-token': 'xoxp...', 'xoxb-token': 'xoxb...'}
+        st = SlackTools(props=props, main_channel='C123')
+
+        self._log.debug('Running scenario: posted as code blocks')
+        st.send_table('C123', self.df, title='*Report*', is_background=False)
+        mock_bot.chat_postMessage.assert_called_once()
+        mock_bot.files_upload_v2.assert_not_called()
+        self.assertIn('```\\n| user  | count |', mock_bot.chat_postMessage.call_args.kwargs['blocks'])
+
+        self._log.debug('Running scenario: csv upload over the threshold')
+        future = st.send_table('C123', self.df, title='Report', upload_threshold_chars=10)
+        self.assertTrue(st.wait_for_pending_sends(timeout=5))
+        self.assertEqual({'ok': True}, future.result())
+        kwargs = mock_bot.files_upload_v2.call_args.kwargs
+        self.assertEqual('table.csv', kwargs['filename'])
+        self.assertEqual(b'user,count,score,ok\nab,1,1.5,True\n', kwargs['content'][:34])
+        mock_bot.chat_postMessage.assert_called_once()
+
+        self._log.debug('Running scenario: snippet upload of rows too wide for a chunk')
+        st.send_table('C123', self.df, max_chunk_chars=50, upload_as=UPLOAD_AS_SNIPPET, is_background=False,
+                      thread_ts='1.0')
+        kwargs = mock_bot.files_upload_v2.call_args.kwargs
+        self.assertEqual(('table.txt', 'text', '1.0'), (kwargs['filename'], kwargs['snippet_type'],
+                                                        kwargs['thread_ts']))
+        self.assertEqual(SlackTools.df_to_slack_table(self.df), kwargs['content'])
+
+        with self.assertRaises(ValueError):
+            st.send_table('C123', self.df, upload_as='xlsx')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+from random import Random
+import unittest
+
+from slacktools.text_effects import (
+    TINY_TEXT_SOURCE,
+    TINY_TEXT_TARGETS,
+    EmojiPhraseBuilder,
+    build_emoji_letter_pools,
+    tiny_text,
+    tiny_text_batch,
+)
+
+from .common import get_test_logger
+
+
+class TestTextEffects(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._log = get_test_logger()
+
+    def test_tiny_text(self):
+        scenarios = {
+            'supscript': ('Hi 2 (you)!', 'ᴴᶦ ² ⁽ʸᵒᵘ⁾ᵎ'),
+            'subscript': ('a+b=c', 'ₐ₊ᵦ₌𝒸'),
+            'smallcaps': ('hey $1', 'ʜᴇʏ $1'),
+            'unknown': ('hey', 'ʰᵉʸ'),
+        }
+        for text_type, (msg, expected) in scenarios.items():
+            self._log.debug(f'Running scenario: {text_type}')
+            self.assertEqual(expected, tiny_text(msg, text_type=text_type))
+            self.assertEqual([expected, expected], tiny_text_batch([msg, msg], text_type=text_type))
+
+        # Matches the character-by-character lookup it replaced
+        for text_type, target in TINY_TEXT_TARGETS.items():
+            expected = ''.join(target[TINY_TEXT_SOURCE.find(x)] for x in TINY_TEXT_SOURCE)
+            self.assertEqual(expected, tiny_text(TINY_TEXT_SOURCE, text_type=text_type))
+
+    def test_emoji_phrase_builder(self):
+        builder = EmojiPhraseBuilder(rand=Random(1))
+        resp = builder.build('hello this is a test 23.!')
+        self.assertNotIn(' ', resp)
+        self.assertIn(':mana2:', resp)
+        self.assertIn('$', builder.build('hello$$'))
+        self.assertEqual(3, len(builder.build_batch(['a', 'b', 'c'])))
+
+        self._log.debug('Running scenario: filtered to the workspace\'s emojis')
+        builder = EmojiPhraseBuilder(emoji_catalog=['scrabble-h', 'mana2'], rand=Random(1))
+        # Only scrabble & the built-in regional indicators are left for 'h'
+        for emoji in builder.pools['h']:
+            self.assertIn(emoji, [':scrabble-h:', ':regional_indicator_h:'])
+        # No blank emoji in the workspace, so spaces stay spaces
+        self.assertEqual(':mana2: ', builder.build('2 '))
+        # No emojis left for '3' at all
+        self.assertEqual('3', builder.build('3'))
+        self.assertGreater(len(build_emoji_letter_pools()), 26)
+
+
+if __name__ == '__main__':
+    unittest.main()